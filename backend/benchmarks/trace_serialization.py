@@ -0,0 +1,102 @@
+"""CPU time to turn a large step-by-step trace into an HTTP response body.
+
+    python -m backend.benchmarks.trace_serialization [iterations] [repeats]
+
+Compares the former path of /sbs (export_trace_json with indent=2, json.loads
+back, then FastAPI's jsonable_encoder and JSONResponse encoding the result a
+third time) with the direct one (step dicts encoded once by
+json_encoding.dumps, orjson if installed): first the encoding alone, on one
+recorded trace, then end to end, from parsing the pseudocode to the response
+body, the latter through service.step_by_step_execution as /sbs calls it.
+"""
+import contextlib
+import io
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.src import service
+from backend.src.json_encoding import RawJSON, dumps, encode_object, orjson
+from backend.src.pseudocode_to_cpp.compiler.lexer import lex
+from backend.src.pseudocode_to_cpp.compiler.parser import Parser
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import StepByStepInterpreter
+
+PROGRAM = """s <- 0
+pentru i <- 1, {iterations} executa
+    s <- s + i * i
+    daca i % 100 = 0 atunci
+        scrie "i = ", i, ", s = ", s
+    sfarsit_daca
+sfarsit_pentru
+scrie s"""
+
+
+def round_trip(interpreter: StepByStepInterpreter) -> bytes:
+    trace = json.loads(interpreter.export_trace_json())
+    content = jsonable_encoder({"json_execution": trace, "trace_id": "0" * 32, "total_steps": len(trace)})
+    return JSONResponse(content).body
+
+
+def direct(interpreter: StepByStepInterpreter) -> bytes:
+    trace = RawJSON(dumps([interpreter.step_to_dict(step) for step in interpreter.execution_trace]))
+    return encode_object({"json_execution": trace, "trace_id": "0" * 32,
+                          "total_steps": len(interpreter.execution_trace)})
+
+
+def run(program: str) -> StepByStepInterpreter:
+    ast = Parser(list(lex(program))).parse_program()
+    interpreter = StepByStepInterpreter(enable_debug=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.visit(ast)
+    return interpreter
+
+
+def former_endpoint(program: str) -> bytes:
+    return round_trip(run(program))
+
+
+def current_endpoint(program: str) -> bytes:
+    with contextlib.redirect_stdout(io.StringIO()):
+        trace, trace_id, total_steps = service.step_by_step_execution(program)
+    return encode_object({"json_execution": trace, "trace_id": trace_id, "total_steps": total_steps})
+
+
+def best_of(function, argument, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.process_time()
+        body = function(argument)
+        timings.append(time.process_time() - start)
+    return min(timings), len(body)
+
+
+def report(title: str, argument, paths, repeats: int) -> None:
+    print(title)
+    baseline = None
+    for name, function in paths:
+        seconds, size = best_of(function, argument, repeats)
+        baseline = baseline or seconds
+        print(f"  {name:24} {seconds * 1000:9.1f} ms CPU  {size / 1e6:7.2f} MB  {baseline / seconds:5.1f}x")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    program = PROGRAM.format(iterations=iterations)
+    interpreter = run(program)
+    if json.loads(round_trip(interpreter)) != json.loads(direct(interpreter)):
+        raise SystemExit("The two paths produced different responses")
+
+    print(f"{len(interpreter.execution_trace)} steps, encoder: {'orjson' if orjson else 'json'}")
+    report("encoding only", interpreter,
+           (("dumps/loads round trip", round_trip), ("direct to bytes", direct)), repeats)
+    report("end to end", program,
+           (("former /sbs", former_endpoint), ("step_by_step_execution", current_endpoint)), repeats)
+
+
+if __name__ == "__main__":
+    main()
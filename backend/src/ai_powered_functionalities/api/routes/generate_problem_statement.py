@@ -1,21 +1,84 @@
 # router file
-from fastapi import APIRouter, HTTPException, Request
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
 from ....rate_limiter import rate_limit
+from ...config import get_settings
 from ...generate_problem_statements.generate_problems import GenerateProblem
+from ...generate_problem_statements.problem_pool import ProblemPool, normalize_difficulty
 from ...models.responses import GenerateProblemStatementResponse
+from ...utils.sse import sse_event, sse_response
 
 router = APIRouter(prefix="/generate-problems", tags=["Generate Problem Statements"])
 
+settings = get_settings()
 generator = GenerateProblem()
+problem_pool = ProblemPool(
+    generator,
+    capacity_per_level=settings.PROBLEM_POOL_SIZE,
+    batch_size=settings.PROBLEM_POOL_BATCH_SIZE,
+    path=os.path.join(settings.CACHE_DIR, "problem_pool.json")
+)
+
+
+@router.on_event("startup")
+async def start_problem_pool():
+    problem_pool.start()
+
+
+@router.on_event("shutdown")
+async def stop_problem_pool():
+    await problem_pool.stop()
+
 
 @router.post("/", response_model=GenerateProblemStatementResponse)
 @rate_limit(max_calls=10, window_hours=1)
-async def generate_problem_statement(request: Request):
+async def generate_problem_statement(request: Request, nivel_dificultate: Optional[str] = None):
     """
     Generate problem statements that can be solved in pseudocode.
+
+    - **nivel_dificultate**: optional difficulty (usor, mediu, dificil)
     """
     try:
-        result = await generator.generate_problem()
+        result = await problem_pool.get(nivel_dificultate)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+@rate_limit(max_calls=10, window_hours=1)
+async def generate_problem_statement_stream(request: Request, nivel_dificultate: Optional[str] = None,
+                                            count: int = Query(1, ge=1, le=5)):
+    """
+    Generate problem statements, streamed as Server-Sent Events.
+
+    Problems already in the pool are sent first; the rest are generated and
+    each **problem** event is sent as soon as its statement is complete, with
+    **delta** events carrying the raw model output in between. The stream ends
+    with **done**, or **error** if the model call fails.
+    """
+    async def events():
+        served = 0
+        while served < count:
+            problem = problem_pool.take(nivel_dificultate)
+            if problem is None:
+                break
+            served += 1
+            yield sse_event("problem", problem.dict())
+        problem_pool.request_refill()
+
+        try:
+            if served < count:
+                async for kind, payload in generator.stream_problems(count - served,
+                                                                     normalize_difficulty(nivel_dificultate)):
+                    if kind == "delta":
+                        yield sse_event("delta", {"text": payload})
+                    else:
+                        yield sse_event("problem", payload.dict())
+            yield sse_event("done", {})
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return sse_response(events())
@@ -1,8 +1,14 @@
+import hashlib
+import io
+from typing import BinaryIO
+
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 
 from ...config import get_settings
 from ...models.responses import OCRResponse
 from ...ocr.text_extractor import TextExtractor
+from ...utils.ai_client import sniff_image_mime_type
 from ....rate_limiter import rate_limit
 
 router = APIRouter(prefix="/ocr", tags=["Image to Text"])
@@ -10,6 +16,40 @@ router = APIRouter(prefix="/ocr", tags=["Image to Text"])
 text_extractor = TextExtractor()
 settings = get_settings()
 
+# Enough of the file to recognize every supported image signature
+SIGNATURE_BYTES = 16
+
+
+def _check_upload(upload: BinaryIO) -> str:
+    """Validate the received upload where it already is and return its SHA-256.
+
+    The format is taken from the file signature rather than the client-supplied
+    content type, and the size from the file itself; only a valid upload is
+    hashed. Blocking (the upload may be on disk); run it in a worker thread.
+    """
+    max_bytes = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+    allowed_types = {f"image/{fmt}" for fmt in settings.ALLOWED_IMAGE_FORMATS}
+
+    size = upload.seek(0, io.SEEK_END)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty file")
+    if size > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Max size: {settings.MAX_IMAGE_SIZE_MB}MB"
+        )
+    upload.seek(0)
+    if sniff_image_mime_type(upload.read(SIGNATURE_BYTES)) not in allowed_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed: {settings.ALLOWED_IMAGE_FORMATS}"
+        )
+
+    upload.seek(0)
+    digest = hashlib.file_digest(upload, "sha256").hexdigest()
+    upload.seek(0)
+    return digest
+
 
 @router.post("/", response_model=OCRResponse)
 @rate_limit(max_calls=3, window_hours=1)
@@ -21,27 +61,25 @@ async def extract_pseudocode_from_image(
     Extract Romanian pseudocode from an image.
 
     Supported formats: JPG, JPEG, PNG, BMP
-    Max size: 10MB
+    Max size: 10MB. The limit is enforced by BodySizeLimitMiddleware while the
+    body streams in, before the multipart parser spools it; the size check
+    here only applies to the file part itself.
     """
-    # Validate file type
-    if image.content_type not in [f"image/{fmt}" for fmt in settings.ALLOWED_IMAGE_FORMATS]:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed: {settings.ALLOWED_IMAGE_FORMATS}"
-        )
-
-    # Read image bytes
-    image_bytes = await image.read()
-
-    # Validate file size
-    if len(image_bytes) > settings.MAX_IMAGE_SIZE_MB * 1024 * 1024:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Max size: {settings.MAX_IMAGE_SIZE_MB}MB"
-        )
+    # Validate type and size without trusting the declared content type or copying the file
+    try:
+        digest = await run_in_threadpool(_check_upload, image.file)
+    except HTTPException:
+        await image.close()
+        raise
+    except Exception as e:
+        await image.close()
+        raise HTTPException(status_code=500, detail=str(e))
 
+    # From here the extractor owns the file: a shared extraction may still read it after
+    # this request is gone, so it is closed there and not by the route
     try:
-        result = await text_extractor.extract_and_clean(image_bytes)
-        return result
+        return await text_extractor.extract_and_clean(image.file, digest)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
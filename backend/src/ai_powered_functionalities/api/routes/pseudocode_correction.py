@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, Request, Body
 from ...correction_pseudocode.corrector import CodeCorrector
 from ...models.requests import CodeCorrectionRequest
 from ...models.responses import CodeCorrectionResponse
+from ...utils.sse import sse_event, sse_response
 from ....rate_limiter import rate_limit
 
 router = APIRouter(prefix="/correction", tags=["Code Correction"])
@@ -29,4 +30,30 @@ async def correct_pseudocode(
         result_dict = result.dict() if hasattr(result, 'dict') else result
         return result_dict
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+@rate_limit(max_calls=10, window_hours=1)
+async def correct_pseudocode_stream(
+        request: Request,
+        request_data: CodeCorrectionRequest = Body(...)
+):
+    """
+    Same as the correction endpoint, streamed as Server-Sent Events.
+
+    - **delta** events carry the model output as it is generated (`{"text": ...}`)
+    - a final **result** event carries the parsed correction
+    - **error** is sent instead of the result if the model call fails
+    """
+    async def events():
+        try:
+            async for kind, payload in corrector.stream_correction(request_data.code):
+                if kind == "delta":
+                    yield sse_event("delta", {"text": payload})
+                else:
+                    yield sse_event("result", payload.dict())
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+    return sse_response(events())
@@ -6,8 +6,38 @@ from pathlib import Path
 class Settings(BaseSettings):
     GEMINI_API_KEY: str
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    # "gemini" for the real API, "fake" for an offline echo model (local tests)
+    GEMINI_BACKEND: str = "gemini"
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_TIMEOUT_SECONDS: float = 60.0
     MAX_IMAGE_SIZE_MB: int = 10
     ALLOWED_IMAGE_FORMATS: list = ["jpg", "jpeg", "png", "bmp"]
+    # Images are shrunk in a worker pool before being sent to the vision model
+    OCR_MAX_IMAGE_SIDE: int = 1280
+    OCR_JPEG_QUALITY: int = 75
+    OCR_PREPROCESS_WORKERS: int = 2
+
+    # Rate limiting: "memory" (per process) or "sqlite" (shared by all workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 10000
+    RATE_LIMIT_SQLITE_PATH: str = "rate_limits.sqlite3"
+
+    # Caches for AI responses (persisted under CACHE_DIR)
+    CACHE_DIR: str = ".cache"
+    CORRECTION_CACHE_TTL_SECONDS: int = 24 * 3600
+    CORRECTION_CACHE_MAX_ENTRIES: int = 1024
+    # Answer code the local parser accepts (after unambiguous fixes) without a model call
+    CORRECTION_LOCAL_CHECK: bool = True
+    OCR_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    OCR_CACHE_MAX_ENTRIES: int = 512
+    # Max differing bits (out of 256) for two images to be compared as the same worksheet,
+    # and max mean grey-level difference in any tile of their check thumbnails to reuse the text
+    OCR_CACHE_MAX_DISTANCE: int = 16
+    OCR_CACHE_MAX_TILE_DIFFERENCE: float = 16.0
+
+    # Pre-generated problem statements kept ready per difficulty level
+    PROBLEM_POOL_SIZE: int = 5
+    PROBLEM_POOL_BATCH_SIZE: int = 3
 
     class Config:
         env_file=".env"
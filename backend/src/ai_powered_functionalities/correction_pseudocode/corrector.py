@@ -1,39 +1,123 @@
+import hashlib
 import json
-import re
+import os
+from typing import Any, AsyncIterator, Optional, Tuple
+from ..config import get_settings
 from ..utils.ai_client import GeminiClient
+from ..utils.cache import ResponseCache
+from ..utils.json_stream import JsonStreamExtractor, extract_json
+from ..utils.single_flight import SingleFlight
+from ..correction_pseudocode.local_checker import LocalChecker
 from ..correction_pseudocode.prompts import get_correction_prompt
 from ..models.responses import CodeCorrectionResponse
 
+# Changes whenever the correction prompt changes, so stale cached answers are never served
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps(get_correction_prompt(""), ensure_ascii=False).encode("utf-8")
+).hexdigest()[:16]
+
+
+def normalize_code(code: str) -> str:
+    """Normalize line endings, tabs and trailing whitespace so equivalent submissions share a cache entry."""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").expandtabs(4).split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
 
 class CodeCorrector:
     def __init__(self):
+        settings = get_settings()
         self.gemini_client = GeminiClient()
+        self.cache = ResponseCache(
+            max_entries=settings.CORRECTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.CORRECTION_CACHE_TTL_SECONDS,
+            path=os.path.join(settings.CACHE_DIR, "correction_cache.json")
+        )
+        self.in_flight = SingleFlight()
+        self.local_checker = LocalChecker() if settings.CORRECTION_LOCAL_CHECK else None
+
+    @staticmethod
+    def cache_key(code: str) -> str:
+        normalized = normalize_code(code)
+        return hashlib.sha256(f"{PROMPT_VERSION}\0{normalized}".encode("utf-8")).hexdigest()
 
     async def correct_code(self, code: str) -> CodeCorrectionResponse:
-        """Correct Romanian pseudocode using Gemini"""
+        """Correct Romanian pseudocode using Gemini, answering repeated submissions from the cache.
+
+        Code that the local parser accepts, possibly after unambiguous fixes, is
+        answered without a model call.
+        """
+        local = self.check_locally(code)
+        if local is not None:
+            return local
+
+        key = self.cache_key(code)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return CodeCorrectionResponse(**cached, cached=True)
+
+        # Identical submissions arriving together share one model call
+        return await self.in_flight.do(key, lambda: self._correct_with_model(code, key))
+
+    def check_locally(self, code: str) -> Optional[CodeCorrectionResponse]:
+        if self.local_checker is None:
+            return None
+        result = self.local_checker.check(normalize_code(code))
+        if result is None:
+            return None
+
+        if result.has_errors:
+            explanation = "Codul a fost corectat automat. " + "; ".join(result.errors_found) + "."
+        else:
+            explanation = "Cod corect. Sintaxa a fost verificata de analizorul de pseudocod."
+        return CodeCorrectionResponse(
+            corrected_code=result.corrected_code,
+            has_errors=result.has_errors,
+            errors_found=result.errors_found,
+            explanation=explanation
+        )
+
+    async def _correct_with_model(self, code: str, key: str) -> CodeCorrectionResponse:
         messages = get_correction_prompt(code)
 
         response = await self.gemini_client.get_completion(messages, temperature=0.2)
 
-        # --- Clean and extract JSON safely ---
-        response_clean = response.strip()
+        return self._parse_correction(response, extract_json(response), key)
 
-        # Regex to extract JSON inside code fences (handles ```json, ```JSON, etc.)
-        code_fence_match = re.search(r"```(?:json)?\s*(.*?)\s*```", response_clean, re.DOTALL | re.IGNORECASE)
-        if code_fence_match:
-            response_clean = code_fence_match.group(1).strip()
+    async def stream_correction(self, code: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Correct pseudocode, yielding ("delta", text) while the model writes and ("result", response) at the end.
 
-        # If still wrapped in backticks or extra text, try to find first valid JSON object
-        if not response_clean.startswith("{") and "{" in response_clean:
-            response_clean = response_clean[response_clean.index("{"):]
+        Local and cached answers are yielded as a result right away. Streams are
+        not coalesced: every caller sees its own deltas.
+        """
+        local = self.check_locally(code)
+        if local is not None:
+            yield "result", local
+            return
 
-        if not response_clean.endswith("}") and "}" in response_clean:
-            response_clean = response_clean[:response_clean.rindex("}") + 1]
+        key = self.cache_key(code)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield "result", CodeCorrectionResponse(**cached, cached=True)
+            return
 
+        extractor = JsonStreamExtractor()
+        parts = []
+        json_text = None
+        async for chunk in self.gemini_client.stream_completion(get_correction_prompt(code), temperature=0.2):
+            parts.append(chunk)
+            yield "delta", chunk
+            if json_text is None:
+                completed = extractor.feed(chunk)
+                if completed:
+                    json_text = completed[0]
+
+        yield "result", self._parse_correction("".join(parts), json_text, key)
+
+    def _parse_correction(self, response: str, json_text: Optional[str], key: str) -> CodeCorrectionResponse:
         # --- Try to parse as JSON ---
         try:
-            result = json.loads(response_clean)
-            return CodeCorrectionResponse(**result)
+            result = json.loads(json_text if json_text is not None else response)
+            correction = CodeCorrectionResponse(**result)
         except json.JSONDecodeError:
             return CodeCorrectionResponse(
                 corrected_code=response,
@@ -41,3 +125,7 @@ class CodeCorrector:
                 errors_found=["Could not parse JSON response"],
                 explanation=None
             )
+
+        # Only well-formed answers are worth caching
+        self.cache.set(key, correction.dict(exclude={"cached", "remaining_calls"}))
+        return correction
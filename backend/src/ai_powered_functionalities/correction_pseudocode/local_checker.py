@@ -0,0 +1,243 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from ...pseudocode_to_cpp.compiler.lexer import lex
+from ...pseudocode_to_cpp.compiler.parser import Parser
+
+# Structures closed by an explicit keyword: opener token -> (closing token, closing line)
+_CLOSERS = {
+    "DACA": ("SFARSIT_DACA", "sfarsit_daca"),
+    "PENTRU": ("SFARSIT_PENTRU", "sfarsit_pentru"),
+    "CAT_TIMP": ("SFARSIT_CAT", "sfarsit_cat_timp"),
+}
+# Structures whose body ends with a condition, which cannot be guessed
+_CONDITION_CLOSERS = {"EXECUTA": "CAT_TIMP", "REPETA": "PANA_CAND"}
+
+_STRING_PATTERN = re.compile(r"'(?:\\.|[^\\'])*'|\"(?:\\.|[^\\\"])*\"")
+_EQ_ASSIGN_PATTERN = re.compile(r"^(\s*(?:pentru\s+)?[A-Za-z_][A-Za-z0-9_]*\s*)=(?!=)", re.IGNORECASE)
+
+
+@dataclass
+class LocalCheckResult:
+    """Outcome of the local check; `corrected_code` is empty when nothing had to change."""
+    corrected_code: str
+    errors_found: List[str] = field(default_factory=list)
+
+    @property
+    def has_errors(self) -> bool:
+        return bool(self.errors_found)
+
+
+@dataclass
+class _OpenBlock:
+    kind: str
+    indent: int
+    line: int
+    # Whether the body so far is indented deeper than the opener
+    indented_body: Optional[bool] = None
+
+
+class LocalChecker:
+    """Deterministic first pass before the model.
+
+    Runs the compiler's own lexer and parser on the submission, after fixing a
+    few mistakes that are common in pbinfo-style pseudocode and can be repaired
+    without guessing: diacritics and '←' outside strings, '=' used for
+    assignment, a missing 'atunci'/'executa' and closers ('sfarsit_daca',
+    'sfarsit_pentru', 'sfarsit_cat_timp') whose position follows from the
+    indentation. `check` returns None whenever the code still does not parse
+    or a fix would be ambiguous, so the caller can escalate to the model.
+    """
+
+    def check(self, code: str) -> Optional[LocalCheckResult]:
+        lines = code.split("\n")
+        errors: List[str] = []
+
+        lines = self._fold_characters(lines, errors)
+        if lines is None:
+            return None
+        lines = self._fix_assignments(lines, errors)
+        lines = self._fix_blocks(lines, errors)
+        if lines is None:
+            return None
+
+        fixed = "\n".join(lines)
+        try:
+            Parser(list(lex(fixed))).parse_program()
+        except (SyntaxError, ValueError, IndexError, KeyError):
+            return None
+
+        return LocalCheckResult(corrected_code=fixed if errors else "", errors_found=errors)
+
+    @staticmethod
+    def _fold_characters(lines: List[str], errors: List[str]) -> Optional[List[str]]:
+        """Replace '←' and strip diacritics outside string constants."""
+        folded_lines = []
+        found_arrow = found_diacritics = False
+
+        for line in lines:
+            parts = []
+            last = 0
+            for match in _STRING_PATTERN.finditer(line):
+                parts.append((line[last:match.start()], False))
+                parts.append((match.group(), True))
+                last = match.end()
+            parts.append((line[last:], False))
+
+            new_line = ""
+            for text, is_string in parts:
+                if not is_string:
+                    if "←" in text:
+                        found_arrow = True
+                        text = text.replace("←", "<-")
+                    folded = unicodedata.normalize("NFKD", text)
+                    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+                    if folded != text:
+                        found_diacritics = True
+                    text = folded
+                new_line += text
+            folded_lines.append(new_line)
+
+        if found_arrow:
+            errors.append("Atribuirea se scrie cu '<-' in loc de '←'")
+        if found_diacritics:
+            errors.append("Pseudocodul nu trebuie sa contina diacritice in afara sirurilor de caractere")
+
+        # Anything else outside ASCII is not something we know how to repair
+        for line in folded_lines:
+            outside_strings = _STRING_PATTERN.sub("", line)
+            if not all(ch.isascii() or ch in "≠≤≥" for ch in outside_strings):
+                return None
+        return folded_lines
+
+    @staticmethod
+    def _fix_assignments(lines: List[str], errors: List[str]) -> List[str]:
+        """'x = 5' at the start of a statement (or of a 'pentru' header) is an assignment."""
+        fixed = []
+        for number, line in enumerate(lines, start=1):
+            match = _EQ_ASSIGN_PATTERN.match(line)
+            if match:
+                line = f"{match.group(1).rstrip()} <-{line[match.end():]}"
+                errors.append(f"Linia {number}: atribuirea se scrie cu '<-', nu cu '='")
+            fixed.append(line)
+        return fixed
+
+    def _fix_blocks(self, lines: List[str], errors: List[str]) -> Optional[List[str]]:
+        """Insert missing closers where the indentation shows the block ended."""
+        result: List[str] = []
+        stack: List[_OpenBlock] = []
+
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                result.append(line)
+                continue
+
+            tokens = self._line_tokens(line)
+            if tokens is None:
+                return None
+            indent = len(line) - len(line.lstrip())
+            first = tokens[0]["type"]
+            last = tokens[-1]["type"]
+
+            # A line at or left of an indented block's opener ends that block
+            while stack and stack[-1].kind in _CLOSERS and stack[-1].indented_body and indent <= stack[-1].indent:
+                top = stack[-1]
+                if first == _CLOSERS[top.kind][0] or (top.kind == "DACA" and first == "ALTFEL"):
+                    break
+                self._close(result, top, errors)
+                stack.pop()
+
+            if stack and indent > stack[-1].indent and stack[-1].indented_body is None:
+                stack[-1].indented_body = True
+            elif stack and stack[-1].indented_body is None and first not in ("ALTFEL",):
+                stack[-1].indented_body = False
+
+            closes = self._closes(stack, first, last)
+            if closes is False:
+                return None
+            if closes:
+                stack.pop()
+                result.append(line)
+                continue
+            if first == "ALTFEL":
+                if not stack or stack[-1].kind != "DACA":
+                    return None
+                stack[-1].indented_body = None
+                result.append(line)
+                continue
+
+            line = self._complete_header(line, number, first, last, lines, indent, errors)
+            closed_inline = first in _CLOSERS and any(token["type"] == _CLOSERS[first][0] for token in tokens)
+            if (first in _CLOSERS and not closed_inline) or (first == "EXECUTA" and len(tokens) == 1) \
+                    or first == "REPETA":
+                kind = first if first in _CLOSERS or first == "REPETA" else "EXECUTA"
+                stack.append(_OpenBlock(kind=kind, indent=indent, line=number))
+            result.append(line)
+
+        # Blocks still open at the end of the program
+        while stack:
+            top = stack.pop()
+            if top.kind not in _CLOSERS or not top.indented_body:
+                return None
+            self._close(result, top, errors)
+        return result
+
+    @staticmethod
+    def _line_tokens(line: str) -> Optional[List[dict]]:
+        try:
+            tokens = [token for token in lex(line) if token["type"] != "EOF"]
+        except SyntaxError:
+            return None
+        return tokens or None
+
+    @staticmethod
+    def _closes(stack: List[_OpenBlock], first: str, last: str):
+        """True if the line closes the innermost block, False if it closes a different one."""
+        is_closer = first in ("SFARSIT_DACA", "SFARSIT_PENTRU", "SFARSIT_CAT", "PANA_CAND")
+        # 'cat timp <cond>' without 'executa' ends an 'executa' block
+        if first == "CAT_TIMP" and last != "EXECUTA" and stack and stack[-1].kind == "EXECUTA":
+            return True
+        if not is_closer:
+            return None
+        if not stack:
+            return False
+        top = stack[-1]
+        expected = _CLOSERS[top.kind][0] if top.kind in _CLOSERS else _CONDITION_CLOSERS[top.kind]
+        return True if first == expected else False
+
+    @staticmethod
+    def _complete_header(line: str, number: int, first: str, last: str, lines: List[str], indent: int,
+                         errors: List[str]) -> str:
+        """Append a forgotten 'atunci'/'executa' when the next line is indented as a body."""
+        keyword = {"DACA": ("ATUNCI", "atunci"), "PENTRU": ("EXECUTA", "executa"),
+                   "CAT_TIMP": ("EXECUTA", "executa")}.get(first)
+        if keyword is None or last == keyword[0]:
+            return line
+
+        following = next((other for other in lines[number:] if other.strip()), "")
+        if len(following) - len(following.lstrip()) <= indent:
+            return line
+        errors.append(f"Linia {number}: lipseste '{keyword[1]}'")
+        return f"{line.rstrip()} {keyword[1]}"
+
+    @staticmethod
+    def _close(result: List[str], block: _OpenBlock, errors: List[str]) -> None:
+        """Insert the block's closer right after its last non-empty line."""
+        closing = _CLOSERS[block.kind][1]
+        errors.append(f"Linia {block.line}: lipseste '{closing}' pentru structura deschisa aici")
+        position = len(result)
+        while position > 0 and not result[position - 1].strip():
+            position -= 1
+        result.insert(position, " " * block.indent + closing)
+
+
+if __name__ == "__main__":
+    sample = """citeste n
+s = 0
+pentru i ← 1, n executa
+    daca i % 2 = 0 atunci
+        s <- s + i
+scrie s"""
+    print(LocalChecker().check(sample))
@@ -1,18 +1,22 @@
 import json
-import re
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
 from backend.src.ai_powered_functionalities.generate_problem_statements.prompts import \
     get_problem_generation_prompt
 from backend.src.ai_powered_functionalities.models.responses import GenerateProblemStatementResponse
 from backend.src.ai_powered_functionalities.utils.ai_client import GeminiClient
+from backend.src.ai_powered_functionalities.utils.json_stream import JsonStreamExtractor, extract_json
 
 
 class GenerateProblem:
     def __init__(self):
         self.__gemini_client = GeminiClient()
 
-    async def generate_problem(self) -> GenerateProblemStatementResponse:
+    async def generate_problem(self, difficulty: Optional[str] = None) -> GenerateProblemStatementResponse:
         """Generate a new programming problem statement"""
-        messages = get_problem_generation_prompt()
+        messages = get_problem_generation_prompt(difficulty=difficulty)
         response = await self.__gemini_client.get_completion(messages, temperature=0.7)  # Higher temp for creativity
 
         # Clean the response
@@ -36,25 +40,60 @@ class GenerateProblem:
                 nivel_dificultate="N/A"
             )
 
+    async def generate_batch(self, count: int, difficulty: Optional[str] = None) -> List[GenerateProblemStatementResponse]:
+        """Generate several problem statements with a single model call.
+
+        Items that are not valid problem statements are dropped, so the result
+        may hold fewer than `count` problems.
+        """
+        messages = get_problem_generation_prompt(count=count, difficulty=difficulty)
+        response = await self.__gemini_client.get_completion(messages, temperature=0.7)
+
+        try:
+            items = json.loads(self._extract_json(response))
+        except json.JSONDecodeError as e:
+            print(f"JSON Decode Error: {e}")
+            return []
+
+        problems = []
+        for item in items if isinstance(items, list) else [items]:
+            problem = self._to_problem(item)
+            if problem is not None:
+                problems.append(problem)
+        return problems
+
+    async def stream_problems(self, count: int = 1, difficulty: Optional[str] = None
+                              ) -> AsyncIterator[Tuple[str, Any]]:
+        """Generate problems, yielding ("delta", text) as the model writes and ("problem", problem) for each one
+        as soon as its JSON object is complete."""
+        messages = get_problem_generation_prompt(count=count, difficulty=difficulty)
+        extractor = JsonStreamExtractor(unwrap_array=True)
+
+        async for chunk in self.__gemini_client.stream_completion(messages, temperature=0.7):
+            yield "delta", chunk
+            for json_text in extractor.feed(chunk):
+                try:
+                    problem = self._to_problem(json.loads(json_text))
+                except json.JSONDecodeError as e:
+                    print(f"JSON Decode Error: {e}")
+                    continue
+                if problem is not None:
+                    yield "problem", problem
+
+    @staticmethod
+    def _to_problem(item: Any) -> Optional[GenerateProblemStatementResponse]:
+        """Validate one generated item, rejecting incomplete or placeholder ("N/A") statements"""
+        try:
+            problem = GenerateProblemStatementResponse(**item)
+        except (TypeError, ValidationError):
+            return None
+        if all(value and value.strip() != "N/A" for value in
+               (problem.enunt, problem.date_intrare, problem.date_iesire,
+                problem.exemplu_intrare, problem.exemplu_iesire)):
+            return problem
+        return None
+
     def _extract_json(self, response: str) -> str:
-        """Extract JSON from response, handling various formats"""
-        response_clean = response.strip()
-
-        # Method 1: Try to extract from code fences (```json ... ```)
-        code_fence_match = re.search(
-            r"```(?:json)?\s*(.*?)\s*```",
-            response_clean,
-            re.DOTALL | re.IGNORECASE
-        )
-        if code_fence_match:
-            response_clean = code_fence_match.group(1).strip()
-
-        # Method 2: Find JSON object boundaries
-        # Find first { and last }
-        first_brace = response_clean.find("{")
-        last_brace = response_clean.rfind("}")
-
-        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-            response_clean = response_clean[first_brace:last_brace + 1]
-
-        return response_clean
\ No newline at end of file
+        """Extract the first JSON object or array from the response, ignoring code fences and extra text"""
+        json_text = extract_json(response)
+        return json_text if json_text is not None else response.strip()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import tempfile
+import unicodedata
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from backend.src.ai_powered_functionalities.generate_problem_statements.generate_problems import GenerateProblem
+from backend.src.ai_powered_functionalities.models.responses import GenerateProblemStatementResponse
+
+DIFFICULTY_LEVELS = ("usor", "mediu", "dificil")
+
+
+def normalize_difficulty(level: Optional[str]) -> Optional[str]:
+    """Map 'Ușor', 'usor', ' MEDIU ' etc. to one of DIFFICULTY_LEVELS (None if unknown)."""
+    if not level:
+        return None
+    ascii_level = unicodedata.normalize("NFKD", level).encode("ascii", "ignore").decode("ascii")
+    ascii_level = ascii_level.strip().lower()
+    return ascii_level if ascii_level in DIFFICULTY_LEVELS else None
+
+
+class ProblemPool:
+    """Bounded buffer of pre-generated problem statements, one queue per difficulty.
+
+    Requests are served from memory; every take wakes a background task that
+    tops the queues back up with batched model calls. The pool is saved to
+    `path` on shutdown and loaded again on startup. With several worker
+    processes only the first to start claims the saved problems (the file is
+    moved away before it is read) and the others start empty, so no problem
+    is handed out by two workers; a live worker never publishes its queues.
+    """
+
+    def __init__(self, generator: GenerateProblem, capacity_per_level: int = 5, batch_size: int = 3,
+                 path: Optional[str] = None):
+        self.generator = generator
+        self.capacity_per_level = capacity_per_level
+        self.batch_size = batch_size
+        self.path = path
+        self._queues: Dict[str, Deque[GenerateProblemStatementResponse]] = {
+            level: deque() for level in DIFFICULTY_LEVELS
+        }
+        self._refill_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        if path:
+            self._load()
+
+    def take(self, difficulty: Optional[str] = None) -> Optional[GenerateProblemStatementResponse]:
+        """Pop a ready problem, from the fullest queue when no difficulty is requested."""
+        level = normalize_difficulty(difficulty)
+        if level is None:
+            level = max(DIFFICULTY_LEVELS, key=lambda name: len(self._queues[name]))
+        queue = self._queues[level]
+        return queue.popleft() if queue else None
+
+    async def get(self, difficulty: Optional[str] = None) -> GenerateProblemStatementResponse:
+        """Serve a problem from the pool, generating one on the spot only if it is empty."""
+        problem = self.take(difficulty)
+        self.request_refill()
+        if problem is not None:
+            return problem
+        return await self.generator.generate_problem(normalize_difficulty(difficulty))
+
+    def request_refill(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background refiller (call from the running event loop)."""
+        if self._refill_task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._wakeup.set()
+            self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        if self._refill_task is not None:
+            # The flag covers a cancellation swallowed by a model call finishing at the same moment
+            self._stopping = True
+            self._wakeup.set()
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+        if self.path:
+            try:
+                await asyncio.to_thread(self._save, self._snapshot())
+            except OSError as e:
+                print(f"Problem pool could not be saved: {e}")
+
+    def sizes(self) -> Dict[str, int]:
+        return {level: len(queue) for level, queue in self._queues.items()}
+
+    def _most_needed_level(self) -> Optional[str]:
+        level = min(DIFFICULTY_LEVELS, key=lambda name: len(self._queues[name]))
+        return level if len(self._queues[level]) < self.capacity_per_level else None
+
+    def _add(self, problem: GenerateProblemStatementResponse, requested_level: str) -> None:
+        level = normalize_difficulty(problem.nivel_dificultate) or requested_level
+        queue = self._queues[level]
+        if len(queue) < self.capacity_per_level:
+            queue.append(problem)
+
+    async def _refill_loop(self) -> None:
+        while not self._stopping:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # The model may label problems differently than asked, so bound the work per wakeup
+            for _ in range(2 * len(DIFFICULTY_LEVELS)):
+                level = self._most_needed_level()
+                if level is None or self._stopping:
+                    break
+                try:
+                    batch = await self.generator.generate_batch(self.batch_size, level)
+                except Exception as e:
+                    print(f"Problem pool refill failed: {e}")
+                    await asyncio.sleep(30)
+                    break
+                for problem in batch:
+                    self._add(problem, level)
+
+    def _snapshot(self) -> Dict[str, List[dict]]:
+        return {level: [problem.dict() for problem in queue] for level, queue in self._queues.items()}
+
+    def _load(self) -> None:
+        # Renaming is atomic: of several workers starting together, exactly one gets the file
+        claimed_path = f"{self.path}.{os.getpid()}.claimed"
+        try:
+            os.replace(self.path, claimed_path)
+        except OSError:
+            return
+        try:
+            with open(claimed_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Problem pool file ignored: {e}")
+            return
+        finally:
+            _remove(claimed_path)
+
+        if not isinstance(stored, dict):
+            return
+        for level, problems in stored.items():
+            if level not in self._queues or not isinstance(problems, list):
+                continue
+            for problem in problems:
+                try:
+                    self._add(GenerateProblemStatementResponse(**problem), level)
+                except (TypeError, ValueError) as e:
+                    print(f"Problem pool entry skipped: {e}")
+
+    def _save(self, snapshot: Dict[str, List[dict]]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory or None, prefix=os.path.basename(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
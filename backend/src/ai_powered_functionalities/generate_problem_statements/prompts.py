@@ -1,7 +1,9 @@
+from typing import Optional
+
 from backend.src.ai_powered_functionalities.correction_pseudocode.prompts import PSEUDOCODE_RULES
 
 
-def get_problem_generation_prompt() -> list:
+def get_problem_generation_prompt(count: int = 1, difficulty: Optional[str] = None) -> list:
     system_message = f"""Ești un asistent educațional specializat în informatică, antrenat pentru programa școlară 
 românească (clasele IX–XII).
 
@@ -45,7 +47,14 @@ Exemplu de răspuns valid:
 }}
 """
 
-    user_message = "Generează o problemă nouă de programare în pseudocod românesc. Returnează doar JSON-ul, fără explicații."
+    level = f" de dificultate {difficulty}" if difficulty else ""
+    if count == 1:
+        user_message = (f"Generează o problemă nouă de programare{level} în pseudocod românesc. "
+                        "Returnează doar JSON-ul, fără explicații.")
+    else:
+        user_message = (f"Generează {count} probleme noi și diferite între ele de programare{level} în pseudocod "
+                        f"românesc. Returnează doar un array JSON cu {count} obiecte în formatul de mai sus, "
+                        "fără explicații.")
 
     return [
         {"role": "system", "content": system_message},
@@ -6,12 +6,14 @@ class CodeCorrectionResponse(BaseModel):
     has_errors: bool
     errors_found: Optional[List[str]] = None
     explanation: Optional[str] = None
+    cached: bool = False
     remaining_calls: Optional[int] = None
 
 class OCRResponse(BaseModel):
     extracted_text: str
     confidence: Optional[str] = None
     preprocessing_applied: List[str]
+    cached: bool = False
     remaining_calls: Optional[int] = None
 
 
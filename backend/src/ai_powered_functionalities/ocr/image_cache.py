@@ -0,0 +1,56 @@
+import base64
+import zlib
+from typing import Any, Dict, Optional
+
+from ..utils.cache import ResponseCache
+from .image_processor import ImageProcessor, PreparedImage
+
+
+class ImageHashCache:
+    """OCR results keyed by the SHA-256 of the prepared image, with a checked near-duplicate fallback.
+
+    An identical prepared image is a dictionary hit. Otherwise the (bounded)
+    set of entries is scanned for the closest perceptual hash; a candidate
+    within `max_distance` bits is only reused if its check thumbnail also
+    differs by at most `max_tile_difference` grey levels in every tile, so
+    two worksheets with the same layout but different text never share an
+    answer. A rejected candidate is simply a miss.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_distance: int = 16,
+                 max_tile_difference: float = 16.0, path: Optional[str] = None):
+        self.max_distance = max_distance
+        self.max_tile_difference = max_tile_difference
+        self._cache = ResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds, path=path)
+
+    def get(self, image: PreparedImage) -> Optional[Dict[str, Any]]:
+        value = self._cache.get(image.digest)
+        if value is not None or self.max_distance <= 0:
+            return value
+
+        best_key, best_distance = None, self.max_distance + 1
+        for candidate_key, candidate in self._cache.items():
+            if "phash" not in candidate:
+                continue
+            distance = ImageProcessor.hamming_distance(image.phash, int(candidate["phash"], 16))
+            if distance < best_distance:
+                best_key, best_distance = candidate_key, distance
+        if best_key is None:
+            return None
+
+        # Go through get() so the entry is marked as recently used
+        candidate = self._cache.get(best_key)
+        if candidate is None or ImageProcessor.tile_difference(
+                image.thumbnail, zlib.decompress(base64.b64decode(candidate["thumbnail"]))) > self.max_tile_difference:
+            return None
+        return candidate
+
+    def set(self, image: PreparedImage, value: Dict[str, Any]) -> None:
+        self._cache.set(image.digest, {
+            **value,
+            "phash": f"{image.phash:064x}",
+            "thumbnail": base64.b64encode(zlib.compress(image.thumbnail, 9)).decode("ascii"),
+        })
+
+    def __len__(self) -> int:
+        return len(self._cache)
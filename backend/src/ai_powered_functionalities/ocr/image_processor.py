@@ -1,8 +1,37 @@
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageChops, ImageEnhance, ImageFilter, ImageOps
+import hashlib
 import io
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import BinaryIO, List, Tuple, Union
+
+
+@dataclass
+class PreparedImage:
+    """Compact image ready to be sent to the vision model"""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    steps: List[str] = field(default_factory=list)
+    # SHA-256 of `data`
+    digest: str = ""
+    # 256-bit difference hash of the processed image, see ImageProcessor.difference_hash
+    phash: int = 0
+    # Grayscale CHECK_SIZE x CHECK_SIZE copy of the processed image, see ImageProcessor.tile_difference
+    thumbnail: bytes = b""
+
 
 class ImageProcessor:
+    # Pixels darker than this (after autocontrast) are treated as ink when locating the text
+    INK_THRESHOLD = 96
+    # Size of the thumbnail used to find the text region
+    DETECTION_SIZE = 256
+    # Pixels at least this fraction of the median (paper) brightness are flattened to white
+    BACKGROUND_RATIO = 0.85
+    # Side of the thumbnail kept to confirm near-duplicate matches; about one tile per character
+    CHECK_SIZE = 256
+    CHECK_TILE = 4
+
     @staticmethod
     def preprocess_image(image_bytes: bytes) -> Tuple[Image.Image, list]:
         """Preprocess image for better OCR results"""
@@ -34,4 +63,133 @@ class ImageProcessor:
             image = image.resize(new_size, Image.Resampling.LANCZOS)
             preprocessing_steps.append(f"Upscaled by {scale}x")
 
-        return image, preprocessing_steps
\ No newline at end of file
+        return image, preprocessing_steps
+
+    @staticmethod
+    def prepare_for_upload(image_source: Union[bytes, BinaryIO], max_side: int = 1280,
+                           quality: int = 75) -> PreparedImage:
+        """Decode a photo once and shrink it to what the vision model needs.
+
+        Crops to the region containing text, converts to grayscale, downsizes so
+        the longest side is at most `max_side`, whitens the paper texture (which
+        otherwise dominates the JPEG size) and re-encodes as JPEG. Accepts bytes
+        or a seekable file (e.g. a spooled upload), which is read incrementally
+        by the decoder. CPU bound; run it in an executor.
+        """
+        steps = []
+
+        source = io.BytesIO(image_source) if isinstance(image_source, (bytes, bytearray)) else image_source
+        source_size = source.seek(0, io.SEEK_END)
+        source.seek(0)
+
+        try:
+            image = Image.open(source)
+            original_size = image.size
+            # JPEG can decode directly to grayscale at a reduced scale, skipping most of the work
+            if image.format == "JPEG":
+                image.draft("L", (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        except (OSError, SyntaxError) as e:
+            raise ValueError(f"Invalid image: {e}")
+        steps.append(f"Decoded {original_size[0]}x{original_size[1]} image")
+
+        if image.mode != "L":
+            image = image.convert("L")
+        steps.append("Converted to grayscale")
+
+        crop_box = ImageProcessor._find_text_region(image)
+        if crop_box is not None:
+            image = image.crop(crop_box)
+            steps.append("Cropped to text region")
+
+        if max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            steps.append(f"Downscaled to {image.size[0]}x{image.size[1]}")
+
+        image = ImageProcessor._whiten_background(image)
+        steps.append("Whitened background")
+        thumbnail = image.resize((ImageProcessor.CHECK_SIZE, ImageProcessor.CHECK_SIZE), Image.Resampling.BOX)
+        phash = ImageProcessor.difference_hash(thumbnail)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+        data = output.getvalue()
+        steps.append(f"Re-encoded as JPEG ({source_size // 1024}KB -> {len(data) // 1024}KB)")
+
+        return PreparedImage(data=data, mime_type="image/jpeg", width=image.size[0], height=image.size[1],
+                             steps=steps, digest=hashlib.sha256(data).hexdigest(), phash=phash,
+                             thumbnail=thumbnail.tobytes())
+
+    @staticmethod
+    def difference_hash(image: Image.Image, hash_size: int = 16) -> int:
+        """Perceptual hash: one bit per pair of horizontally adjacent cells of a tiny thumbnail.
+
+        Only relative brightness is kept, so small crops, rescaling and lighting
+        changes flip few bits; compare hashes with `hamming_distance`.
+        """
+        small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+        pixels = list(small.getdata())
+        value = 0
+        for row in range(hash_size):
+            offset = row * (hash_size + 1)
+            for col in range(hash_size):
+                value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+        return value
+
+    @staticmethod
+    def hamming_distance(first: int, second: int) -> int:
+        return bin(first ^ second).count("1")
+
+    @staticmethod
+    def tile_difference(first: bytes, second: bytes) -> float:
+        """Largest mean grey-level difference over the CHECK_TILE-sized tiles of two check thumbnails.
+
+        A hash distance says two pictures look alike overall; this catches the
+        one line or digit that differs between two copies of the same worksheet
+        layout, which the hash averages away.
+        """
+        size = (ImageProcessor.CHECK_SIZE, ImageProcessor.CHECK_SIZE)
+        difference = ImageChops.difference(Image.frombytes("L", size, first), Image.frombytes("L", size, second))
+        return max(difference.reduce(ImageProcessor.CHECK_TILE).getdata())
+
+    @staticmethod
+    def _whiten_background(image: Image.Image) -> Image.Image:
+        """Map everything close to the paper brightness (the median pixel) to pure white."""
+        histogram = image.histogram()
+        half = (image.size[0] * image.size[1]) / 2
+        seen = 0
+        median = 255
+        for value, count in enumerate(histogram):
+            seen += count
+            if seen >= half:
+                median = value
+                break
+
+        cutoff = int(median * ImageProcessor.BACKGROUND_RATIO)
+        return image.point([255 if value >= cutoff else value for value in range(256)])
+
+    @staticmethod
+    def _find_text_region(image: Image.Image, margin: float = 0.04):
+        """Return a crop box around the dark (ink) pixels, or None if it would not help."""
+        thumbnail = image.copy()
+        thumbnail.thumbnail((ImageProcessor.DETECTION_SIZE, ImageProcessor.DETECTION_SIZE))
+        thumbnail = ImageOps.autocontrast(thumbnail, cutoff=1)
+        ink = thumbnail.point(lambda p: 255 if p < ImageProcessor.INK_THRESHOLD else 0)
+        bbox = ink.getbbox()
+        if bbox is None:
+            return None
+
+        scale_x = image.size[0] / thumbnail.size[0]
+        scale_y = image.size[1] / thumbnail.size[1]
+        pad_x = int(image.size[0] * margin)
+        pad_y = int(image.size[1] * margin)
+        left = max(0, int(bbox[0] * scale_x) - pad_x)
+        top = max(0, int(bbox[1] * scale_y) - pad_y)
+        right = min(image.size[0], int(bbox[2] * scale_x) + pad_x)
+        bottom = min(image.size[1], int(bbox[3] * scale_y) + pad_y)
+
+        # Not worth a crop when the text already fills the picture
+        if (right - left) * (bottom - top) > 0.9 * image.size[0] * image.size[1]:
+            return None
+        return left, top, right, bottom
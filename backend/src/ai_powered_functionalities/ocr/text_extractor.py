@@ -1,13 +1,83 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Optional, Union
+
+from ..config import get_settings
 from ..utils.ai_client import GeminiClient
+from ..utils.single_flight import SingleFlight
 from ..models.responses import OCRResponse
+from .image_cache import ImageHashCache
+from .image_processor import ImageProcessor
 
 
 class TextExtractor:
     def __init__(self):
+        settings = get_settings()
         self.gemini_client = GeminiClient()
+        self.in_flight = SingleFlight()
+        self.max_image_side = settings.OCR_MAX_IMAGE_SIDE
+        self.jpeg_quality = settings.OCR_JPEG_QUALITY
+        # PIL releases the GIL while decoding/resizing, so threads keep the event loop free
+        self._executor = ThreadPoolExecutor(max_workers=settings.OCR_PREPROCESS_WORKERS,
+                                            thread_name_prefix="ocr-preprocess")
+        self.cache = ImageHashCache(
+            max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.OCR_CACHE_TTL_SECONDS,
+            max_distance=settings.OCR_CACHE_MAX_DISTANCE,
+            max_tile_difference=settings.OCR_CACHE_MAX_TILE_DIFFERENCE,
+            path=os.path.join(settings.CACHE_DIR, "ocr_cache.json")
+        )
+
+    async def extract_and_clean(self, image: Union[bytes, BinaryIO], digest: Optional[str] = None) -> OCRResponse:
+        """Extract text from image using Gemini Vision.
+
+        `image` is either the raw bytes or a seekable file, which this method
+        takes over and closes once no extraction needs it any more; `digest` is
+        its SHA-256, computed here if omitted. Concurrent uploads of the same
+        image share a single Vision call, and identical or (after a check)
+        near-duplicate images are answered from the cache.
+        """
+        if digest is None:
+            digest = await asyncio.get_running_loop().run_in_executor(self._executor, _sha256, image)
+        handed_over = False
+
+        def start():
+            # Called only by the caller that starts the shared call; its file goes with it
+            nonlocal handed_over
+            handed_over = True
+            return extract()
+
+        async def extract():
+            try:
+                return await self._extract_with_model(image)
+            finally:
+                _close(image)
+
+        try:
+            return await self.in_flight.do(digest, start)
+        finally:
+            # Callers that joined an existing call never hand their own file over
+            if not handed_over:
+                _close(image)
 
-    async def extract_and_clean(self, image_bytes: bytes) -> OCRResponse:
-        """Extract text from image using Gemini Vision"""
+    async def _extract_with_model(self, image: Union[bytes, BinaryIO]) -> OCRResponse:
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(
+            self._executor,
+            partial(ImageProcessor.prepare_for_upload, image, self.max_image_side, self.jpeg_quality)
+        )
+
+        cached = self.cache.get(prepared)
+        if cached is not None:
+            return OCRResponse(
+                extracted_text=cached["extracted_text"],
+                confidence=cached.get("confidence"),
+                preprocessing_applied=prepared.steps + ["Image cache hit"],
+                cached=True
+            )
 
         prompt = """Extrage textul pseudocod românesc din această imagine.
 
@@ -38,13 +108,30 @@ Returnează codul curat, gata de utilizare.
 
         # Extract text using Gemini Vision
         extracted_text = await self.gemini_client.get_vision_completion(
-            image_data=image_bytes,
+            image_data=prepared.data,
             prompt=prompt,
-            temperature=0.1
+            temperature=0.1,
+            mime_type=prepared.mime_type
         )
 
-        return OCRResponse(
+        result = OCRResponse(
             extracted_text=extracted_text.strip().replace("```",""),
             confidence="high",
-            preprocessing_applied=["Gemini Vision extraction"]
-        )
\ No newline at end of file
+            preprocessing_applied=prepared.steps + ["Gemini Vision extraction"]
+        )
+        self.cache.set(prepared, {"extracted_text": result.extracted_text, "confidence": result.confidence})
+        return result
+
+
+def _sha256(image: Union[bytes, BinaryIO]) -> str:
+    if isinstance(image, bytes):
+        return hashlib.sha256(image).hexdigest()
+    image.seek(0)
+    digest = hashlib.file_digest(image, "sha256").hexdigest()
+    image.seek(0)
+    return digest
+
+
+def _close(image: Union[bytes, BinaryIO]) -> None:
+    if hasattr(image, "close"):
+        image.close()
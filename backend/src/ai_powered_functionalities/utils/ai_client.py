@@ -1,12 +1,114 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Optional
+
 import google.generativeai as genai
 from ..config import get_settings
 
+# Magic numbers of the image formats we accept, used to label inline image data
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"BM", "image/bmp"),
+)
+
+
+def sniff_image_mime_type(header: bytes) -> Optional[str]:
+    """Return the MIME type matching the first bytes of an image, or None if unknown"""
+    for signature, mime_type in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mime_type
+    return None
+
+
+def guess_image_mime_type(image_data: bytes, default: str = "image/jpeg") -> str:
+    """Guess the MIME type of an image from its first bytes"""
+    return sniff_image_mime_type(image_data) or default
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeStream:
+    """Async iterator of response chunks, like the `stream=True` response"""
+
+    def __init__(self, text: str, chunk_size: int = 16):
+        self._chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(0)
+            yield _FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    """Offline stand-in for `genai.GenerativeModel` (GEMINI_BACKEND=fake).
+
+    Answers with `responder(contents)`, which defaults to echoing the text
+    parts of the prompt, so the API can be exercised without network access.
+    """
+
+    def __init__(self, responder: Optional[Callable[[Any], str]] = None):
+        self.responder = responder or self._echo
+        self.calls = 0
+
+    @staticmethod
+    def _echo(contents: Any) -> str:
+        parts = contents if isinstance(contents, list) else [contents]
+        return "\n".join(part for part in parts if isinstance(part, str))
+
+    async def generate_content_async(self, contents: Any, generation_config: Any = None, stream: bool = False,
+                                     **kwargs) -> Any:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if stream:
+            return _FakeStream(self.responder(contents))
+        return _FakeResponse(self.responder(contents))
+
 
 class GeminiClient:
-    def __init__(self):
+    # Shared by every client in the process, so the bound holds across all endpoints
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    def __init__(self, model: Optional[Any] = None):
         settings = get_settings()
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.timeout = settings.GEMINI_TIMEOUT_SECONDS
+        self.max_concurrency = settings.GEMINI_MAX_CONCURRENCY
+
+        if model is not None:
+            self.model = model
+        elif settings.GEMINI_BACKEND == "fake":
+            self.model = FakeGenerativeModel()
+        else:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if GeminiClient._semaphore is None:
+            GeminiClient._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return GeminiClient._semaphore
+
+    async def _generate(self, contents: Any, temperature: float) -> str:
+        """Run one non-blocking model call, bounded by the shared semaphore and the timeout"""
+        async with self._get_semaphore():
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        contents,
+                        generation_config=genai.types.GenerationConfig(
+                            temperature=temperature,
+                        )
+                    ),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"no response after {self.timeout} seconds")
+
+        return response.text
 
     async def get_completion(self, messages: list, temperature: float = 0.3) -> str:
         """Get completion from Gemini API
@@ -20,17 +122,42 @@ class GeminiClient:
             prompt = self._convert_messages(messages)
 
             # Generate response
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                )
-            )
-
-            return response.text
+            return await self._generate(prompt, temperature)
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
 
+    async def stream_completion(self, messages: list, temperature: float = 0.3) -> AsyncIterator[str]:
+        """Yield the completion text chunk by chunk as Gemini produces it
+
+        The concurrency slot is held until the stream is exhausted or closed,
+        and the timeout applies to the wait for each chunk.
+        """
+        prompt = self._convert_messages(messages)
+        async with self._get_semaphore():
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        prompt,
+                        generation_config=genai.types.GenerationConfig(
+                            temperature=temperature,
+                        ),
+                        stream=True
+                    ),
+                    timeout=self.timeout
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.text:
+                        yield chunk.text
+            except asyncio.TimeoutError:
+                raise Exception(f"Gemini API error: no response after {self.timeout} seconds")
+            except Exception as e:
+                raise Exception(f"Gemini API error: {str(e)}")
+
     def _convert_messages(self, messages: list) -> str:
         """Convert OpenAI message format to Gemini prompt"""
         prompt_parts = []
@@ -48,30 +175,23 @@ class GeminiClient:
 
         return "\n".join(prompt_parts)
 
-    async def get_vision_completion(self, image_data: bytes, prompt: str, temperature: float = 0.3) -> str:
+    async def get_vision_completion(self, image_data: bytes, prompt: str, temperature: float = 0.3,
+                                    mime_type: Optional[str] = None) -> str:
         """Get completion from Gemini with image input
 
         Args:
-            image_data: Image bytes
+            image_data: Encoded image bytes, sent inline without decoding
             prompt: Text prompt
             temperature: Controls randomness
+            mime_type: Image MIME type; guessed from the data when omitted
         """
         try:
-            # Import PIL for image handling
-            from PIL import Image
-            import io
-
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_data))
+            image_part = {
+                "mime_type": mime_type or guess_image_mime_type(image_data),
+                "data": image_data,
+            }
 
             # Generate response with image
-            response = self.model.generate_content(
-                [prompt, image],
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                )
-            )
-
-            return response.text
+            return await self._generate([prompt, image_part], temperature)
         except Exception as e:
-            raise Exception(f"Gemini Vision API error: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Gemini Vision API error: {str(e)}")
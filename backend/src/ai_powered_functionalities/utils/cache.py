@@ -0,0 +1,126 @@
+import atexit
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, Optional, Tuple
+
+
+class ResponseCache:
+    """Bounded LRU cache with a per-entry TTL, optionally persisted to disk.
+
+    Values must be JSON-serializable. When `path` is given the cache is loaded
+    from it on startup and rewritten atomically in a background thread, at
+    most once every `save_delay` seconds however many inserts happened in
+    between (and once more at exit), so set() never blocks on the disk. A
+    failed write is reported and retried with the next insert.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: Optional[str] = None,
+                 save_delay: float = 1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.save_delay = save_delay
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer at a time, in snapshot order
+        self._save_timer: Optional[threading.Timer] = None
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._schedule_save()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over the live (key, value) pairs, most recently used last."""
+        now = time.time()
+        with self._lock:
+            snapshot = [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at > now]
+        return iter(snapshot)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._schedule_save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def flush(self) -> None:
+        """Write a pending change to disk now, in the calling thread."""
+        with self._lock:
+            if self._save_timer is None:
+                return
+            self._save_timer.cancel()
+        self._save()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(stored, list):
+            return
+
+        now = time.time()
+        for entry in stored[-self.max_entries:]:
+            try:
+                key, expires_at, value = entry
+                if expires_at > now:
+                    self._entries[key] = (expires_at, value)
+            except (TypeError, ValueError):
+                continue
+
+    def _schedule_save(self) -> None:
+        # Called with self._lock held
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self) -> None:
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                snapshot = [[key, expires_at, value] for key, (expires_at, value) in self._entries.items()]
+            tmp_path = None
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory or None, prefix=os.path.basename(self.path),
+                                                suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Cache could not be saved to {self.path}: {e}")
+                if tmp_path is not None:
+                    with contextlib.suppress(OSError):
+                        os.remove(tmp_path)
@@ -0,0 +1,81 @@
+from typing import List, Optional
+
+
+class JsonStreamExtractor:
+    """Pull the first top-level JSON value out of model text as it streams in.
+
+    Text outside the value (code fences, chatter) is ignored, and braces inside
+    JSON strings are not counted, so no regex cleanup is needed afterwards.
+    With `unwrap_array=True` the elements of a top-level array are returned
+    one by one as soon as each is complete, instead of the whole array at the
+    end. `feed` returns the raw JSON texts completed by the chunk; parsing
+    them is left to the caller.
+    """
+
+    def __init__(self, unwrap_array: bool = False):
+        self.unwrap_array = unwrap_array
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_mode = False
+        self._current: List[str] = []
+
+    def feed(self, text: str) -> List[str]:
+        completed = []
+        # Values start at depth 1, or at depth 2 for the elements of an unwrapped array
+        base = 2 if self._array_mode else 1
+
+        for char in text:
+            if self.done:
+                break
+
+            if self._depth == 0:
+                if char in "{[":
+                    self._depth = 1
+                    if self.unwrap_array and char == "[":
+                        self._array_mode = True
+                        base = 2
+                    else:
+                        self._current.append(char)
+                continue
+
+            recording = self._depth >= base
+            if self._in_string:
+                if recording:
+                    self._current.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char in "{[":
+                self._depth += 1
+                if self._depth >= base:
+                    self._current.append(char)
+            elif char in "}]":
+                if recording:
+                    self._current.append(char)
+                self._depth -= 1
+                if self._depth == base - 1 and self._current:
+                    completed.append("".join(self._current))
+                    self._current = []
+                if self._depth == 0:
+                    self.done = True
+            else:
+                if char == '"':
+                    self._in_string = True
+                if recording:
+                    self._current.append(char)
+
+        return completed
+
+
+def extract_json(text: str) -> Optional[str]:
+    """Return the first complete top-level JSON object or array in `text`, if any."""
+    extractor = JsonStreamExtractor()
+    values = extractor.feed(text)
+    return values[0] if values else None
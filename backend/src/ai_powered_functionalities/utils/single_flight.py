@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single upstream call.
+
+    The first caller for a key starts `func()`; callers arriving while it is
+    still running await the same task instead of starting their own. The task
+    is shielded, so a client disconnecting does not cancel the call for the
+    others, and the key is forgotten as soon as the call finishes.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, "asyncio.Task"] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Task") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
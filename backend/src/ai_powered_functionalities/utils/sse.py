@@ -0,0 +1,17 @@
+import json
+from typing import Any
+
+from fastapi.responses import StreamingResponse
+
+# Disable proxy buffering (nginx) so events reach the browser as they are sent
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    """Wrap an async iterator of formatted events in a text/event-stream response"""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
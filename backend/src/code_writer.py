@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+
+class CodeWriter:
+    """Indentation-aware output buffer shared by the transpilers.
+
+    Nesting is tracked structurally: callers `indent()`/`dedent()` (or use
+    `block()`) around the body of a construct instead of the writer guessing
+    from the text of each line. Lines go into a list of parts that is joined
+    once; `drain()` hands out what was written since the previous call, so a
+    large program can be streamed out in chunks.
+    """
+
+    def __init__(self, indent_unit: str = "    ", level: int = 0) -> None:
+        self.indent_unit = indent_unit
+        self.level = level
+        self.line_count = 0  # lines written so far, including drained ones
+        self.pending_size = 0  # characters buffered since the last drain
+        self._parts: List[str] = []
+        self._prefixes: List[str] = [""]
+
+    def indent(self) -> None:
+        self.level += 1
+
+    def dedent(self) -> None:
+        if self.level > 0:
+            self.level -= 1
+
+    @contextmanager
+    def block(self) -> Iterator[None]:
+        """Indent the lines written inside the `with` body by one level."""
+        self.indent()
+        try:
+            yield
+        finally:
+            self.dedent()
+
+    def write_line(self, text: str = "") -> Tuple[int, int]:
+        """Write one line at the current level; blank lines are not indented.
+
+        Returns (line number, column where `text` starts), both usable for a
+        source map.
+        """
+        prefix = self._prefix() if text else ""
+        line = prefix + text
+        self._parts.append(line)
+        self.line_count += 1
+        self.pending_size += len(line) + 1
+        return self.line_count, len(prefix)
+
+    def drain(self) -> str:
+        """Return the buffered lines (newline-terminated) and empty the buffer."""
+        if not self._parts:
+            return ""
+        self._parts.append("")
+        chunk = "\n".join(self._parts)
+        self._parts = []
+        self.pending_size = 0
+        return chunk
+
+    def getvalue(self) -> str:
+        """The buffered lines joined with newlines (no trailing newline)."""
+        return "\n".join(self._parts)
+
+    def _prefix(self) -> str:
+        while len(self._prefixes) <= self.level:
+            self._prefixes.append(self._prefixes[-1] + self.indent_unit)
+        return self._prefixes[self.level]
@@ -0,0 +1,92 @@
+import gzip
+from typing import Callable, Dict, MutableMapping, Optional, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # optional: br is then simply not offered
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional: zstd is then simply not offered
+    zstandard = None
+
+# Key of the uncompressed body in a cache of encoded variants
+IDENTITY = "identity"
+# Smaller bodies are sent as they are; larger ones are compressed in a worker thread
+MIN_COMPRESSED_SIZE = 1024
+OFFLOAD_SIZE = 64 * 1024
+
+_CODECS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda data: gzip.compress(data, compresslevel=6, mtime=0),
+}
+if brotli is not None:
+    _CODECS["br"] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    _CODECS["zstd"] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+# Ordinea preferată de server la calitate egală (q) din Accept-Encoding
+_PREFERENCE = ("zstd", "br", "gzip")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The supported encoding the client accepts with the highest q value, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    wildcard = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in _PREFERENCE:
+        if encoding not in _CODECS:
+            continue
+        quality = weights.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return _CODECS[encoding](data)
+
+
+async def compressed_response(request: Request, body: Union[bytes, Callable[[], bytes]], media_type: str,
+                              headers: Optional[Dict[str, str]] = None,
+                              cache: Optional[MutableMapping[str, bytes]] = None) -> Response:
+    """Send `body` compressed with the best encoding the client accepts.
+
+    `body` may be a function building it, called in a worker thread and only
+    if `cache` (encoding -> compressed body) has no entry for the negotiated
+    encoding yet; new compressed variants are stored there, so a hot entry
+    is compressed once.
+    """
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding is not None and cache is not None and encoding in cache:
+        return Response(cache[encoding], media_type=media_type,
+                        headers={**headers, "Content-Encoding": encoding})
+
+    if callable(body):
+        body = await run_in_threadpool(body)
+    if encoding is None or len(body) < MIN_COMPRESSED_SIZE:
+        return Response(body, media_type=media_type, headers=headers)
+
+    if len(body) < OFFLOAD_SIZE:
+        compressed = compress(body, encoding)
+    else:
+        compressed = await run_in_threadpool(compress, body, encoding)
+    if cache is not None:
+        cache[encoding] = compressed
+    return Response(compressed, media_type=media_type, headers={**headers, "Content-Encoding": encoding})
@@ -1,13 +1,14 @@
 import sys
 import re
 
+from ...code_writer import CodeWriter
+
 
 class CppToPseudocodeTranspiler:
     def __init__(self, cpp_code):
         self.cpp_code = cpp_code
         self.lines = cpp_code.split('\n')
-        self.output = []
-        self.indent_level = 0
+        self.writer = CodeWriter()
         self.in_main = False
         self.brace_stack = []
         self.in_do_while = False
@@ -15,95 +16,102 @@ class CppToPseudocodeTranspiler:
 
     def transpile(self):
         """Main transpilation function"""
+        for _ in self._translate_lines():
+            pass
+        return self.writer.getvalue()
+
+    def iter_transpile(self, chunk_size=16 * 1024):
+        """Like transpile(), but yields the pseudocode in chunks of about `chunk_size` characters"""
+        for _ in self._translate_lines():
+            if self.writer.pending_size >= chunk_size:
+                yield self.writer.drain()
+        chunk = self.writer.drain()
+        if chunk:
+            yield chunk
+
+    def _translate_lines(self):
+        """Translate the C++ source line by line, yielding after each input line"""
         i = 0
         while i < len(self.lines):
-            line = self.lines[i].strip()
-            line = line.replace('long long)', '')
-
-            # Skip empty lines, includes, using namespace
-            if not line or line.startswith('#') or 'using namespace' in line:
-                i += 1
-                continue
-
-            # Skip comments
-            if line.startswith('//'):
-                i += 1
-                continue
-
-            # Detect main function
-            if 'int main' in line or 'void main' in line:
-                self.in_main = True
-                i += 1
-                continue
-
-            # Skip return 0
-            if line.startswith('return'):
-                i += 1
-                continue
-
-            # Handle closing brace with potential while (for do-while)
-            if line == '}' and i + 1 < len(self.lines):
-                next_line = self.lines[i + 1].strip()
-                if next_line.startswith('while'):
-                    # This is a do-while ending: } while (condition);
-                    condition_line = next_line
-                    self.handle_do_while_end(condition_line)
-                    i += 2  # Skip both lines
-                    continue
-
-            # Handle opening brace
-            if line == '{':
-                self.brace_stack.append('block')
-                i += 1
-                continue
-
-            # Handle closing brace
-            if line == '}':
-                if self.brace_stack:
-                    block_type = self.brace_stack.pop()
-                    if block_type == 'for':
-                        self.indent_level -= 1
-                        self.add_line('sfarsit_pentru')
-                    elif block_type == 'while':
-                        self.indent_level -= 1
-                        self.add_line('sfarsit_cat_timp')
-                    elif block_type == 'if':
-                        self.indent_level -= 1
-                        self.add_line('sfarsit_daca')
-                    elif block_type == 'do':
-                        # This should not happen for proper do-while
-                        self.indent_level -= 1
-                        self.add_line('sfarsit_executa')
-                i += 1
-                continue
-
-            # If not in main yet, check for global variables
-            if not self.in_main:
-                self.handle_global_declaration(line)
-                i += 1
-                continue
-
-            # In main: skip variable declarations without initialization
-            if self.is_declaration_only(line):
-                i += 1
-                continue
-
-            # Handle do-while start
-            if line.startswith('do'):
-                self.handle_do_while(line)
-                i += 1
-                continue
-
-            # Process the line
-            self.process_line(line)
-            i += 1
-
-        out = '\n'.join(self.output)
-        return self.fix_common_issues(out)
+            i = self._translate_line(i)
+            yield
+
+    def _translate_line(self, i):
+        """Translate the C++ line at index `i`; returns the index of the next line to read"""
+        line = self.lines[i].strip()
+        line = line.replace('long long)', '')
+
+        # Skip empty lines, includes, using namespace
+        if not line or line.startswith('#') or 'using namespace' in line:
+            return i + 1
+
+        # Skip comments
+        if line.startswith('//'):
+            return i + 1
+
+        # Detect main function
+        if 'int main' in line or 'void main' in line:
+            self.in_main = True
+            return i + 1
+
+        # Skip return 0
+        if line.startswith('return'):
+            return i + 1
+
+        # Handle closing brace with potential while (for do-while)
+        if line == '}' and i + 1 < len(self.lines):
+            next_line = self.lines[i + 1].strip()
+            if next_line.startswith('while'):
+                # This is a do-while ending: } while (condition);
+                condition_line = next_line
+                self.handle_do_while_end(condition_line)
+                return i + 2  # Skip both lines
+
+        # Handle opening brace
+        if line == '{':
+            self.brace_stack.append('block')
+            return i + 1
+
+        # Handle closing brace
+        if line == '}':
+            if self.brace_stack:
+                block_type = self.brace_stack.pop()
+                if block_type == 'for':
+                    self.writer.dedent()
+                    self.add_line('sfarsit_pentru')
+                elif block_type == 'while':
+                    self.writer.dedent()
+                    self.add_line('sfarsit_cat_timp')
+                elif block_type == 'if':
+                    self.writer.dedent()
+                    self.add_line('sfarsit_daca')
+                elif block_type == 'do':
+                    # This should not happen for proper do-while
+                    self.writer.dedent()
+                    self.add_line('sfarsit_executa')
+            return i + 1
+
+        # If not in main yet, check for global variables
+        if not self.in_main:
+            self.handle_global_declaration(line)
+            return i + 1
+
+        # In main: skip variable declarations without initialization
+        if self.is_declaration_only(line):
+            return i + 1
+
+        # Handle do-while start
+        if line.startswith('do'):
+            self.handle_do_while(line)
+            return i + 1
+
+        # Process the line
+        self.process_line(line)
+        return i + 1
 
     def add_line(self, text):
         """Add line with proper indentation"""
-        self.output.append('    ' * self.indent_level + text)
+        self.writer.write_line(self.fix_line(text))
 
     def handle_global_declaration(self, line):
         """Handle global variable declarations"""
@@ -159,9 +167,9 @@ class CppToPseudocodeTranspiler:
 
         # Handle else
         if line.startswith('else'):
-            self.indent_level -= 1
+            self.writer.dedent()
             self.add_line('altfel')
-            self.indent_level += 1
+            self.writer.indent()
             self.brace_stack.append('if')
             return
 
@@ -224,7 +232,7 @@ class CppToPseudocodeTranspiler:
         else:
             self.add_line(f'pentru {var_name} <- {start_val}, {condition}, {step} executa')
 
-        self.indent_level += 1
+        self.writer.indent()
         self.brace_stack.append('for')
 
     def handle_while_loop(self, line):
@@ -238,13 +246,13 @@ class CppToPseudocodeTranspiler:
         condition = self.translate_expression(condition)
 
         self.add_line(f'cat timp {condition} executa')
-        self.indent_level += 1
+        self.writer.indent()
         self.brace_stack.append('while')
 
     def handle_do_while(self, line):
         """Handle do-while loop start"""
         self.add_line('executa')
-        self.indent_level += 1
+        self.writer.indent()
         self.brace_stack.append('do')
         self.in_do_while = True
 
@@ -257,7 +265,7 @@ class CppToPseudocodeTranspiler:
             condition = self.translate_expression(condition)
 
             # Close the do-while block
-            self.indent_level -= 1
+            self.writer.dedent()
             self.add_line(f'cat timp {condition}')
 
             # Remove the 'do' from brace stack since we're closing it
@@ -277,7 +285,7 @@ class CppToPseudocodeTranspiler:
         condition = self.translate_expression(condition)
 
         self.add_line(f'daca {condition} atunci')
-        self.indent_level += 1
+        self.writer.indent()
         self.brace_stack.append('if')
 
     def handle_cin(self, line):
@@ -432,26 +440,23 @@ class CppToPseudocodeTranspiler:
         else:
             lines = translation
 
-        fixed_lines = []
-
-        for line in lines:
-            # Fix unbalanced parentheses
-            open_count = line.count('(')
-            close_count = line.count(')')
-
-            if open_count > close_count:
-                # Remove extra opening parentheses
-                line = line.replace('(', '', open_count - close_count)
-            elif close_count > open_count:
-                # Remove extra closing parentheses
-                line = line.replace(')', '', close_count - open_count)
+        return '\n'.join(self.fix_line(line) for line in lines)
 
-            # Fix double spaces
-            line = re.sub(r'  +', ' ', line)
+    def fix_line(self, line):
+        """Fix common issues in one translated line (applied as each line is written)"""
+        # Fix unbalanced parentheses
+        open_count = line.count('(')
+        close_count = line.count(')')
 
-            fixed_lines.append(line)
+        if open_count > close_count:
+            # Remove extra opening parentheses
+            line = line.replace('(', '', open_count - close_count)
+        elif close_count > open_count:
+            # Remove extra closing parentheses
+            line = line.replace(')', '', close_count - open_count)
 
-        return '\n'.join(fixed_lines)
+        # Fix double spaces
+        return re.sub(r'  +', ' ', line)
 
 
 def main():
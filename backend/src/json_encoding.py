@@ -0,0 +1,38 @@
+import json
+from typing import Any, Dict, Iterable
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class RawJSON(bytes):
+    """Bytes that already hold encoded JSON, to be embedded as they are by encode_object()"""
+
+
+def dumps(value: Any) -> bytes:
+    """Encode `value` as compact UTF-8 JSON, with orjson if it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str)
+        except orjson.JSONEncodeError:
+            # ex. întregi peste 64 de biți, pe care json îi acceptă
+            pass
+    return _ENCODER.encode(value).encode("utf-8")
+
+
+def join_array(items: Iterable[bytes]) -> RawJSON:
+    """A JSON array of already-encoded items"""
+    return RawJSON(b"[" + b",".join(items) + b"]")
+
+
+def encode_object(fields: Dict[str, Any]) -> bytes:
+    """A JSON object whose RawJSON values are embedded without being decoded and encoded again"""
+    parts = []
+    for key, value in fields.items():
+        encoded = value if isinstance(value, RawJSON) else dumps(value)
+        parts.append(dumps(key) + b":" + encoded)
+    return b"{" + b",".join(parts) + b"}"
@@ -1,6 +1,6 @@
 import json
 from enum import Enum, auto
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 class ASTNodeType(Enum):
     PROGRAM = auto()
@@ -19,21 +19,36 @@ class ASTNodeType(Enum):
     VARIABLE = auto()      # identificatori
     BLOCK = auto()
     EOF = auto()
+    ERROR = auto()         # instrucțiune/expresie invalidă, păstrată în AST-ul parțial (parser cu recuperare)
 
 class ASTNode:
     """Base AST node.
 
     - `kind` is the node type (ASTNodeType).
     - `children` is a list of child ASTNode objects or simple values.
-    - `attrs` holds auxiliary information (type inference, source location, etc.).
+    - `attrs` holds auxiliary information (type inference, etc.).
+    - `start`/`end` (character offsets, end exclusive) and `line`/`col`/`end_line`/`end_col`
+      locate the node in the source; they are plain int slots set by the parser,
+      -1/0 when unknown (e.g. synthesized nodes).
+    - `static_type` is the type found by the inference pass (type_inference.py) for
+      expression nodes: "bool", "int", "long long", "double" or "string"; None otherwise.
 
     Backwards-compatibility: `node_type` and `metadata` properties map to the new names.
     """
 
+    __slots__ = ("kind", "children", "attrs", "start", "end", "line", "col", "end_line", "end_col", "static_type")
+
     def __init__(self, kind: ASTNodeType):
         self.kind: ASTNodeType = kind
         self.children: List[Union["ASTNode", Any]] = []
         self.attrs: Dict[str, Any] = {}
+        self.start: int = -1
+        self.end: int = -1
+        self.line: int = 0
+        self.col: int = 0
+        self.end_line: int = 0
+        self.end_col: int = 0
+        self.static_type: Optional[str] = None
 
     @property
     def node_type(self) -> ASTNodeType:
@@ -51,6 +66,29 @@ class ASTNode:
     def metadata(self, value: Dict[str, Any]) -> None:
         self.attrs = value
 
+    def set_span(self, first_token: Dict[str, Any], last_token: Dict[str, Any]) -> "ASTNode":
+        """Cover the source from the start of `first_token` to the end of `last_token`."""
+        length = len(last_token.get("value") or "")
+        self.start = first_token.get("pos", -1)
+        self.line = first_token.get("line", 0)
+        self.col = first_token.get("col", 0)
+        self.end = last_token.get("pos", -1) + length if "pos" in last_token else -1
+        self.end_line = last_token.get("line", 0)
+        self.end_col = last_token.get("col", 0) + length
+        return self
+
+    def span_between(self, first: "ASTNode", last: "ASTNode") -> "ASTNode":
+        """Cover the source from the start of node `first` to the end of node `last`."""
+        self.start, self.line, self.col = first.start, first.line, first.col
+        self.end, self.end_line, self.end_col = last.end, last.end_line, last.end_col
+        return self
+
+    def span(self) -> Optional[Tuple[int, int, int, int]]:
+        """(line, col, end_line, end_col), or None if the node has no source position."""
+        if self.line <= 0:
+            return None
+        return self.line, self.col, self.end_line, self.end_col
+
     def add_child(self, child: Union["ASTNode", Any]) -> None:
         """Append a child (ASTNode or raw value)."""
         self.children.append(child)
@@ -64,11 +102,16 @@ class ASTNode:
                 return [serialize(i) for i in item]
             return item
 
-        return {
+        result = {
             "type": self.kind.name,
             "attrs": dict(self.attrs),
             "children": [serialize(c) for c in self.children],
         }
+        span = self.span()
+        if span is not None:
+            result["span"] = {"start": self.start, "end": self.end, "line": span[0], "col": span[1],
+                              "end_line": span[2], "end_col": span[3]}
+        return result
 
     def to_json(self) -> Dict[str, Any]:
         """Compatibility method: previously returned a dict for JSON serialization.
@@ -87,6 +130,8 @@ class ASTNode:
 
 # Examples of specialized nodes
 class BinOpNode(ASTNode):
+    __slots__ = ("operator", "op")
+
     def __init__(self, left: Union[ASTNode, Any], op: str, right: Union[ASTNode, Any]):
         super().__init__(ASTNodeType.BIN_OP)
         # keep a short-name for backward compatibility but prefer `operator`
@@ -99,6 +144,8 @@ class BinOpNode(ASTNode):
         return f"<BinOpNode op={self.operator} children={len(self.children)}>"
 
 class LiteralNode(ASTNode):
+    __slots__ = ("value", "inferred_type")
+
     def __init__(self, value: Any, value_type: str):
         super().__init__(ASTNodeType.LITERAL)
         self.value: Any = value
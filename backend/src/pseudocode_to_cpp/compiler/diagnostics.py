@@ -0,0 +1,23 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+
+
+@dataclass
+class Diagnostic:
+    """O eroare de sintaxă cu poziția ei în sursă (linii de la 1, coloane de la 0, sfârșit exclusiv)."""
+
+    message: str
+    line: int
+    col: int
+    end_line: int
+    end_col: int
+    severity: str = "error"
+
+    @classmethod
+    def at_token(cls, message: str, token: Dict[str, Any]) -> "Diagnostic":
+        line = token.get("line", -1)
+        col = token.get("col", 0)
+        return cls(message, line, col, line, col + len(token.get("value") or ""))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
@@ -1,6 +1,8 @@
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, Generator, List, Tuple
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from .diagnostics import Diagnostic
 
 # Use an explicit ordered list of token name / regex pairs. Order matters: longer/more specific
 # tokens should appear before more general ones.
@@ -82,21 +84,23 @@ class Token:
     lexeme: str
     line: int
     col: int
+    pos: int = -1  # offset in the whole source
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"type": self.token_type, "value": self.lexeme, "line": self.line, "col": self.col}
+        return {"type": self.token_type, "value": self.lexeme, "line": self.line, "col": self.col, "pos": self.pos}
 
 
-def lex(source: str) -> Generator[Dict[str, Any], None, None]:
+def lex(source: str, diagnostics: Optional[List[Diagnostic]] = None) -> Generator[Dict[str, Any], None, None]:
     """Transformă codul sursă într-un flux de tokeni (yield dicts for compatibility).
 
-    Yields dictionaries with keys: type, value, line, col
+    Yields dictionaries with keys: type, value, line, col, pos
+
+    If `diagnostics` is given, unexpected characters are appended to it and
+    skipped instead of raising SyntaxError.
     """
     line_number: int = 1
     line_start_idx: int = 0
 
-    last_col: int = 0
-
     for match in _MASTER_PATTERN.finditer(source):
         token_type = match.lastgroup
         lexeme = match.group()
@@ -106,23 +110,23 @@ def lex(source: str) -> Generator[Dict[str, Any], None, None]:
         if token_type == "NEWLINE":
             line_start_idx = match.end()
             line_number += 1
-            last_col = 0
             continue
         if token_type == "SKIP":
             # spaces and tabs
             continue
         if token_type == "MISMATCH":
-            raise SyntaxError(
-                f"Caracter neașteptat {lexeme!r} la linia {line_number}, coloana {col_offset}"
-            )
-
-        last_col = col_offset
+            message = f"Caracter neașteptat {lexeme!r} la linia {line_number}, coloana {col_offset}"
+            if diagnostics is None:
+                raise SyntaxError(message)
+            diagnostics.append(Diagnostic(message, line_number, col_offset, line_number, col_offset + 1))
+            continue
 
-        tok = Token(token_type=token_type, lexeme=lexeme, line=line_number, col=col_offset)
+        tok = Token(token_type=token_type, lexeme=lexeme, line=line_number, col=col_offset, pos=match.start())
         yield tok.to_dict()
 
-    # Emit EOF token. Use last_col (0 if no tokens were emitted)
-    yield Token(token_type="EOF", lexeme="", line=line_number, col=last_col).to_dict()
+    # Emit EOF token, placed right after the last character of the source
+    yield Token(token_type="EOF", lexeme="", line=line_number, col=len(source) - line_start_idx,
+                pos=len(source)).to_dict()
 
 
 tokenize = lex
@@ -1,15 +1,27 @@
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from .ast_node import ASTNodeType, ASTNode, BinOpNode, LiteralNode
+from .diagnostics import Diagnostic
 # Presupunem că lexer-ul e în lexer.py și funcționează conform discuției anterioare
 from .lexer import lex
 
 
 class Parser:
-    def __init__(self, tokens: List[Dict[str, Any]]):
+    # Tokens at which panic-mode recovery resumes parsing
+    STATEMENT_STARTS = ('ID', 'CAT_TIMP', 'CITESTE', 'SCRIE', 'PENTRU', 'DACA', 'REPETA', 'EXECUTA')
+    CLOSING_TOKENS = ('SFARSIT_DACA', 'ALTFEL', 'SFARSIT_PENTRU', 'SFARSIT_CAT', 'PANA_CAND')
+    TERM_TOKENS = ('NUMBER', 'STRING', 'ID', 'SQRT', 'LBRACKET', 'LPAREN', 'TRUE', 'FALSE')
+
+    def __init__(self, tokens: List[Dict[str, Any]], recover: bool = False):
+        """With `recover=True` syntax errors do not raise: they are collected in
+        `diagnostics` and `parse_program` returns a partial AST with ERROR nodes."""
         # Use clearer attribute names internally
         self.token_list: List[Dict[str, Any]] = list(tokens)
         self.index: int = 0
+        self.recover: bool = recover
+        self.diagnostics: List[Diagnostic] = []
+        # Terminators of the structures currently being parsed (innermost last)
+        self._open_closers: List[str] = []
 
     # Backwards-compatible accessors
     @property
@@ -77,9 +89,11 @@ class Parser:
         statements: List[ASTNode] = []
         # Ne oprim explicit când întâlnim token-ul EOF
         while self.current_type() != 'EOF':
-            statements.append(self.parse_statement())
+            statements.append(self._statement())
         program_node = ASTNode(ASTNodeType.PROGRAM)
         program_node.children = statements
+        if statements:
+            program_node.span_between(statements[0], statements[-1])
         return program_node
 
     def parse_statement(self) -> ASTNode:
@@ -103,85 +117,91 @@ class Parser:
         elif token_type == 'EXECUTA':
             return self.parse_do_while()
 
-        raise SyntaxError(f"Instrucțiune necunoscută '{token.get('value')}' la linia {token.get('line')}")
+        raise SyntaxError(f"Instrucțiune necunoscută {self._describe(token)} la linia {token.get('line')}")
 
     def parse_do_while(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('EXECUTA')
 
         # Citim corpul buclei până la 'cat timp'
+        self._open_closers.append('CAT_TIMP')
         body_statements = self.parse_block('CAT_TIMP')
+        self._open_closers.pop()
 
         # consume the delimiter and read the condition
-        self.expect_token('CAT_TIMP')
-        condition = self.parse_expression()
+        closer = self._expect_closer('CAT_TIMP', opener)
+        if closer:
+            condition = self._expression_until()
+        else:
+            condition = self._error_node("Lipsește condiția structurii 'executa'", line)
 
         do_while_node = ASTNode(ASTNodeType.DO_WHILE)
         do_while_node.metadata['line'] = line
+        self._mark_closer(do_while_node, closer)
 
-        body_node = ASTNode(ASTNodeType.BLOCK)
-        body_node.children = body_statements
-
-        do_while_node.children = [body_node, condition]
-        return do_while_node
+        do_while_node.children = [self._block(body_statements), condition]
+        return self._finish(do_while_node, opener)
 
     def parse_repeat_until(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('REPETA')
 
+        self._open_closers.append('PANA_CAND')
         body_stmts = self.parse_block('PANA_CAND')
+        self._open_closers.pop()
 
-        self.expect_token('PANA_CAND')
-        condition = self.parse_expression()
+        closer = self._expect_closer('PANA_CAND', opener)
+        if closer:
+            condition = self._expression_until()
+        else:
+            condition = self._error_node("Lipsește condiția structurii 'repeta'", line)
 
         repeat_node = ASTNode(ASTNodeType.REPEAT_UNTIL)
         repeat_node.metadata['line'] = line
+        self._mark_closer(repeat_node, closer)
 
-        body_node = ASTNode(ASTNodeType.BLOCK)
-        body_node.children = body_stmts
-
-        repeat_node.children = [body_node, condition]
-        return repeat_node
+        repeat_node.children = [self._block(body_stmts), condition]
+        return self._finish(repeat_node, opener)
 
     def parse_if(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('DACA')
 
-        condition = self.parse_expression()
+        condition = self._expression_until('ATUNCI')
 
         # Expect 'ATUNCI'
-        if not self.accept_token('ATUNCI'):
-            raise SyntaxError(f"Așteptam 'atunci' după condiție la linia {self.current_token().get('line')}")
+        self._expect_keyword('ATUNCI', f"Așteptam 'atunci' după condiție la linia {self.current_token().get('line')}")
 
         # then branch
+        self._open_closers.append('SFARSIT_DACA')
         then_stmts: List[ASTNode] = []
-        while self.current_type() not in ('ALTFEL', 'SFARSIT_DACA', 'EOF'):
-            then_stmts.append(self.parse_statement())
+        while not self._at_block_end('ALTFEL', 'SFARSIT_DACA'):
+            then_stmts.append(self._statement())
 
         # optional else
         else_stmts: List[ASTNode] = []
         if self.accept_token('ALTFEL'):
-            while self.current_type() not in ('SFARSIT_DACA', 'EOF'):
-                else_stmts.append(self.parse_statement())
+            while not self._at_block_end('SFARSIT_DACA'):
+                else_stmts.append(self._statement())
+        self._open_closers.pop()
 
         # require sfarsit_daca
-        if not self.accept_token('SFARSIT_DACA'):
-            raise SyntaxError("Lipsește 'sfarsit_daca' pentru structura alternativă curentă.")
+        closer = self._expect_closer('SFARSIT_DACA', opener,
+                                     "Lipsește 'sfarsit_daca' pentru structura alternativă curentă.")
 
         if_node = ASTNode(ASTNodeType.IF)
         if_node.metadata['line'] = line
+        self._mark_closer(if_node, closer)
 
-        then_block = ASTNode(ASTNodeType.BLOCK)
-        then_block.children = then_stmts
-
-        else_block = ASTNode(ASTNodeType.BLOCK)
-        else_block.children = else_stmts
-
-        if_node.children = [condition, then_block, else_block]
-        return if_node
+        if_node.children = [condition, self._block(then_stmts), self._block(else_stmts)]
+        return self._finish(if_node, opener)
 
     def parse_for(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('PENTRU')
 
         if self.current_type() != 'ID':
@@ -190,117 +210,246 @@ class Parser:
 
         # initial assignment
         self.expect_token('ASSIGN')
-        start_expr = self.parse_expression()
+        start_expr = self._expression_until('COMMA', 'EXECUTA')
 
         # comma and stop expression
         self.expect_token('COMMA')
-        stop_expr = self.parse_expression()
+        stop_expr = self._expression_until('COMMA', 'EXECUTA')
 
         # optional step
         step_expr = None
         if self.current_type() == 'COMMA':
             self.consume_token('COMMA')
-            step_expr = self.parse_expression()
+            step_expr = self._expression_until('EXECUTA')
         else:
             step_expr = LiteralNode('1', 'int')
 
         # expect 'EXECUTA'
-        if not self.accept_token('EXECUTA'):
-            raise SyntaxError(f"Așteptam 'executa' la linia {self.current_token().get('line')}")
+        self._expect_keyword('EXECUTA', f"Așteptam 'executa' la linia {self.current_token().get('line')}")
 
+        self._open_closers.append('SFARSIT_PENTRU')
         body_stmts = self.parse_block('SFARSIT_PENTRU')
+        self._open_closers.pop()
         # consume end
-        self.expect_token('SFARSIT_PENTRU')
+        closer = self._expect_closer('SFARSIT_PENTRU', opener)
 
         for_node = ASTNode(ASTNodeType.FOR)
         for_node.metadata['line'] = line
         for_node.metadata['iterator'] = var_name
+        self._mark_closer(for_node, closer)
 
-        body_node = ASTNode(ASTNodeType.BLOCK)
-        body_node.children = body_stmts
-
-        for_node.children = [start_expr, stop_expr, step_expr, body_node]
-        return for_node
+        for_node.children = [start_expr, stop_expr, step_expr, self._block(body_stmts)]
+        return self._finish(for_node, opener)
 
     def parse_write(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('SCRIE')
 
         expressions: List[ASTNode] = []
-        expressions.append(self.parse_expression())
+        expressions.append(self._expression_until('COMMA'))
 
         while self.current_type() == 'COMMA':
             self.consume_token('COMMA')
-            expressions.append(self.parse_expression())
+            expressions.append(self._expression_until('COMMA'))
 
         write_node = ASTNode(ASTNodeType.WRITE)
         write_node.metadata['line'] = line
         write_node.children = expressions
-        return write_node
+        return self._finish(write_node, opener)
 
     def parse_read(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('CITESTE')
 
-        variables: List[str] = []
+        variables: List[LiteralNode] = []
         if self.current_type() != 'ID':
             raise SyntaxError(f"Așteptam un nume de variabilă după 'citeste' la linia {line}")
 
-        variables.append(self.consume_token('ID')['value'])
+        variables.append(self._handle_id(self.consume_token('ID')))
         while self.current_type() == 'COMMA':
             self.consume_token('COMMA')
             if self.current_type() != 'ID':
                 raise SyntaxError(f"Așteptam variabilă după ',' la linia {self.current_token().get('line')}")
-            variables.append(self.consume_token('ID')['value'])
+            variables.append(self._handle_id(self.consume_token('ID')))
 
         read_node = ASTNode(ASTNodeType.READ)
         read_node.metadata['line'] = line
-        read_node.children = [LiteralNode(v, 'var') for v in variables]
-        return read_node
+        read_node.children = variables
+        return self._finish(read_node, opener)
 
     def parse_assign(self) -> ASTNode:
-        line = self.current_token().get('line')
-        var_name = self.consume_token('ID')['value']
+        var_token = self.consume_token('ID')
+        line = var_token.get('line')
+        var_name = var_token['value']
         # Verificăm dacă urmează o atribuire
         if self.current_type() == 'ASSIGN':
             self.consume_token('ASSIGN')
-            expr = self.parse_expression()
+            expr = self._expression_until()
             node = ASTNode(ASTNodeType.ASSIGNMENT)
             node.metadata['line'] = line
-            node.children = [LiteralNode(var_name, 'var'), expr]
-            return node
+            node.children = [self._handle_id(var_token), expr]
+            return self._finish(node, var_token)
         else:
             raise SyntaxError(f"Așteptam '<-' după {var_name} la linia {line}")
 
     def parse_block(self, end_token_type: str) -> List[ASTNode]:
         stmts: List[ASTNode] = []
         # Citim instrucțiuni până la EOF sau până la token-ul de final specificat (ex: SFARSIT_CAT)
-        while self.current_type() != 'EOF' and self.current_type() != end_token_type:
-            stmts.append(self.parse_statement())
+        while not self._at_block_end(end_token_type):
+            stmts.append(self._statement())
         return stmts
 
     def parse_while(self) -> ASTNode:
-        line = self.current_token().get('line')
+        opener = self.current_token()
+        line = opener.get('line')
         self.expect_token('CAT_TIMP')
-        condition = self.parse_expression()
+        condition = self._expression_until('EXECUTA')
 
-        if not self.accept_token('EXECUTA'):
-            raise SyntaxError(f"Așteptam 'executa' la linia {self.current_token().get('line')}")
+        self._expect_keyword('EXECUTA', f"Așteptam 'executa' la linia {self.current_token().get('line')}")
 
+        self._open_closers.append('SFARSIT_CAT')
         stmts = self.parse_block('SFARSIT_CAT')
+        self._open_closers.pop()
 
         # require end token
-        if not self.accept_token('SFARSIT_CAT'):
-            raise SyntaxError("Lipsește 'sfarsit_cat_timp' pentru bucla curentă.")
+        closer = self._expect_closer('SFARSIT_CAT', opener, "Lipsește 'sfarsit_cat_timp' pentru bucla curentă.")
 
         while_node = ASTNode(ASTNodeType.WHILE)
         while_node.metadata['line'] = line
+        self._mark_closer(while_node, closer)
+
+        while_node.children = [condition, self._block(stmts)]
+        return self._finish(while_node, opener)
+
+    # --- Poziții în sursă ---
+    def _finish(self, node: ASTNode, first_token: Dict[str, Any]) -> ASTNode:
+        """Set the node's span from `first_token` to the last consumed token."""
+        last_token = self.token_list[self.index - 1] if self.index > 0 else first_token
+        return node.set_span(first_token, last_token)
+
+    @staticmethod
+    def _block(statements: List[ASTNode]) -> ASTNode:
+        block = ASTNode(ASTNodeType.BLOCK)
+        block.children = statements
+        if statements:
+            block.span_between(statements[0], statements[-1])
+        return block
+
+    # --- Recuperare după erori (recover=True) ---
+    # Panic mode: o instrucțiune greșită este raportată și sărită până la începutul
+    # următoarei instrucțiuni (cuvânt cheie / variabilă la început de linie) sau
+    # până la un 'sfarsit_*', iar parsarea continuă.
+
+    def _statement(self) -> ASTNode:
+        """parse_statement; in recover mode a failed statement is reported, skipped and kept as an ERROR node."""
+        if not self.recover:
+            return self.parse_statement()
+
+        start = self.index
+        open_depth = len(self._open_closers)
+        try:
+            return self.parse_statement()
+        except SyntaxError as e:
+            self._report(str(e))
+            del self._open_closers[open_depth:]
+            self._synchronize(start)
+            return self._finish(self._error_node(str(e), self.token_list[start].get('line')), self.token_list[start])
+
+    def _synchronize(self, start: int) -> None:
+        if self.index == start:
+            self.index += 1
+        while self.current_type() != 'EOF':
+            token_type = self.current_type()
+            if token_type in self.CLOSING_TOKENS:
+                return
+            if token_type in self.STATEMENT_STARTS and self._starts_line():
+                return
+            self.index += 1
+
+    def _starts_line(self) -> bool:
+        if self.index == 0:
+            return True
+        return self.token_list[self.index - 1].get('line') != self.current_token().get('line')
+
+    def _at_block_end(self, *end_types: str) -> bool:
+        token_type = self.current_type()
+        if token_type == 'EOF' or token_type in end_types:
+            return True
+        # Terminatorul unei structuri exterioare închide și blocul curent (care își raportează terminatorul lipsă)
+        return self.recover and token_type != 'CAT_TIMP' and token_type in self._open_closers
+
+    def _expression_until(self, *stop_types: str) -> ASTNode:
+        """parse_expression; in recover mode a bad expression is reported and skipped up to one of
+        `stop_types` or the end of its line, and replaced by an ERROR node."""
+        if not self.recover:
+            return self.parse_expression()
+
+        first = self.current_token()
+        start = self.index
+        try:
+            return self.parse_expression()
+        except SyntaxError as e:
+            self._report(str(e))
+            while self.current_type() not in stop_types + ('EOF',) \
+                    and self.current_token().get('line') == first.get('line'):
+                self.index += 1
+            node = self._error_node(str(e), first.get('line'))
+            return self._finish(node, first) if self.index > start else node.set_span(first, first)
+
+    def _expect_keyword(self, token_type: str, message: str) -> None:
+        """Require a keyword inside a statement header; in recover mode a missing one is only reported."""
+        if self.accept_token(token_type):
+            return
+        if not self.recover:
+            raise SyntaxError(message)
+        self._report(message)
+
+    def _expect_closer(self, token_type: str, opener: Dict[str, Any],
+                       message: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Consume and return the terminator of the structure started by `opener`.
+
+        In recover mode a missing terminator is reported at the opener and None is returned.
+        """
+        closer = self.accept_token(token_type)
+        if closer:
+            return closer
+        if message is None:
+            message = f"Așteptam '{token_type}' la linia {self.current_token().get('line')}"
+        if not self.recover:
+            raise SyntaxError(message)
+        self._report(message, opener)
+        return None
 
-        body_node = ASTNode(ASTNodeType.BLOCK)
-        body_node.children = stmts  # <-- FIX: Atașăm instrucțiunile la nod
-
-        while_node.children = [condition, body_node]
-        return while_node
+    @staticmethod
+    def _mark_closer(node: ASTNode, closer: Optional[Dict[str, Any]]) -> None:
+        """Remember where the terminator starts (its end is the end of the node's span)."""
+        if closer:
+            node.metadata['closer_col'] = closer.get('col', 0)
+
+    def _report(self, message: str, token: Optional[Dict[str, Any]] = None) -> None:
+        diagnostic = Diagnostic.at_token(message, token or self.current_token())
+        # O eroare pe același token ca precedenta este doar urmarea ei (ex. instrucțiunea care
+        # începe unde s-a oprit o expresie greșită), nu o greșeală nouă
+        if self.diagnostics:
+            previous = self.diagnostics[-1]
+            if (previous.line, previous.col) == (diagnostic.line, diagnostic.col):
+                return
+        self.diagnostics.append(diagnostic)
+
+    @staticmethod
+    def _describe(token: Dict[str, Any]) -> str:
+        if token.get('type', 'EOF') == 'EOF':
+            return "sfârșitul fișierului"
+        return f"'{token.get('value')}'"
+
+    @staticmethod
+    def _error_node(message: str, line: Optional[int]) -> ASTNode:
+        node = ASTNode(ASTNodeType.ERROR)
+        node.metadata['line'] = line
+        node.metadata['message'] = message
+        return node
 
     def parse_expression(self) -> ASTNode:
         """Nivelul cel mai de jos: SAU"""
@@ -308,7 +457,7 @@ class Parser:
         while self.current_type() == 'OR':
             _ = self.consume_token()
             right = self.parse_logic_term()
-            left = BinOpNode(left, 'OR', right)
+            left = BinOpNode(left, 'OR', right).span_between(left, right)
         return left
 
     def parse_logic_term(self) -> ASTNode:
@@ -317,18 +466,18 @@ class Parser:
         while self.current_type() == 'AND':
             _ = self.consume_token()
             right = self.parse_not_factor()
-            left = BinOpNode(left, 'AND', right)
+            left = BinOpNode(left, 'AND', right).span_between(left, right)
         return left
 
     def parse_not_factor(self) -> ASTNode:
         """Nivelul NOT (unar)"""
         if self.current_type() == 'NOT':
-            self.consume_token('NOT')
+            not_token = self.consume_token('NOT')
             operand = self.parse_not_factor()  # Recursiv pentru 'not not a'
             node = ASTNode(ASTNodeType.UNARY_OP)
             node.metadata['operator'] = 'NOT'
             node.children = [operand]
-            return node
+            return self._finish(node, not_token)
         return self.parse_relational()
 
     def parse_relational(self) -> ASTNode:
@@ -339,7 +488,7 @@ class Parser:
         if self.current_type() in ('EQ', 'NEQ', 'LT', 'LTE', 'GT', 'GTE'):
             op_token = self.consume_token()
             right = self.parse_arithmetic()
-            return BinOpNode(left, op_token['value'], right)
+            return BinOpNode(left, op_token['value'], right).span_between(left, right)
         return left
 
     def parse_arithmetic(self) -> ASTNode:
@@ -348,7 +497,7 @@ class Parser:
         while self.current_type() in ('PLUS', 'MINUS'):
             op_token = self.consume_token()
             right = self.parse_term_arithmetic()
-            left = BinOpNode(left, op_token['value'], right)
+            left = BinOpNode(left, op_token['value'], right).span_between(left, right)
         return left
 
     def parse_term_arithmetic(self) -> ASTNode:
@@ -357,7 +506,7 @@ class Parser:
         while self.current_type() in ('MUL', 'DIV', 'MOD'):
             op_token = self.consume_token()
             right = self.parse_pow()
-            left = BinOpNode(left, op_token['value'], right)
+            left = BinOpNode(left, op_token['value'], right).span_between(left, right)
         return left
 
     def parse_pow(self) -> ASTNode:
@@ -366,23 +515,27 @@ class Parser:
         while self.current_type() == 'POW':
             op_token = self.consume_token()
             right = self.parse_factor()
-            left = BinOpNode(left, op_token['value'], right)
+            left = BinOpNode(left, op_token['value'], right).span_between(left, right)
         return left
 
     def parse_factor(self) -> ASTNode:
         """Cel mai înalt nivel: literali, variabile, paranteze, unari aritmetici"""
         if self.current_type() == 'MINUS':  # Unary minus (-5)
-            self.consume_token('MINUS')
+            minus_token = self.consume_token('MINUS')
             expr = self.parse_factor()
             node = ASTNode(ASTNodeType.UNARY_OP)
             node.metadata['operator'] = 'MINUS'
             node.children = [expr]
-            return node
+            return self._finish(node, minus_token)
         # ... apelurile existente către _handle_number, _handle_id, etc ...
         return self.parse_term()  # Redenumit vechiul parse_term
 
     def parse_term(self) -> ASTNode:
-        token = self.consume_token()
+        # Tokenul greșit nu este consumat, ca recuperarea să poată relua de la el
+        token = self.current_token()
+        if token['type'] not in self.TERM_TOKENS:
+            raise SyntaxError(f"Termen neașteptat {self._describe(token)} la linia {token['line']}")
+        self.consume_token()
 
         if token['type'] == 'NUMBER':
             return self._handle_number(token)
@@ -397,15 +550,15 @@ class Parser:
         elif token['type'] == 'LPAREN':
             return self._handle_grouped_expr(token)
         elif token["type"] == "TRUE" or token["type"] == "FALSE":
-            return LiteralNode(token["value"], 'bool')
+            return LiteralNode(token["value"], 'bool').set_span(token, token)
         else:
-            raise SyntaxError(f"Termen neașteptat '{token['value']}' la linia {token['line']}")
+            raise SyntaxError(f"Termen neașteptat {self._describe(token)} la linia {token['line']}")
 
     # --- Helper Methods for Term Parsing ---
 
     def _handle_number(self, token: Dict[str, Any]) -> LiteralNode:
         v_type = 'real' if '.' in token['value'] else 'int'
-        return LiteralNode(token['value'], v_type)
+        return LiteralNode(token['value'], v_type).set_span(token, token)
 
     def _handle_string(self, token: Dict[str, Any]) -> LiteralNode:
         # Strip surrounding quotes (both single and double) and unescape simple escapes
@@ -415,10 +568,10 @@ class Parser:
         else:
             inner = raw
         inner = inner.replace('\\"', '"').replace("\\'", "'")
-        return LiteralNode(inner, 'string')
+        return LiteralNode(inner, 'string').set_span(token, token)
 
     def _handle_id(self, token: Dict[str, Any]) -> LiteralNode:
-        return LiteralNode(token['value'], 'var')
+        return LiteralNode(token['value'], 'var').set_span(token, token)
 
     def _handle_sqrt(self, sqrt_token: Dict[str, Any]) -> ASTNode:
         # Expect an opening '('
@@ -435,7 +588,7 @@ class Parser:
         node.metadata['operator'] = 'SQRT'
         node.metadata['line'] = sqrt_token.get('line')
         node.children = [expr]
-        return node
+        return self._finish(node, sqrt_token)
 
     def _handle_floor(self, token: Dict[str, Any]) -> ASTNode:
         # Handles [ expression ]
@@ -447,7 +600,7 @@ class Parser:
         node = ASTNode(ASTNodeType.UNARY_OP)
         node.metadata['operator'] = 'FLOOR'
         node.children = [expr]
-        return node
+        return self._finish(node, token)
 
     def _handle_grouped_expr(self, token: Dict[str, Any]) -> ASTNode:
         # Handles ( expression )
@@ -455,7 +608,18 @@ class Parser:
         if not self.accept_token('RPAREN'):
             current_line = self.current_token().get('line')
             raise SyntaxError(f"Așteptam ')' pentru închiderea parantezei la linia {current_line}")
-        return expr
+        # The parenthesized expression covers the parentheses too
+        return self._finish(expr, token)
+
+
+def parse_with_diagnostics(source: str) -> Tuple[ASTNode, List[Diagnostic]]:
+    """Parsează tot programul, colectând toate erorile lexicale și sintactice într-o singură trecere."""
+    diagnostics: List[Diagnostic] = []
+    parser = Parser(list(lex(source, diagnostics)), recover=True)
+    ast = parser.parse_program()
+    diagnostics.extend(parser.diagnostics)
+    diagnostics.sort(key=lambda d: (d.line, d.col))
+    return ast, diagnostics
 
 
 # --- TESTARE ---
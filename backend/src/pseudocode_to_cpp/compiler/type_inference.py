@@ -0,0 +1,250 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .ast_node import ASTNode, ASTNodeType
+
+# Tipurile statice, în ordinea laticei numerice: bool < int < long long < double; string separat
+BOOL = "bool"
+INT = "int"
+LONG_LONG = "long long"
+DOUBLE = "double"
+STRING = "string"
+
+NUMERIC_TYPES = (INT, LONG_LONG, DOUBLE)
+_RANK = {BOOL: 0, INT: 1, LONG_LONG: 2, DOUBLE: 3}
+_INT_MAX = 2 ** 31 - 1
+
+_COMPARISON_OPS = ('=', '!=', '≠', '<', '>', '<=', '>=', '≤', '≥')
+_RELATIONAL_OPS = _COMPARISON_OPS + ('AND', 'OR')
+# Literalele care, comparate cu o variabilă citită, îi dau tipul datelor de intrare
+_INPUT_HINT_TYPES = {'real': DOUBLE, 'string': STRING}
+_EXPRESSION_KINDS = (ASTNodeType.LITERAL, ASTNodeType.BIN_OP, ASTNodeType.UNARY_OP)
+
+
+def join(first: Optional[str], second: Optional[str]) -> Optional[str]:
+    """Least upper bound of two types; None is the bottom (nothing known yet)."""
+    if first is None:
+        return second
+    if second is None or first == second:
+        return first
+    if STRING in (first, second):
+        return STRING
+    return first if _RANK[first] >= _RANK[second] else second
+
+
+def is_numeric(node: Any) -> bool:
+    """True if the inference pass typed this expression as int, long long or double."""
+    return getattr(node, 'static_type', None) in NUMERIC_TYPES
+
+
+def _at_least_int(value_type: Optional[str]) -> str:
+    """Arithmetic never yields bool (or nothing): adevarat + 1 is an int."""
+    if value_type is None or value_type == BOOL:
+        return INT
+    return value_type
+
+
+class TypeInference:
+    """Inferență de tipuri prin analiză de flux de date, cu punct fix.
+
+    Every definition (atribuire, citeste, iteratorul lui pentru) raises its
+    variable's type to the join of the types assigned to it. Input is not
+    known statically and the language has no declarations, so `citeste x`
+    assumes an int (pbinfo problems read integers) unless x is somewhere
+    compared to a real or string literal (`daca x > 2.5`, `daca x = "da"`),
+    which then gives the type it must be read as. A worklist only
+    re-evaluates the definitions that read a variable whose type just rose;
+    since a type can rise at most three times, the whole pass stays linear
+    in the size of the program. Afterwards every expression node gets its
+    type in the `static_type` slot.
+    """
+
+    def __init__(self) -> None:
+        self.variables: Dict[str, Optional[str]] = {}
+        self.input_hints: Dict[str, str] = {}
+
+    def run(self, program: ASTNode) -> Dict[str, str]:
+        """Infer and annotate; returns variable -> type, in order of first definition."""
+        self.variables = {}
+        self.input_hints = {}
+        self._collect_input_hints(program)
+        definitions: List[Tuple[str, List[Any], Optional[str]]] = []
+        self._collect_definitions(program, definitions)
+
+        readers: Dict[str, List[int]] = {}
+        for index, (_, expressions, _) in enumerate(definitions):
+            names: Set[str] = set()
+            for expression in expressions:
+                self._collect_reads(expression, names)
+            for name in names:
+                readers.setdefault(name, []).append(index)
+
+        worklist = deque(range(len(definitions)))
+        queued = [True] * len(definitions)
+        while worklist:
+            index = worklist.popleft()
+            queued[index] = False
+            target, expressions, base_type = definitions[index]
+
+            value_type = base_type
+            for expression in expressions:
+                value_type = join(value_type, self._type_of(expression, annotate=False))
+
+            old_type = self.variables.get(target)
+            new_type = join(old_type, value_type)
+            if new_type != old_type:
+                self.variables[target] = new_type
+                for reader in readers.get(target, ()):
+                    if not queued[reader]:
+                        queued[reader] = True
+                        worklist.append(reader)
+
+        # Variabilele care primesc doar valori necunoscute rămân int
+        for name, value_type in self.variables.items():
+            if value_type is None:
+                self.variables[name] = INT
+
+        self._annotate(program)
+        return dict(self.variables)
+
+    def _collect_definitions(self, node: Any, definitions: List[Tuple[str, List[Any], Optional[str]]]) -> None:
+        if not isinstance(node, ASTNode):
+            return
+        kind = node.kind
+
+        if kind == ASTNodeType.ASSIGNMENT:
+            target = getattr(node.children[0], 'value', None)
+            self.variables.setdefault(target, None)
+            definitions.append((target, [node.children[1]], None))
+        elif kind == ASTNodeType.READ:
+            for child in node.children:
+                name = getattr(child, 'value', None)
+                if name is not None:
+                    self.variables.setdefault(name, None)
+                    definitions.append((name, [], join(INT, self.input_hints.get(name))))
+        elif kind == ASTNodeType.FOR:
+            iterator = node.attrs.get('iterator')
+            if iterator:
+                self.variables.setdefault(iterator, None)
+                definitions.append((iterator, list(node.children[:3]), INT))
+
+        if kind not in _EXPRESSION_KINDS:
+            for child in node.children:
+                self._collect_definitions(child, definitions)
+
+    def _collect_input_hints(self, node: Any) -> None:
+        if not isinstance(node, ASTNode):
+            return
+        if node.kind == ASTNodeType.BIN_OP and node.attrs.get('operator') in _COMPARISON_OPS:
+            left, right = node.children[0], node.children[1]
+            for variable, literal in ((left, right), (right, left)):
+                hint = _INPUT_HINT_TYPES.get(_literal_kind(literal))
+                if hint is not None and _literal_kind(variable) == 'var':
+                    name = variable.attrs.get('value')
+                    self.input_hints[name] = join(self.input_hints.get(name), hint)
+        for child in node.children:
+            self._collect_input_hints(child)
+
+    def _collect_reads(self, node: Any, names: Set[str]) -> None:
+        if not isinstance(node, ASTNode):
+            return
+        if node.kind == ASTNodeType.LITERAL:
+            if node.attrs.get('inferred_type') == 'var':
+                names.add(node.attrs.get('value'))
+            return
+        for child in node.children:
+            self._collect_reads(child, names)
+
+    def _annotate(self, node: Any) -> None:
+        if not isinstance(node, ASTNode):
+            return
+        if node.kind in _EXPRESSION_KINDS:
+            self._type_of(node, annotate=True)
+            return
+        for child in node.children:
+            self._annotate(child)
+
+    def _type_of(self, node: Any, annotate: bool) -> Optional[str]:
+        if not isinstance(node, ASTNode):
+            return None
+        kind = node.kind
+
+        if kind == ASTNodeType.LITERAL:
+            literal_type = node.attrs.get('inferred_type')
+            if literal_type == 'var':
+                result = self.variables.get(node.attrs.get('value'))
+            elif literal_type == 'int':
+                result = LONG_LONG if abs(int(node.attrs.get('value'))) > _INT_MAX else INT
+            elif literal_type == 'real':
+                result = DOUBLE
+            elif literal_type == 'bool':
+                result = BOOL
+            elif literal_type == 'string':
+                result = STRING
+            else:
+                result = None
+
+        elif kind == ASTNodeType.BIN_OP:
+            left = self._type_of(node.children[0], annotate)
+            right = self._type_of(node.children[1], annotate)
+            op = node.attrs.get('operator')
+            op = op.upper() if isinstance(op, str) else op
+            if op in _RELATIONAL_OPS:
+                result = BOOL
+            elif op == '/':
+                result = DOUBLE
+            elif STRING in (left, right):
+                result = STRING
+            else:
+                result = _at_least_int(join(left, right))
+
+        elif kind == ASTNodeType.UNARY_OP:
+            operand = self._type_of(node.children[0], annotate)
+            op = node.attrs.get('operator')
+            if op == 'NOT':
+                result = BOOL
+            elif op == 'SQRT':
+                result = DOUBLE
+            elif op == 'FLOOR':
+                # [x] is x for integers; real values go through a (long long) cast
+                result = _at_least_int(operand) if operand in (None, BOOL, INT, LONG_LONG) else LONG_LONG
+            else:
+                result = _at_least_int(operand)
+
+        else:
+            result = None
+
+        if annotate:
+            # Unknown values (e.g. variables never assigned) default to int
+            node.static_type = result if result is not None else INT
+        return result
+
+
+def _literal_kind(node: Any) -> Optional[str]:
+    if isinstance(node, ASTNode) and node.kind == ASTNodeType.LITERAL:
+        return node.attrs.get('inferred_type')
+    return None
+
+
+def infer_types(program: ASTNode) -> Dict[str, str]:
+    """Annotate `program` with static types and return the variable types."""
+    return TypeInference().run(program)
+
+
+if __name__ == "__main__":
+    from .lexer import lex
+    from .parser import Parser
+
+    sample = """
+    citeste n
+    s <- 0
+    pentru i <- 1, n executa
+        s <- s + i / 2
+    sfarsit_pentru
+    t <- s
+    ok <- s > 10
+    mare <- 10000000000
+    scrie [s], t, ok, mare
+    """
+    ast = Parser(list(lex(sample))).parse_program()
+    print(infer_types(ast))
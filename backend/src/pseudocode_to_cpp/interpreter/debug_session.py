@@ -0,0 +1,211 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import (
+    ExecutionStep, StepByStepInterpreter, TraceGranularity)
+
+
+class SessionClosed(Exception):
+    """Raised inside the interpreter thread to unwind a session that was closed or evicted"""
+
+
+class SessionBusy(Exception):
+    """Raised when a command arrives while another one is still running on the same session"""
+
+
+class DebugSession:
+    """A suspended step-by-step execution, advanced on request.
+
+    The interpreter runs in its own thread and blocks in the step callback
+    whenever the current command is satisfied, so only the steps that are
+    actually asked for get computed. Steps are not accumulated: each command
+    returns what it produced and the interpreter keeps no trace.
+    """
+
+    # Pași executați cel mult pentru o singură comandă (ex. continue într-o buclă infinită)
+    MAX_STEPS_PER_COMMAND = 200_000
+
+    def __init__(self, ast: Any, inputs: Optional[List[str]] = None,
+                 granularity: TraceGranularity = TraceGranularity.STATEMENT) -> None:
+        self.interpreter = StepByStepInterpreter(enable_debug=True, granularity=granularity,
+                                                 inputs=inputs, keep_trace=False)
+        self.interpreter.set_step_callback(self._on_step)
+        self.breakpoints: Set[int] = set()
+        self.last_access = time.monotonic()
+
+        self._ast = ast
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._finished = False
+        self._error: Optional[str] = None
+
+        # The command being executed
+        self._running = False
+        self._steps: List[ExecutionStep] = []
+        self._keep_all = False  # step(n) returns every step; continue only the one it stops at
+        self._remaining = 0
+        self._target_lines: Set[int] = set()
+        self._executed = 0
+        self._last_line = 0
+
+    # --- Commands (called from request threads) ---
+
+    def step(self, count: int = 1) -> Dict[str, Any]:
+        """Run `count` more steps and return all of them"""
+        return self._command(keep_all=True, remaining=count, target_lines=set())
+
+    def continue_(self) -> Dict[str, Any]:
+        """Run until a breakpoint line is reached or the program ends"""
+        return self._command(keep_all=False, remaining=0, target_lines=set(self.breakpoints))
+
+    def run_to_line(self, line: int) -> Dict[str, Any]:
+        """Run until `line` (or a breakpoint before it) is reached"""
+        return self._command(keep_all=False, remaining=0, target_lines=self.breakpoints | {line})
+
+    def set_breakpoints(self, lines: List[int]) -> None:
+        with self._cond:
+            self.breakpoints = set(lines)
+            self.last_access = time.monotonic()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def state(self) -> str:
+        if self._error is not None:
+            return "error"
+        if self._finished:
+            return "finished"
+        return "paused"
+
+    def _command(self, keep_all: bool, remaining: int, target_lines: Set[int]) -> Dict[str, Any]:
+        with self._cond:
+            self.last_access = time.monotonic()
+            if self._closed:
+                raise SessionClosed()
+            if self._running:
+                raise SessionBusy()
+            self._steps = []
+            self._executed = 0
+            if not self._finished:
+                self._keep_all = keep_all
+                self._remaining = remaining
+                self._target_lines = target_lines
+                self._running = True
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                self._cond.notify_all()
+                while self._running and not self._closed:
+                    self._cond.wait()
+            result = {
+                "state": self.state,
+                "steps": [StepByStepInterpreter.step_to_dict(step) for step in self._steps],
+                "executed_steps": self._executed,
+                "output": self.interpreter.get_final_output(),
+            }
+            if self._error is not None:
+                result["error"] = self._error
+            self._steps = []
+            return result
+
+    # --- Interpreter thread ---
+
+    def _run(self) -> None:
+        try:
+            self.interpreter.visit(self._ast)
+        except SessionClosed:
+            return
+        except Exception as e:
+            with self._cond:
+                self._error = str(e)
+        with self._cond:
+            self._finished = True
+            self._running = False
+            self._cond.notify_all()
+
+    def _on_step(self, step: ExecutionStep) -> None:
+        with self._cond:
+            if self._closed:
+                raise SessionClosed()
+            self._executed += 1
+            if self._keep_all:
+                self._steps.append(step)
+            else:
+                self._steps = [step]
+
+            if self._keep_all:
+                self._remaining -= 1
+                pause = self._remaining <= 0
+            else:
+                # Stop when execution enters a target line, not on every step of that line
+                pause = step.line in self._target_lines and step.line != self._last_line
+            self._last_line = step.line
+            if not pause and self._executed < self.MAX_STEPS_PER_COMMAND:
+                return
+
+            self._running = False
+            self.interpreter.paused = True
+            self._cond.notify_all()
+            while not self._running and not self._closed:
+                self._cond.wait()
+            self.interpreter.paused = False
+            if self._closed:
+                raise SessionClosed()
+
+
+class DebugSessionManager:
+    """Holds the open debug sessions; idle or surplus sessions are closed and dropped"""
+
+    def __init__(self, max_sessions: int = 32, idle_timeout_seconds: float = 10 * 60) -> None:
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._sessions: "OrderedDict[str, DebugSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, ast: Any, inputs: Optional[List[str]] = None,
+               granularity: TraceGranularity = TraceGranularity.STATEMENT) -> str:
+        session_id = uuid.uuid4().hex
+        session = DebugSession(ast, inputs, granularity)
+        with self._lock:
+            self._evict_idle()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                oldest.close()
+        return session_id
+
+    def get(self, session_id: str) -> Optional[DebugSession]:
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= deadline:
+                break
+            del self._sessions[session_id]
+            session.close()
+
+
+debug_sessions = DebugSessionManager()
@@ -0,0 +1,80 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import (
+    ExecutionStep, LoopCheckpoint, StepCheckpoint, TraceGranularity)
+from backend.src.pseudocode_to_cpp.interpreter.trace_index import TraceIndex
+
+
+@dataclass
+class StoredExecution:
+    """What is kept of a step-by-step run to page through or query its trace,
+    expand its collapsed loop iterations or rebuild any of its steps later"""
+    ast: Any
+    inputs: Optional[List[str]]
+    granularity: TraceGranularity
+    loop_detail: Optional[int]
+    checkpoints: List[LoopCheckpoint]
+    final_output: str
+    step_checkpoints: List[StepCheckpoint] = field(default_factory=list)
+    total_steps: int = 0
+    trace: Optional[Sequence[ExecutionStep]] = None  # a list, or a SpilledTrace for long runs
+    trace_bytes: int = 0  # what `trace` takes, in memory or on disk
+    index: Optional[TraceIndex] = None
+    # Compressed trace page responses: (first step, count, format) -> {encoding: bytes}
+    encoded_pages: "OrderedDict[Tuple[Any, ...], Dict[str, bytes]]" = field(default_factory=OrderedDict)
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class ExecutionStore:
+    """In-memory LRU of recent executions, with idle expiry.
+
+    Besides the entry count, the traces kept (in memory or spilled to disk)
+    share a byte budget: least recently used entries are dropped until they
+    fit, though the newest entry is always kept. Dropped entries release
+    their trace files when they are collected.
+    """
+
+    def __init__(self, max_entries: int = 128, idle_ttl_seconds: float = 30 * 60,
+                 max_trace_bytes: int = 1024 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_trace_bytes = max_trace_bytes
+        self._entries: "OrderedDict[str, StoredExecution]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, execution: StoredExecution) -> str:
+        execution_id = uuid.uuid4().hex
+        with self._lock:
+            self._evict_expired()
+            self._entries[execution_id] = execution
+            trace_bytes = sum(entry.trace_bytes for entry in self._entries.values())
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or trace_bytes > self.max_trace_bytes):
+                trace_bytes -= self._entries.popitem(last=False)[1].trace_bytes
+        return execution_id
+
+    def get(self, execution_id: str) -> Optional[StoredExecution]:
+        with self._lock:
+            self._evict_expired()
+            execution = self._entries.get(execution_id)
+            if execution is not None:
+                execution.last_access = time.monotonic()
+                self._entries.move_to_end(execution_id)
+            return execution
+
+    def _evict_expired(self) -> None:
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        # Entries are kept in access order, so the stale ones are at the front
+        while self._entries:
+            execution_id, execution = next(iter(self._entries.items()))
+            if execution.last_access >= deadline:
+                break
+            del self._entries[execution_id]
+
+
+execution_store = ExecutionStore()
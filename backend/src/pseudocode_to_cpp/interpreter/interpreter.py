@@ -1,9 +1,22 @@
 import math
 import json
-from typing import Any, Dict, Optional
+import operator
+from io import StringIO
+from typing import Any, Dict, List, Optional
 
 from backend.src.pseudocode_to_cpp.compiler.parser import Parser
 from backend.src.pseudocode_to_cpp.compiler.lexer import lex
+from backend.src.pseudocode_to_cpp.interpreter.profiler import Profiler
+
+
+# Operatorii binari (în afară de si/sau), căutați într-un tabel în loc de un șir de comparații
+_BINARY_OPS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
+    '%': operator.mod, '^': operator.pow,
+    '=': operator.eq, '!=': operator.ne, '≠': operator.ne,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '≤': operator.le,
+    '>=': operator.ge, '≥': operator.ge,
+}
 
 
 def _attribute(node: Any, key: str, default: Any = None) -> Any:
@@ -33,9 +46,26 @@ def _node_type_name(node: Any) -> str:
 
 
 class Interpreter:
-    def __init__(self) -> None:
+    def __init__(self, inputs: Optional[List[str]] = None, profile: bool = False,
+                 max_statements: Optional[int] = None, echo: bool = True) -> None:
+        """
+        Args:
+            inputs: Values read by `citeste`, in order (None reads them from stdin)
+            profile: Count executions and time per line and per loop in `profiler`
+            max_statements: With `profile`, executing more statements raises ProfileTooLong
+            echo: Also print what `scrie` writes to stdout, not only to the output buffer
+        """
         # Memoria globală pentru variabile (Symbol Table simplu)
         self.globals: Dict[str, Any] = {}
+        self.inputs = inputs
+        self.input_cursor = 0
+        self.output_buffer = StringIO()
+        self.echo = echo
+
+        self.profiler: Optional[Profiler] = None
+        if profile:
+            self.profiler = Profiler(max_statements)
+            self.profiler.attach(self)
 
     # --- Helpers ---
 
@@ -67,7 +97,7 @@ class Interpreter:
             var_name = val
             if var_name in self.globals:
                 return self.globals[var_name]
-            line = _attribute(node, 'line', '?')
+            line = _attribute(node, 'line') or getattr(node, 'line', 0) or '?'
             raise NameError(f"Variabilă nedefinită '{var_name}' la linia {line}")
         # strings or other types
         return val
@@ -82,38 +112,16 @@ class Interpreter:
         if op is None:
             raise ValueError('Operator lipsă pentru BIN_OP')
 
+        binary_op = _BINARY_OPS.get(op)
+        if binary_op is not None:
+            return binary_op(left, right)
+
         op_up = str(op).upper()
         if op_up == 'OR':
             return left or right
         if op_up == 'AND':
             return left and right
 
-        if op == '+':
-            return left + right
-        if op == '-':
-            return left - right
-        if op == '*':
-            return left * right
-        if op == '/':
-            return left / right
-        if op == '%':
-            return left % right
-        # relational
-        if op == '=':
-            return left == right
-        if op in ('!=', '≠'):
-            return left != right
-        if op == '<':
-            return left < right
-        if op == '>':
-            return left > right
-        if op in ('<=', '≤'):
-            return left <= right
-        if op in ('>=', '≥'):
-            return left >= right
-        if op == '^':
-            return left ** right
-
         raise Exception(f"Operator necunoscut: {op}")
 
     def visit_UNARY_OP(self, node: Any) -> Any:
@@ -204,7 +212,7 @@ class Interpreter:
     def visit_READ(self, node: Any) -> None:
         for var_node in getattr(node, 'children', []):
             var_name = getattr(var_node, 'value', None) or _attribute(var_node, 'value')
-            raw_val = input(f"Introduceți valoare pentru {var_name}: ")
+            raw_val = self._next_input(var_name)
             try:
                 if '.' in raw_val:
                     val = float(raw_val)
@@ -221,7 +229,23 @@ class Interpreter:
             if isinstance(val, str):
                 val = val.replace('\\n', '\n')
             output_parts.append(str(val))
-        print("".join(output_parts))
+        output = "".join(output_parts)
+        if self.echo:
+            print(output)
+        self.output_buffer.write(output + '\n')
+
+    def _next_input(self, var_name: str) -> str:
+        if self.inputs is None:
+            return input(f"Introduceți valoare pentru {var_name}: ")
+        if self.input_cursor >= len(self.inputs):
+            raise EOFError(f"Nu mai există date de intrare pentru '{var_name}'")
+        raw_val = self.inputs[self.input_cursor]
+        self.input_cursor += 1
+        return raw_val
+
+    def get_final_output(self) -> str:
+        """Get the complete final output"""
+        return self.output_buffer.getvalue()
 
     def generic_visit(self, node: Any) -> None:
         name = _node_type_name(node)
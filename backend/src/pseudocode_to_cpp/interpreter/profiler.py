@@ -0,0 +1,153 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.src.pseudocode_to_cpp.compiler.ast_node import ASTNodeType
+
+# Instrucțiunile cronometrate; pentru bucle, indexul copilului care e corpul buclei
+_STATEMENTS: Dict[ASTNodeType, Optional[int]] = {
+    ASTNodeType.ASSIGNMENT: None,
+    ASTNodeType.READ: None,
+    ASTNodeType.WRITE: None,
+    ASTNodeType.IF: None,
+    ASTNodeType.WHILE: 1,
+    ASTNodeType.FOR: 3,
+    ASTNodeType.REPEAT_UNTIL: 0,
+    ASTNodeType.DO_WHILE: 0,
+}
+
+
+@dataclass
+class LineStats:
+    count: int = 0
+    total_ns: int = 0  # including the statements nested in this one
+    self_ns: int = 0   # excluding them
+
+
+@dataclass
+class LoopStats:
+    kind: str
+    entries: int = 0
+    iterations: int = 0
+
+
+class ProfileTooLong(ValueError):
+    """Raised once a profiled run executes more statements than its limit"""
+
+
+class Profiler:
+    """Counts executions and time per source line and per loop of an Interpreter run.
+
+    attach() swaps the interpreter's statement visitors for timed wrappers on
+    that instance only, so an interpreter without a profiler runs the plain
+    visitors and pays nothing for this.
+
+    With `max_statements`, executing more statements and loop iterations than
+    that raises ProfileTooLong, so a program that never ends cannot hold a worker.
+    """
+
+    def __init__(self, max_statements: Optional[int] = None) -> None:
+        self.lines: Dict[int, LineStats] = {}
+        self.loops: Dict[int, LoopStats] = {}
+        self.total_ns = 0
+        self.max_statements = max_statements
+        self.executed = 0  # instrucțiuni și iterații de buclă executate
+        # Timpul instrucțiunilor imbricate, acumulat pentru fiecare instrucțiune în curs
+        self._nested_ns: List[int] = []
+        self._loop_bodies: Dict[int, LoopStats] = {}  # id(corp) -> bucla lui
+
+    def attach(self, interpreter: Any) -> None:
+        for kind, body_index in _STATEMENTS.items():
+            name = f'visit_{kind.name}'
+            setattr(interpreter, name, self._timed(getattr(interpreter, name), kind, body_index))
+        interpreter.visit_BLOCK = self._counted_block(interpreter.visit_BLOCK)
+        interpreter.visit_PROGRAM = self._timed_program(interpreter.visit_PROGRAM)
+
+    def _timed(self, visitor: Callable[[Any], Any], kind: ASTNodeType,
+               body_index: Optional[int]) -> Callable[[Any], Any]:
+        clock = time.perf_counter_ns
+        lines = self.lines
+        nested = self._nested_ns
+
+        def timed(node: Any) -> Any:
+            self._count()
+            line = node.attrs.get('line') or node.line
+            if body_index is not None:
+                self._enter_loop(node, line, kind, body_index)
+            nested.append(0)
+            start = clock()
+            try:
+                return visitor(node)
+            finally:
+                elapsed = clock() - start
+                inner = nested.pop()
+                if nested:
+                    nested[-1] += elapsed
+                stats = lines.get(line)
+                if stats is None:
+                    stats = lines[line] = LineStats()
+                stats.count += 1
+                stats.total_ns += elapsed
+                stats.self_ns += elapsed - inner
+
+        return timed
+
+    def _count(self) -> None:
+        self.executed += 1
+        if self.max_statements is not None and self.executed > self.max_statements:
+            raise ProfileTooLong(f"Execuția depășește {self.max_statements} instrucțiuni")
+
+    def _enter_loop(self, node: Any, line: int, kind: ASTNodeType, body_index: int) -> None:
+        stats = self.loops.get(line)
+        if stats is None:
+            stats = self.loops[line] = LoopStats(kind=kind.name)
+        stats.entries += 1
+        self._loop_bodies[id(node.children[body_index])] = stats
+
+    def _counted_block(self, visitor: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        loop_bodies = self._loop_bodies
+
+        def counted(node: Any) -> Any:
+            stats = loop_bodies.get(id(node))
+            if stats is not None:
+                # Un corp de buclă gol nu trece prin nicio instrucțiune, deci iterațiile contează și ele
+                self._count()
+                stats.iterations += 1
+            return visitor(node)
+
+        return counted
+
+    def _timed_program(self, visitor: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def timed(node: Any) -> Any:
+            start = time.perf_counter_ns()
+            try:
+                return visitor(node)
+            finally:
+                self.total_ns += time.perf_counter_ns() - start
+
+        return timed
+
+    def report(self) -> Dict[str, Any]:
+        """Heatmap-ready summary keyed by line number; `heat` is self time relative to the hottest line"""
+        hottest = max((stats.self_ns for stats in self.lines.values()), default=0) or 1
+        return {
+            'total_time_ms': self.total_ns / 1e6,
+            'lines': {
+                line: {
+                    'count': stats.count,
+                    'self_time_ms': stats.self_ns / 1e6,
+                    'total_time_ms': stats.total_ns / 1e6,
+                    'heat': stats.self_ns / hottest,
+                }
+                for line, stats in sorted(self.lines.items())
+            },
+            'loops': {
+                line: {
+                    'kind': stats.kind,
+                    'entries': stats.entries,
+                    'iterations': stats.iterations,
+                    'time_ms': self.lines[line].total_ns / 1e6 if line in self.lines else 0.0,
+                }
+                for line, stats in sorted(self.loops.items())
+            },
+        }
@@ -1,9 +1,37 @@
 import math
 import json
-from typing import Any, Dict, Optional, List, Callable
+import operator
+from collections import deque
+from typing import Any, Dict, Optional, List, Callable, Sequence, Tuple
 from dataclasses import dataclass, field
+from enum import Enum
 from io import StringIO
 
+from backend.src.pseudocode_to_cpp.compiler.ast_node import ASTNodeType
+from backend.src.pseudocode_to_cpp.interpreter.trace_index import TraceIndex
+from backend.src.pseudocode_to_cpp.interpreter.trace_log import SpilledTrace, TraceTooLong
+
+
+# Operatorii binari (în afară de si/sau), căutați într-un tabel în loc de un șir de comparații
+_BINARY_OPS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
+    '%': operator.mod, '^': operator.pow,
+    '=': operator.eq, '!=': operator.ne, '≠': operator.ne,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '≤': operator.le,
+    '>=': operator.ge, '≥': operator.ge,
+}
+
+# Estimarea memoriei ocupate de un pas înregistrat, pentru pragul de mutare pe disc
+_STEP_BASE_BYTES = 1024
+_VARIABLE_BYTES = 100
+
+
+class TraceGranularity(str, Enum):
+    """How much of the execution ends up in the trace"""
+    STATEMENT = "statement"    # atribuiri, citiri, scrieri, intrări/ieșiri și iterații de bucle
+    CONDITION = "condition"    # + evaluarea condițiilor (daca, cat timp, pana cand)
+    EXPRESSION = "expression"  # + fiecare literal, variabilă, operație și bloc (urmărirea completă)
+
 
 @dataclass
 class ExecutionStep:
@@ -16,6 +44,41 @@ class ExecutionStep:
     current_value: Any = None
     node_details: Dict[str, Any] = field(default_factory=dict)
     output_so_far: str = ""  # NEW: Output accumulated up to this point
+    span: Optional[Tuple[int, int, int, int]] = None  # (line, col, end_line, end_col) of the node
+    summary: Optional[Dict[str, Any]] = None  # set on the step that stands for collapsed loop iterations
+
+
+@dataclass
+class LoopCheckpoint:
+    """Interpreter state at the start of one loop iteration, enough to re-execute from there"""
+    node: Any
+    iteration: int
+    variables: Dict[str, Any]
+    output_offset: int
+    history_length: int
+    input_cursor: int
+    loop_state: Dict[str, Any] = field(default_factory=dict)  # FOR: limita și pasul, evaluate o singură dată
+    last_iteration: int = 0  # ultima iterație comprimată care începe de la acest checkpoint
+
+
+@dataclass
+class StepCheckpoint:
+    """Interpreter state right before step `step + 1`, taken at a statement boundary.
+
+    `path` locates that statement: one entry per enclosing construct, from the
+    program down, e.g. (PROGRAM, index), (FOR, iteration, loop_state),
+    (BLOCK, index), (IF, branch). Re-execution resumes along it.
+    """
+    step: int
+    variables: Dict[str, Any]
+    output_offset: int
+    history_length: int
+    input_cursor: int
+    path: List[Tuple[Any, ...]]
+
+
+class _ReplayDone(Exception):
+    """Stops a re-execution once the requested steps have been rebuilt"""
 
 
 def _attribute(node: Any, key: str, default: Any = None) -> Any:
@@ -42,33 +105,100 @@ def _node_type_name(node: Any) -> str:
 
 
 class StepByStepInterpreter:
-    def __init__(self, enable_debug: bool = True) -> None:
+    def __init__(self, enable_debug: bool = True,
+                 granularity: TraceGranularity = TraceGranularity.EXPRESSION,
+                 inputs: Optional[List[str]] = None,
+                 loop_detail: Optional[int] = None,
+                 keep_trace: bool = True,
+                 checkpoint_interval: Optional[int] = None,
+                 spill_threshold_bytes: Optional[int] = None,
+                 build_index: bool = False,
+                 max_steps: Optional[int] = None,
+                 max_trace_bytes: Optional[int] = None) -> None:
         """
         Args:
             enable_debug: If True, collect execution steps for debugging
+            granularity: Which steps are recorded; below EXPRESSION, expressions and
+                blocks are evaluated without building any step at all
+            inputs: Values consumed in order by `citeste`; None reads from stdin
+            loop_detail: If set, only the first and last `loop_detail` iterations of
+                each loop are traced in full; the ones in between are collapsed into
+                a summary step that can be expanded later from its checkpoint
+            keep_trace: If False, steps are only handed to the step callback and
+                not accumulated in `execution_trace` (debug sessions)
+            checkpoint_interval: If set, a StepCheckpoint is taken at the first
+                statement boundary after every `checkpoint_interval` steps, so any
+                step can later be rebuilt by replay_from() (not with loop_detail)
+            spill_threshold_bytes: If set, once the recorded steps take roughly this
+                much memory `execution_trace` becomes a SpilledTrace on disk
+            build_index: Fill `trace_index` (steps per line, variable changes,
+                output growth) while recording, for queries on the trace
+            max_steps: If set, recording more steps raises TraceTooLong; statements and
+                iterations run without recording (collapsed loop iterations) count too
+            max_trace_bytes: If set, a trace taking more than this (estimated in
+                memory, actual on disk once spilled) raises TraceTooLong
         """
+        if checkpoint_interval and loop_detail:
+            raise ValueError("checkpoint_interval and loop_detail cannot be combined")
         self.globals: Dict[str, Any] = {}
         self.enable_debug = enable_debug
-        self.execution_trace: List[ExecutionStep] = []
+        self.granularity = TraceGranularity(granularity)
+        self.inputs = list(inputs) if inputs is not None else None
+        self.input_cursor = 0
+        self.loop_detail = loop_detail
+        self.keep_trace = keep_trace
+        self.checkpoints: List[LoopCheckpoint] = []
+        self.checkpoint_interval = checkpoint_interval
+        self.step_checkpoints: List[StepCheckpoint] = []
+        # Poziția curentă în program (doar când se iau checkpoint-uri) și calea de reluare
+        self._frames: Optional[List[list]] = [] if checkpoint_interval else None
+        self._last_checkpoint_step = 0
+        self._resume: Optional[deque] = None
+        self._stop_after: Optional[int] = None
+        self._replaying = 0  # > 0 while re-executing iterations whose output was already printed
+
+        self._recording_dispatch = self._build_dispatch(quiet=not enable_debug or
+                                                        self.granularity != TraceGranularity.EXPRESSION)
+        self._silent_dispatch = self._build_dispatch(quiet=True)
+        self._set_recording(enable_debug)
+        self.execution_trace: Sequence[ExecutionStep] = []
+        self._spill_threshold = spill_threshold_bytes
+        self.max_steps = max_steps
+        self.max_trace_bytes = max_trace_bytes
+        self._trace_bytes = 0  # estimarea memoriei pașilor păstrați în execution_trace
+        self.trace_index: Optional[TraceIndex] = TraceIndex() if build_index else None
         self.step_counter = 0
+        self._silent_steps = 0  # instrucțiuni și iterații executate fără înregistrare
         self.paused = False
         self.step_callback: Optional[Callable[[ExecutionStep], None]] = None
 
         # NEW: Output capture
         self.output_buffer = StringIO()
         self.output_history: List[str] = []  # List of all outputs in order
+        # Ieșirea de până acum, refolosită de pașii dintre două scrieri (None după o schimbare)
+        self._output_snapshot: Optional[str] = None
 
     def set_step_callback(self, callback: Callable[[ExecutionStep], None]) -> None:
         """Set a callback function that gets called after each step"""
         self.step_callback = callback
 
-    def _record_step(self, node: Any, description: str, value: Any = None) -> None:
+    def _set_recording(self, recording: bool) -> None:
+        """Turn step recording on or off, switching to the matching visitor table"""
+        self._recording = recording
+        self._trace_conditions = recording and self.granularity != TraceGranularity.STATEMENT
+        self._dispatch = self._recording_dispatch if recording else self._silent_dispatch
+
+    def _record_step(self, node: Any, description: str, value: Any = None,
+                     summary: Optional[Dict[str, Any]] = None) -> None:
         """Record an execution step for debugging"""
-        if not self.enable_debug:
+        if not self._recording:
             return
 
         self.step_counter += 1
-        line = _attribute(node, 'line', 0)
+        if self.max_steps is not None and self.step_counter > self.max_steps:
+            raise TraceTooLong(f"Execuția depășește {self.max_steps} pași")
+        # Expression nodes only carry their position in the span slots
+        line = _attribute(node, 'line') or getattr(node, 'line', 0)
         node_type = _node_type_name(node)
 
         # Create a snapshot of current variables
@@ -81,8 +211,11 @@ class StepByStepInterpreter:
         elif hasattr(node, 'metadata'):
             node_details = node.metadata.copy() if isinstance(node.metadata, dict) else {}
 
-        # Capture current output state
-        current_output = self.output_buffer.getvalue()
+        # Capture current output state; steps between two writes share the same string
+        current_output = self._output_snapshot
+        new_output = current_output is None
+        if new_output:
+            current_output = self._output_snapshot = self.output_buffer.getvalue()
 
         step = ExecutionStep(
             step_number=self.step_counter,
@@ -92,19 +225,64 @@ class StepByStepInterpreter:
             variables_snapshot=variables_snapshot,
             current_value=value,
             node_details=node_details,
-            output_so_far=current_output
+            output_so_far=current_output,
+            span=node.span() if hasattr(node, 'span') else None,
+            summary=summary
         )
 
-        self.execution_trace.append(step)
+        if self.trace_index is not None:
+            self.trace_index.add(self.step_counter, line, variables_snapshot, len(current_output))
+
+        if self.keep_trace:
+            self.execution_trace.append(step)
+            if not self.trace_spilled:
+                self._trace_bytes += (_STEP_BASE_BYTES + _VARIABLE_BYTES * len(variables_snapshot)
+                                      + (len(current_output) if new_output else 0))
+                if self._spill_threshold is not None and self._trace_bytes > self._spill_threshold:
+                    self._spill_trace()
+                elif self.max_trace_bytes is not None and self._trace_bytes > self.max_trace_bytes:
+                    raise TraceTooLong(f"Urmărirea depășește {self.max_trace_bytes // (1024 * 1024)} MB")
 
         # Call callback if set (for real-time debugging)
         if self.step_callback:
             self.step_callback(step)
 
-    def get_execution_trace(self) -> List[ExecutionStep]:
+        if self._stop_after is not None and self.step_counter >= self._stop_after:
+            raise _ReplayDone()
+
+    def _count_silent_step(self) -> None:
+        """Charge a statement or iteration run without recording to the max_steps budget"""
+        self._silent_steps += 1
+        if self.step_counter + self._silent_steps > self.max_steps:
+            raise TraceTooLong(f"Execuția depășește {self.max_steps} pași")
+
+    def _spill_trace(self) -> None:
+        """Move the trace recorded so far to disk; later steps are appended there directly"""
+        self._spill_threshold = None
+        self.execution_trace = SpilledTrace(self.step_to_dict, self.step_from_dict, self.execution_trace,
+                                            max_bytes=self.max_trace_bytes)
+
+    @property
+    def trace_spilled(self) -> bool:
+        return isinstance(self.execution_trace, SpilledTrace)
+
+    @property
+    def trace_size_bytes(self) -> int:
+        """Bytes taken by the trace: on disk once spilled, estimated while in memory"""
+        if self.trace_spilled:
+            return self.execution_trace.size_bytes
+        return self._trace_bytes
+
+    def get_execution_trace(self) -> Sequence[ExecutionStep]:
         """Get the full execution trace"""
         return self.execution_trace
 
+    def trace_page(self, start: int, count: int) -> List[Dict[str, Any]]:
+        """The exported form of steps start..start + count - 1 of the trace (0-based positions)"""
+        if self.trace_spilled:
+            return self.execution_trace.records(start, count)
+        return [self.step_to_dict(step) for step in self.execution_trace[max(start, 0):start + count]]
+
     def get_output_history(self) -> List[str]:
         """Get all output messages in order"""
         return self.output_history.copy()
@@ -132,25 +310,68 @@ class StepByStepInterpreter:
 
     def export_trace_json(self) -> str:
         """Export execution trace as JSON"""
-        trace_data = []
-        for step in self.execution_trace:
-            trace_data.append({
-                'step': step.step_number,
-                'line': step.line,
-                'type': step.node_type,
-                'description': step.description,
-                'value': str(step.current_value) if step.current_value is not None else None,
-                'variables': step.variables_snapshot,
-                'output': step.output_so_far
-            })
+        trace_data = [self.step_to_dict(step) for step in self.execution_trace]
         return json.dumps(trace_data, indent=2, ensure_ascii=False)
 
+    @staticmethod
+    def step_to_dict(step: ExecutionStep) -> Dict[str, Any]:
+        """The JSON-ready form of one step, as exported in the trace"""
+        return {
+            'step': step.step_number,
+            'line': step.line,
+            'type': step.node_type,
+            'description': step.description,
+            'value': str(step.current_value) if step.current_value is not None else None,
+            'variables': step.variables_snapshot,
+            'output': step.output_so_far,
+            'span': list(step.span) if step.span else None,
+            **({'summary': step.summary} if step.summary is not None else {})
+        }
+
+    @staticmethod
+    def step_from_dict(data: Dict[str, Any]) -> ExecutionStep:
+        """Inverse of step_to_dict; node details are not exported, and values come back as text"""
+        return ExecutionStep(
+            step_number=data['step'],
+            node_type=data['type'],
+            line=data['line'],
+            description=data['description'],
+            variables_snapshot=data['variables'],
+            current_value=data['value'],
+            output_so_far=data['output'],
+            span=tuple(data['span']) if data['span'] else None,
+            summary=data.get('summary'),
+        )
+
     # --- Visitor dispatch ---
+    def _build_dispatch(self, quiet: bool) -> Dict[ASTNodeType, Callable[[Any], Any]]:
+        """Map each node kind to its visitor once, instead of looking it up by name per node.
+
+        With `quiet` (below EXPRESSION granularity, or while not recording),
+        expressions and blocks go to the quiet variants, which never reach
+        _record_step (nor format its description).
+        """
+        dispatch = {}
+        for kind in ASTNodeType:
+            visitor = getattr(self, f'visit_{kind.name}', None)
+            if visitor is not None:
+                dispatch[kind] = visitor
+        if quiet:
+            dispatch[ASTNodeType.LITERAL] = self._quiet_LITERAL
+            dispatch[ASTNodeType.BIN_OP] = self._quiet_BIN_OP
+            dispatch[ASTNodeType.UNARY_OP] = self._quiet_UNARY_OP
+            dispatch[ASTNodeType.BLOCK] = self._quiet_BLOCK
+        return dispatch
+
     def visit(self, node: Optional[Any]) -> Any:
         """Dispatcher principal: apelează metoda potrivită pentru tipul nodului."""
         if node is None:
             return None
 
+        visitor = self._dispatch.get(getattr(node, 'kind', None))
+        if visitor is not None:
+            return visitor(node)
+
         node_name = _node_type_name(node)
         method_name = f'visit_{node_name}'
         visitor = getattr(self, method_name, None)
@@ -159,30 +380,81 @@ class StepByStepInterpreter:
         return visitor(node)
 
     # --- Node handlers ---
-    def visit_LITERAL(self, node: Any) -> Any:
+    def _literal_value(self, node: Any) -> Any:
         val = getattr(node, 'value', _attribute(node, 'value'))
         inferred = _attribute(node, 'inferred_type')
 
         if inferred == 'real':
-            result = float(val)
-            self._record_step(node, f"Evaluare literal real: {val}", result)
-            return result
+            return float(val)
         if inferred == 'int':
-            result = int(val)
-            self._record_step(node, f"Evaluare literal întreg: {val}", result)
-            return result
+            return int(val)
         if inferred == 'var':
-            var_name = val
-            if var_name in self.globals:
-                result = self.globals[var_name]
-                self._record_step(node, f"Citire variabilă '{var_name}'", result)
-                return result
-            line = _attribute(node, 'line', '?')
-            raise NameError(f"Variabilă nedefinită '{var_name}' la linia {line}")
-
-        self._record_step(node, f"Evaluare literal: {val}", val)
+            if val in self.globals:
+                return self.globals[val]
+            line = _attribute(node, 'line') or getattr(node, 'line', 0) or '?'
+            raise NameError(f"Variabilă nedefinită '{val}' la linia {line}")
         return val
 
+    @staticmethod
+    def _binary_result(op: Any, left: Any, right: Any) -> Any:
+        binary_op = _BINARY_OPS.get(op)
+        if binary_op is not None:
+            return binary_op(left, right)
+
+        op_up = str(op).upper()
+        if op_up == 'OR':
+            return left or right
+        if op_up == 'AND':
+            return left and right
+        raise Exception(f"Operator necunoscut: {op}")
+
+    @staticmethod
+    def _unary_result(op: Any, val: Any) -> Any:
+        if op == 'SQRT':
+            return math.sqrt(val)
+        if op == 'FLOOR':
+            return math.floor(val)
+        if op == 'NOT':
+            return not val
+        if op == 'MINUS':
+            return -val
+        raise Exception(f"Operator unar necunoscut: {op}")
+
+    # Variantele fără înregistrare, folosite sub granularitatea EXPRESSION
+    def _quiet_LITERAL(self, node: Any) -> Any:
+        return self._literal_value(node)
+
+    def _quiet_BIN_OP(self, node: Any) -> Any:
+        op = _attribute(node, 'operator', getattr(node, 'op', None))
+        if op is None:
+            raise ValueError('Operator lipsă pentru BIN_OP')
+        return self._binary_result(op, self.visit(node.children[0]), self.visit(node.children[1]))
+
+    def _quiet_UNARY_OP(self, node: Any) -> Any:
+        op = _attribute(node, 'operator', getattr(node, 'op', None))
+        return self._unary_result(op, self.visit(node.children[0]))
+
+    def _quiet_BLOCK(self, node: Any) -> None:
+        position = self._resume_position(node)
+        self._run_statements(node, position[0] if position else 0)
+
+    def visit_LITERAL(self, node: Any) -> Any:
+        val = getattr(node, 'value', _attribute(node, 'value'))
+        inferred = _attribute(node, 'inferred_type')
+        result = self._literal_value(node)
+
+        if inferred == 'real':
+            description = f"Evaluare literal real: {val}"
+        elif inferred == 'int':
+            description = f"Evaluare literal întreg: {val}"
+        elif inferred == 'var':
+            description = f"Citire variabilă '{val}'"
+        else:
+            description = f"Evaluare literal: {val}"
+
+        self._record_step(node, description, result)
+        return result
+
     def visit_BIN_OP(self, node: Any) -> Any:
         if not getattr(node, 'children', None) or len(node.children) < 2:
             raise ValueError('BIN_OP fără doi copii')
@@ -194,39 +466,7 @@ class StepByStepInterpreter:
         left = self.visit(node.children[0])
         right = self.visit(node.children[1])
 
-        op_up = str(op).upper()
-        result = None
-
-        if op_up == 'OR':
-            result = left or right
-        elif op_up == 'AND':
-            result = left and right
-        elif op == '+':
-            result = left + right
-        elif op == '-':
-            result = left - right
-        elif op == '*':
-            result = left * right
-        elif op == '/':
-            result = left / right
-        elif op == '%':
-            result = left % right
-        elif op == '=':
-            result = left == right
-        elif op in ('!=', '≠'):
-            result = left != right
-        elif op == '<':
-            result = left < right
-        elif op == '>':
-            result = left > right
-        elif op in ('<=', '≤'):
-            result = left <= right
-        elif op in ('>=', '≥'):
-            result = left >= right
-        elif op == '^':
-            result = left ** right
-        else:
-            raise Exception(f"Operator necunoscut: {op}")
+        result = self._binary_result(op, left, right)
 
         self._record_step(node, f"Operație binară: {left} {op} {right}", result)
         return result
@@ -238,31 +478,23 @@ class StepByStepInterpreter:
         op = _attribute(node, 'operator', getattr(node, 'op', None))
         val = self.visit(node.children[0])
 
-        result = None
-        if op == 'SQRT':
-            result = math.sqrt(val)
-        elif op == 'FLOOR':
-            result = math.floor(val)
-        elif op == 'NOT':
-            result = not val
-        elif op == 'MINUS':
-            result = -val
-        else:
-            raise Exception(f"Operator unar necunoscut: {op}")
+        result = self._unary_result(op, val)
 
         self._record_step(node, f"Operație unară: {op}({val})", result)
         return result
 
     def visit_PROGRAM(self, node: Any) -> None:
-        self._record_step(node, "Începere program", None)
-        for stmt in getattr(node, 'children', []):
-            self.visit(stmt)
+        position = self._resume_position(node)
+        if position is None:
+            self._record_step(node, "Începere program", None)
+        self._run_statements(node, position[0] if position else 0)
         self._record_step(node, "Terminare program", None)
 
     def visit_BLOCK(self, node: Any) -> None:
-        self._record_step(node, "Intrare în bloc", None)
-        for stmt in getattr(node, 'children', []):
-            self.visit(stmt)
+        position = self._resume_position(node)
+        if position is None:
+            self._record_step(node, "Intrare în bloc", None)
+        self._run_statements(node, position[0] if position else 0)
         self._record_step(node, "Ieșire din bloc", None)
 
     def visit_ASSIGNMENT(self, node: Any) -> None:
@@ -280,102 +512,401 @@ class StepByStepInterpreter:
         self._record_step(node, f"Atribuire: {var_name} ← {val}", val)
 
     def visit_IF(self, node: Any) -> None:
+        position = self._resume_position(node)
+        branch = position[0] if position is not None else self._choose_branch(node)
+        if branch is None:
+            return
+        if self._frames is None:
+            self.visit(node.children[branch])
+            return
+        self._frames.append([node, branch])
+        self.visit(node.children[branch])
+        self._frames.pop()
+
+    def _choose_branch(self, node: Any) -> Optional[int]:
+        """Evaluate the IF condition; returns the index of the child to run, if any"""
         cond = self.visit(node.children[0])
-        self._record_step(node, f"Evaluare IF: condiție = {cond}", cond)
+        trace = self._trace_conditions
+        if trace:
+            self._record_step(node, f"Evaluare IF: condiție = {cond}", cond)
 
         if cond:
-            self._record_step(node, "Execuție ramură THEN", None)
-            self.visit(node.children[1])
-        else:
-            if len(node.children) > 2 and node.children[2]:
+            if trace:
+                self._record_step(node, "Execuție ramură THEN", None)
+            return 1
+        if len(node.children) > 2 and node.children[2]:
+            if trace:
                 self._record_step(node, "Execuție ramură ELSE", None)
-                self.visit(node.children[2])
-            else:
-                self._record_step(node, "Salt peste IF (condiție falsă)", None)
+            return 2
+        if trace:
+            self._record_step(node, "Salt peste IF (condiție falsă)", None)
+        return None
 
     def visit_WHILE(self, node: Any) -> None:
-        iteration = 0
-        self._record_step(node, "Intrare în bucla WHILE", None)
-
-        while True:
-            cond = self.visit(node.children[0])
-            iteration += 1
-            self._record_step(node, f"WHILE iterația {iteration}: condiție = {cond}", cond)
-
-            if not cond:
-                break
-
-            self.visit(node.children[1])
-
-        self._record_step(node, f"Ieșire din WHILE după {iteration - 1} iterații", None)
+        resume_at = self._resume_position(node)
+        if resume_at is None:
+            self._record_step(node, "Intrare în bucla WHILE", None)
+        iterations = self._run_loop(node, self._while_iteration, {}, resume_at)
+        self._record_step(node, f"Ieșire din WHILE după {iterations} iterații", None)
 
     def visit_FOR(self, node: Any) -> None:
         var_name = _attribute(node, 'iterator')
         if var_name is None:
             raise ValueError('FOR fără iterator în metadata')
 
+        resume_at = self._resume_position(node)
+        if resume_at is not None:
+            iterations = self._run_loop(node, self._for_iteration, resume_at[1], resume_at)
+            self._record_step(node, f"Ieșire din FOR după {iterations} iterații", None)
+            return
+
         start_val = self.visit(node.children[0])
         stop_val = self.visit(node.children[1])
         step_val = self.visit(node.children[2])
-        body = node.children[3]
 
         self.globals[var_name] = start_val
         self._record_step(node, f"Intrare în FOR: {var_name} de la {start_val} la {stop_val}, pas {step_val}", None)
 
-        iteration = 0
-        while True:
-            curr_val = self.globals[var_name]
-            iteration += 1
+        iterations = self._run_loop(node, self._for_iteration, {'stop': stop_val, 'step': step_val})
+        self._record_step(node, f"Ieșire din FOR după {iterations} iterații", None)
 
-            if step_val > 0 and curr_val > stop_val:
-                break
-            if step_val < 0 and curr_val < stop_val:
-                break
+    def visit_REPEAT_UNTIL(self, node: Any) -> None:
+        resume_at = self._resume_position(node)
+        if resume_at is None:
+            self._record_step(node, "Intrare în REPEAT-UNTIL", None)
+        iterations = self._run_loop(node, self._repeat_iteration, {}, resume_at)
+        self._record_step(node, f"Ieșire din REPEAT după {iterations} iterații", None)
 
-            self._record_step(node, f"FOR iterația {iteration}: {var_name} = {curr_val}", curr_val)
-            self.visit(body)
-            self.globals[var_name] += step_val
+    def visit_DO_WHILE(self, node: Any) -> None:
+        resume_at = self._resume_position(node)
+        if resume_at is None:
+            self._record_step(node, "Intrare în DO-WHILE", None)
+        iterations = self._run_loop(node, self._do_while_iteration, {}, resume_at)
+        self._record_step(node, f"Ieșire din DO-WHILE după {iterations} iterații", None)
+
+    # --- Loop iterations ---
+    # Each runs iteration `iteration` of its loop and returns False once the loop is over.
+    # WHILE and FOR test first (False: the iteration did not run); REPEAT and
+    # DO-WHILE test last (False: the iteration ran and was the final one).
+    # `resumed`: the iteration was already under way at a StepCheckpoint, so its
+    # header (test, iteration step) is skipped.
+
+    def _while_iteration(self, node: Any, iteration: int, loop_state: Dict[str, Any],
+                         resumed: bool = False) -> bool:
+        if not resumed:
+            cond = self.visit(node.children[0])
+            if self._trace_conditions:
+                self._record_step(node, f"WHILE iterația {iteration}: condiție = {cond}", cond)
 
-        self._record_step(node, f"Ieșire din FOR după {iteration} iterații", None)
+            if not cond:
+                return False
+            if not self._trace_conditions:
+                self._record_step(node, f"WHILE iterația {iteration}", None)
+        self.visit(node.children[1])
+        return True
+
+    def _for_iteration(self, node: Any, iteration: int, loop_state: Dict[str, Any],
+                       resumed: bool = False) -> bool:
+        var_name = _attribute(node, 'iterator')
+        step_val = loop_state['step']
+        if not resumed:
+            curr_val = self.globals[var_name]
+            if step_val > 0 and curr_val > loop_state['stop']:
+                return False
+            if step_val < 0 and curr_val < loop_state['stop']:
+                return False
 
-    def visit_REPEAT_UNTIL(self, node: Any) -> None:
-        iteration = 0
-        self._record_step(node, "Intrare în REPEAT-UNTIL", None)
+            self._record_step(node, f"FOR iterația {iteration}: {var_name} = {curr_val}", curr_val)
+        self.visit(node.children[3])
+        self.globals[var_name] += step_val
+        return True
 
-        while True:
-            iteration += 1
+    def _repeat_iteration(self, node: Any, iteration: int, loop_state: Dict[str, Any],
+                          resumed: bool = False) -> bool:
+        if not resumed:
             self._record_step(node, f"REPEAT iterația {iteration}", None)
-            self.visit(node.children[0])
+        self.visit(node.children[0])
 
-            cond = self.visit(node.children[1])
+        cond = self.visit(node.children[1])
+        if self._trace_conditions:
             self._record_step(node, f"UNTIL: condiție = {cond}", cond)
+        return not cond
 
-            if cond:
-                break
-
-        self._record_step(node, f"Ieșire din REPEAT după {iteration} iterații", None)
+    def _do_while_iteration(self, node: Any, iteration: int, loop_state: Dict[str, Any],
+                            resumed: bool = False) -> bool:
+        if not resumed:
+            self._record_step(node, f"DO-WHILE iterația {iteration}", None)
+        self.visit(node.children[0])
 
-    def visit_DO_WHILE(self, node: Any) -> None:
+        cond = self.visit(node.children[1])
+        if self._trace_conditions:
+            self._record_step(node, f"WHILE: condiție = {cond}", cond)
+        return bool(cond)
+
+    def _iteration_function(self, node: Any) -> Tuple[Callable[[Any, int, Dict[str, Any]], bool], bool]:
+        """(iteration function, tests before the body) for a loop node"""
+        kind = getattr(node, 'kind', None)
+        if kind == ASTNodeType.WHILE:
+            return self._while_iteration, True
+        if kind == ASTNodeType.FOR:
+            return self._for_iteration, True
+        if kind == ASTNodeType.REPEAT_UNTIL:
+            return self._repeat_iteration, False
+        return self._do_while_iteration, False
+
+    def _run_loop(self, node: Any, run_iteration: Callable[..., bool], loop_state: Dict[str, Any],
+                  resume_at: Optional[Tuple[Any, ...]] = None) -> int:
+        """Run a loop to completion and return how many iterations ran.
+
+        With `loop_detail` = K, iterations K+1.. run without recording while a
+        ring keeps a checkpoint of the last K+1 iteration starts. Once the loop
+        ends, the middle is summarized in one step and execution is rewound to
+        the checkpoint of the K-th last iteration, which is re-executed with
+        recording on: the trace gets the first and last K iterations in full.
+
+        `resume_at` = (iteration, loop_state) continues an iteration that was
+        under way at a StepCheckpoint.
+        """
+        pre_test = run_iteration in (self._while_iteration, self._for_iteration)
+        if resume_at is not None:
+            return self._iterate(node, run_iteration, resume_at[1], resume_at[0], pre_test, resumed=True)
+        detail = self.loop_detail
         iteration = 0
-        self._record_step(node, "Intrare în DO-WHILE", None)
+        if not detail or not self._recording:
+            return self._iterate(node, run_iteration, loop_state, 1, pre_test)
 
+        while iteration < detail:
+            iteration += 1
+            if not run_iteration(node, iteration, loop_state):
+                return iteration - 1 if pre_test else iteration
+
+        # Mijlocul buclei: fără pași, doar checkpoint-uri și statistici
+        ring = deque(maxlen=detail + 1)
+        stats: Dict[str, Dict[str, Any]] = {}
+        first = None
+        self._set_recording(False)
+        try:
+            while True:
+                iteration += 1
+                if self.max_steps is not None:
+                    self._count_silent_step()
+                checkpoint = self._checkpoint(node, iteration, loop_state)
+                if first is None:
+                    first = checkpoint
+                if len(ring) == ring.maxlen:
+                    # The evicted iteration is surely collapsed; its end state is the next start
+                    ring.popleft()
+                    self._fold_stats(stats, ring[0].variables)
+                ring.append(checkpoint)
+                if not run_iteration(node, iteration, loop_state):
+                    break
+        finally:
+            self._set_recording(True)
+
+        total = iteration - 1 if pre_test else iteration
+        replay_from = max(detail + 1, total - detail + 1)
+        checkpoints = list(ring)
+        for index, checkpoint in enumerate(checkpoints):
+            if checkpoint.iteration < replay_from:
+                self._fold_stats(stats, checkpoints[index + 1].variables)
+        resume = next(checkpoint for checkpoint in checkpoints if checkpoint.iteration == replay_from)
+
+        if replay_from > detail + 1:
+            first.last_iteration = replay_from - 1
+            self.checkpoints.append(first)
+            for name, value in resume.variables.items():
+                stats.setdefault(name, {})['final'] = value
+            output = self.output_buffer.getvalue()[first.output_offset:resume.output_offset]
+            summary = {
+                'checkpoint': len(self.checkpoints) - 1,
+                'from_iteration': first.iteration,
+                'to_iteration': first.last_iteration,
+                'iterations': first.last_iteration - first.iteration + 1,
+                'variables': stats,
+                'output': output,
+            }
+            self._restore(resume)
+            self._record_step(node, f"Iterațiile {first.iteration}–{first.last_iteration} "
+                                    f"au fost comprimate ({summary['iterations']} iterații)", None, summary)
+        else:
+            self._restore(resume)
+
+        # Reluăm ultimele iterații, de data aceasta cu înregistrare
+        self._replaying += 1
+        try:
+            iteration = replay_from
+            while run_iteration(node, iteration, loop_state):
+                iteration += 1
+        finally:
+            self._replaying -= 1
+        return total
+
+    def _iterate(self, node: Any, run_iteration: Callable[..., bool], loop_state: Dict[str, Any],
+                 first: int, pre_test: bool, resumed: bool = False) -> int:
+        """Run iterations first, first + 1, ... until the loop ends; returns the iteration count"""
+        frames = self._frames
+        frame = [node, first, loop_state]
+        if frames is not None:
+            frames.append(frame)
+        silent = not self._recording and self.max_steps is not None
+        iteration = first
         while True:
+            frame[1] = iteration
+            if silent:
+                self._count_silent_step()
+            if not run_iteration(node, iteration, loop_state, resumed):
+                break
+            resumed = False
             iteration += 1
-            self._record_step(node, f"DO-WHILE iterația {iteration}", None)
-            self.visit(node.children[0])
+        if frames is not None:
+            frames.pop()
+        return iteration - 1 if pre_test else iteration
+
+    # --- Statement-boundary checkpoints (time travel) ---
+
+    def _run_statements(self, node: Any, start: int = 0) -> None:
+        """Run the statements of a PROGRAM/BLOCK from index `start`, taking checkpoints if enabled"""
+        children = node.children
+        frames = self._frames
+        if frames is None:
+            if self._recording or self.max_steps is None:
+                for index in range(start, len(children)):
+                    self.visit(children[index])
+                return
+            for index in range(start, len(children)):
+                self._count_silent_step()
+                self.visit(children[index])
+            return
 
-            cond = self.visit(node.children[1])
-            self._record_step(node, f"WHILE: condiție = {cond}", cond)
+        frame = [node, start]
+        frames.append(frame)
+        for index in range(start, len(children)):
+            frame[1] = index
+            if self.step_counter - self._last_checkpoint_step >= self.checkpoint_interval:
+                self._take_step_checkpoint()
+            self.visit(children[index])
+        frames.pop()
+
+    def _take_step_checkpoint(self) -> None:
+        self._last_checkpoint_step = self.step_counter
+        self.step_checkpoints.append(StepCheckpoint(
+            step=self.step_counter,
+            variables=self.globals.copy(),
+            output_offset=self.output_buffer.tell(),
+            history_length=len(self.output_history),
+            input_cursor=self.input_cursor,
+            path=[tuple(frame) for frame in self._frames],
+        ))
+
+    def _resume_position(self, node: Any) -> Optional[Tuple[Any, ...]]:
+        """The saved position inside `node` when resuming from a StepCheckpoint (consumed once)"""
+        resume = self._resume
+        if resume and resume[0][0] is node:
+            return resume.popleft()[1:]
+        return None
+
+    def replay_from(self, program: Any, checkpoint: Optional[StepCheckpoint], output_prefix: str,
+                    until_step: int) -> None:
+        """Re-execute `program` from `checkpoint` (or from the start) and stop after step `until_step`.
+
+        The checkpoint must come from an earlier run of the same program with the
+        same inputs and granularity, whose output up to it was `output_prefix`;
+        the rebuilt steps are then identical to the original ones, numbers included.
+        """
+        if checkpoint is not None:
+            self.globals = checkpoint.variables.copy()
+            self.output_buffer = StringIO()
+            self.output_buffer.write(output_prefix)
+            self._output_snapshot = None
+            self.output_history = []  # only the text is known for the prefix, not its writes
+            self.input_cursor = checkpoint.input_cursor
+            self.step_counter = checkpoint.step
+            self._resume = deque(checkpoint.path)
+        self._stop_after = until_step
+        self._replaying += 1
+        try:
+            self.visit(program)
+        except _ReplayDone:
+            pass
+        finally:
+            self._replaying -= 1
+            self._stop_after = None
+            self._resume = None
+
+    def _checkpoint(self, node: Any, iteration: int, loop_state: Dict[str, Any]) -> LoopCheckpoint:
+        return LoopCheckpoint(
+            node=node,
+            iteration=iteration,
+            variables=self.globals.copy(),
+            output_offset=self.output_buffer.tell(),
+            history_length=len(self.output_history),
+            input_cursor=self.input_cursor,
+            loop_state=loop_state,
+        )
 
-            if not cond:
-                break
+    def _restore(self, checkpoint: LoopCheckpoint) -> None:
+        """Rewind variables, output and input to a checkpoint taken by this interpreter"""
+        self.globals = checkpoint.variables.copy()
+        self.output_buffer.seek(checkpoint.output_offset)
+        self.output_buffer.truncate()
+        self._output_snapshot = None
+        del self.output_history[checkpoint.history_length:]
+        self.input_cursor = checkpoint.input_cursor
+
+    @staticmethod
+    def _fold_stats(stats: Dict[str, Dict[str, Any]], variables: Dict[str, Any]) -> None:
+        """Fold one state into the per-variable min/max of a collapsed range (numbers only)"""
+        for name, value in variables.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            entry = stats.get(name)
+            if entry is None:
+                stats[name] = {'min': value, 'max': value}
+            else:
+                if value < entry['min']:
+                    entry['min'] = value
+                if value > entry['max']:
+                    entry['max'] = value
+
+    def expand(self, checkpoint: LoopCheckpoint, output_prefix: str,
+               from_iteration: Optional[int] = None, to_iteration: Optional[int] = None) -> None:
+        """Re-execute iterations of a collapsed range, recording every step.
+
+        Starts from `checkpoint` (taken by an earlier run of the same program, whose
+        output up to the checkpoint is `output_prefix`); iterations before
+        `from_iteration` are run without recording.
+        """
+        from_iteration = from_iteration or checkpoint.iteration
+        to_iteration = to_iteration or checkpoint.last_iteration
+        node = checkpoint.node
+        run_iteration, _ = self._iteration_function(node)
+        loop_state = dict(checkpoint.loop_state)
 
-        self._record_step(node, f"Ieșire din DO-WHILE după {iteration} iterații", None)
+        self.globals = checkpoint.variables.copy()
+        self.output_buffer = StringIO()
+        self.output_buffer.write(output_prefix)
+        self._output_snapshot = None
+        self.output_history = []  # only the text is known for the prefix, not its writes
+        self.input_cursor = checkpoint.input_cursor
+
+        self._replaying += 1
+        try:
+            iteration = checkpoint.iteration
+            while iteration <= to_iteration:
+                self._set_recording(self.enable_debug and iteration >= from_iteration)
+                if not self._recording and self.max_steps is not None:
+                    self._count_silent_step()
+                if not run_iteration(node, iteration, loop_state):
+                    break
+                iteration += 1
+        finally:
+            self._set_recording(self.enable_debug)
+            self._replaying -= 1
 
     def visit_READ(self, node: Any) -> None:
         for var_node in getattr(node, 'children', []):
             var_name = getattr(var_node, 'value', None) or _attribute(var_node, 'value')
-            raw_val = input(f"Introduceți valoare pentru {var_name}: ")
+            raw_val = self._next_input(var_name)
 
             try:
                 if '.' in raw_val:
@@ -398,13 +929,24 @@ class StepByStepInterpreter:
 
         output = "".join(output_parts)
 
-        # Write to both console and buffer
-        print(output)
+        # Write to both console and buffer (re-executed iterations were already printed)
+        if not self._replaying:
+            print(output)
         self.output_buffer.write(output + '\n')
+        self._output_snapshot = None
         self.output_history.append(output)
 
         self._record_step(node, f"Scriere: {repr(output)}", output)
 
+    def _next_input(self, var_name: str) -> str:
+        if self.inputs is None:
+            return input(f"Introduceți valoare pentru {var_name}: ")
+        if self.input_cursor >= len(self.inputs):
+            raise EOFError(f"Nu mai există date de intrare pentru '{var_name}'")
+        raw_val = self.inputs[self.input_cursor]
+        self.input_cursor += 1
+        return raw_val
+
     def generic_visit(self, node: Any) -> None:
         name = _node_type_name(node)
         raise Exception(f'Nu există metodă visit_{name}')
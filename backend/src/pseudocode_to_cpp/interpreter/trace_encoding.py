@@ -0,0 +1,210 @@
+"""Columnar binary encoding of exported step-by-step traces.
+
+Instead of one JSON object per step, the trace is laid out as typed arrays
+(struct of arrays) that the browser can view directly with
+Uint32Array/Uint8Array, and a small JSON header with the string tables:
+
+    b"PSTR" | version: u16 | reserved: u16 | header length: u32 | header (UTF-8 JSON)
+    | padding to 8 bytes | column buffers, each starting at an 8-byte boundary
+
+The header maps every column name to its {"type", "offset", "length"}
+(offset from the start of the data, length in elements).
+
+Per step i:
+    step[i], line[i]           step number and source line
+    type[i]                    index into header "types"
+    template[i]                index into "templates"; a description is its template
+                               with every NUL replaced by the next argument
+    args[arg_offsets[i]:arg_offsets[i + 1]]
+                               the arguments, as indexes into "strings"
+    value[i]                   index into "strings", NO_STRING when null
+    span[4 * i:4 * i + 4]      line, col, end_line, end_col (all 0 when null)
+    var_names/var_values[var_offsets[i]:var_offsets[i + 1]]
+                               the variables that changed since step i - 1: name and
+                               JSON-encoded value as indexes into "strings";
+                               NO_STRING as value means the variable no longer exists
+    output_length[i]           length of the output so far, in UTF-16 code units,
+                               as a prefix of header "output"
+
+Steps carrying a loop summary list it in header "summaries", keyed by row.
+"""
+import json
+import re
+import struct
+import sys
+from array import array
+from enum import Enum
+from typing import Any, Dict, Iterable, List
+
+MAGIC = b"PSTR"
+VERSION = 1
+NO_STRING = 0xFFFFFFFF
+ARGUMENT = "\x00"  # locul unui argument într-un șablon de descriere
+
+_PREFIX = struct.Struct("<4sHHI")
+_ALIGNMENT = 8
+# Valorile dintr-o descriere care devin argumente: numerele
+_ARGUMENTS = re.compile(r"(\d+(?:\.\d+)?)")
+_TYPE_CODES = {"uint8": "B", "uint32": "I"}
+
+
+class TraceFormat(str, Enum):
+    """How a trace is sent to the client"""
+    JSON = "json"            # one object per step
+    COLUMNAR = "columnar"    # encode_columnar(), as application/octet-stream
+
+
+class _Strings:
+    """Interning table: each distinct string is stored once and referred to by index"""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __call__(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def encode_columnar(steps: Iterable[Dict[str, Any]]) -> bytes:
+    """Encode steps in their exported form (step_to_dict) into the columnar layout.
+
+    The output of every step must be a prefix of the output of the last one,
+    which holds for the traces of a single run.
+    """
+    strings, types, templates = _Strings(), _Strings(), _Strings()
+    columns = {
+        "step": array("I"), "line": array("I"), "type": array("B"), "template": array("I"),
+        "arg_offsets": array("I", [0]), "args": array("I"), "value": array("I"), "span": array("I"),
+        "var_offsets": array("I", [0]), "var_names": array("I"), "var_values": array("I"),
+        "output_length": array("I"),
+    }
+    summaries: Dict[int, Any] = {}
+    previous_variables: Dict[str, Any] = {}
+    output, output_length = "", 0
+
+    for row, step in enumerate(steps):
+        columns["step"].append(step["step"])
+        columns["line"].append(step["line"] or 0)
+        columns["type"].append(types(step["type"]))
+
+        parts = _ARGUMENTS.split(step["description"])
+        columns["template"].append(templates(ARGUMENT.join(parts[0::2])))
+        columns["args"].extend(strings(argument) for argument in parts[1::2])
+        columns["arg_offsets"].append(len(columns["args"]))
+
+        value = step["value"]
+        columns["value"].append(NO_STRING if value is None else strings(value))
+        columns["span"].extend(step["span"] or (0, 0, 0, 0))
+
+        variables = step["variables"]
+        for name, current in variables.items():
+            if name not in previous_variables or previous_variables[name] != current \
+                    or type(previous_variables[name]) is not type(current):
+                columns["var_names"].append(strings(name))
+                columns["var_values"].append(strings(json.dumps(current, ensure_ascii=False, default=str)))
+        for name in previous_variables.keys() - variables.keys():
+            columns["var_names"].append(strings(name))
+            columns["var_values"].append(NO_STRING)
+        columns["var_offsets"].append(len(columns["var_names"]))
+        previous_variables = variables
+
+        step_output = step["output"]
+        if len(step_output) > len(output):
+            output_length += _utf16_length(step_output[len(output):])
+            output = step_output
+            columns["output_length"].append(output_length)
+        else:
+            columns["output_length"].append(_utf16_length(step_output))
+
+        if "summary" in step:
+            summaries[row] = step["summary"]
+
+    header: Dict[str, Any] = {
+        "count": len(columns["step"]),
+        "strings": strings.values,
+        "types": types.values,
+        "templates": templates.values,
+        "output": output,
+        "summaries": summaries,
+        "columns": {},
+    }
+    data = bytearray()
+    for name, column in columns.items():
+        data.extend(b"\x00" * (-len(data) % _ALIGNMENT))
+        header["columns"][name] = {
+            "type": "uint8" if column.typecode == "B" else "uint32",
+            "offset": len(data),
+            "length": len(column),
+        }
+        if column.itemsize > 1 and sys.byteorder == "big":
+            column.byteswap()
+        data.extend(column.tobytes())
+
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    prefix = _PREFIX.pack(MAGIC, VERSION, 0, len(header_bytes))
+    padding = b" " * (-(len(prefix) + len(header_bytes)) % _ALIGNMENT)
+    return prefix + header_bytes + padding + bytes(data)
+
+
+def decode_columnar(payload: bytes) -> List[Dict[str, Any]]:
+    """Rebuild the exported steps from encode_columnar() output"""
+    magic, version, _, header_length = _PREFIX.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a columnar trace")
+    start = _PREFIX.size
+    header = json.loads(payload[start:start + header_length])
+    start += header_length
+    start += -start % _ALIGNMENT
+
+    columns = {}
+    for name, layout in header["columns"].items():
+        column = array(_TYPE_CODES[layout["type"]])
+        offset = start + layout["offset"]
+        column.frombytes(payload[offset:offset + layout["length"] * column.itemsize])
+        if column.itemsize > 1 and sys.byteorder == "big":
+            column.byteswap()
+        columns[name] = column
+
+    strings, output = header["strings"], header["output"].encode("utf-16-le")
+    variables: Dict[str, Any] = {}
+    steps = []
+    for row in range(header["count"]):
+        arguments = iter(strings[index] for index in
+                         columns["args"][columns["arg_offsets"][row]:columns["arg_offsets"][row + 1]])
+        template = header["templates"][columns["template"][row]]
+        description = "".join(part if i == 0 else next(arguments) + part
+                              for i, part in enumerate(template.split(ARGUMENT)))
+
+        variables = dict(variables)
+        for position in range(columns["var_offsets"][row], columns["var_offsets"][row + 1]):
+            name = strings[columns["var_names"][position]]
+            value = columns["var_values"][position]
+            if value == NO_STRING:
+                variables.pop(name, None)
+            else:
+                variables[name] = json.loads(strings[value])
+
+        value = columns["value"][row]
+        span = list(columns["span"][4 * row:4 * row + 4])
+        step = {
+            "step": columns["step"][row],
+            "line": columns["line"][row],
+            "type": header["types"][columns["type"][row]],
+            "description": description,
+            "value": None if value == NO_STRING else strings[value],
+            "variables": variables,
+            "output": output[:2 * columns["output_length"][row]].decode("utf-16-le"),
+            "span": span if any(span) else None,
+        }
+        if str(row) in header["summaries"]:
+            step["summary"] = header["summaries"][str(row)]
+        steps.append(step)
+    return steps
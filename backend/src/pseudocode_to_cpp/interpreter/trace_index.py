@@ -0,0 +1,124 @@
+import bisect
+import operator
+from array import array
+from typing import Any, Dict, List, Optional
+
+_MISSING = object()
+
+# Comparații cu un prag care se pot răspunde din maximul/minimul prefixelor
+_ABOVE = {'>': operator.gt, '>=': operator.ge}
+_BELOW = {'<': operator.lt, '<=': operator.le}
+COMPARISONS = tuple(_ABOVE) + tuple(_BELOW)
+
+
+class VariableHistory:
+    """Every step at which one variable got a new value, with that value.
+
+    Running maximum and minimum of its numeric values are kept alongside, so
+    "first step where v > x" is a binary search instead of a scan.
+    """
+
+    def __init__(self) -> None:
+        self.steps = array('q')
+        self.values: List[Any] = []
+        self._running_max: List[float] = []
+        self._running_min: List[float] = []
+
+    def add(self, step: int, value: Any) -> None:
+        self.steps.append(step)
+        self.values.append(value)
+        high = self._running_max[-1] if self._running_max else float('-inf')
+        low = self._running_min[-1] if self._running_min else float('inf')
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            high = max(high, value)
+            low = min(low, value)
+        self._running_max.append(high)
+        self._running_min.append(low)
+
+    def first_matching(self, op: str, threshold: float) -> Optional[int]:
+        """The first step at which the value compares `op` to `threshold`, if any"""
+        if op in _ABOVE:
+            # The running maximum only grows, so the predicate flips once
+            test, running = _ABOVE[op], self._running_max
+        elif op in _BELOW:
+            test, running = _BELOW[op], self._running_min
+        else:
+            raise ValueError(f"Unsupported comparison {op!r}")
+        position = bisect.bisect_left(running, True, key=lambda value: test(value, threshold))
+        return self.steps[position] if position < len(running) else None
+
+
+class TraceIndex:
+    """Indexes of a step-by-step trace, filled in as steps are recorded.
+
+    - the steps of every source line
+    - the value changes of every variable
+    - the steps at which the output grew, with its length after them
+    """
+
+    def __init__(self) -> None:
+        self.lines: Dict[int, array] = {}
+        self.variables: Dict[str, VariableHistory] = {}
+        self.output_steps = array('q')
+        self.output_lengths = array('q')
+        self._previous: Dict[str, Any] = {}
+        self._output_length = 0
+
+    def add(self, step_number: int, line: int, variables: Dict[str, Any], output_length: int) -> None:
+        steps = self.lines.get(line)
+        if steps is None:
+            steps = self.lines[line] = array('q')
+        steps.append(step_number)
+
+        previous = self._previous
+        for name, value in variables.items():
+            old = previous.get(name, _MISSING)
+            if old is _MISSING or old != value or type(old) is not type(value):
+                history = self.variables.get(name)
+                if history is None:
+                    history = self.variables[name] = VariableHistory()
+                history.add(step_number, value)
+        # Snapshots are fresh copies, so holding on to the last one is safe
+        self._previous = variables
+
+        # The tail of a collapsed loop is replayed from a rewound output; what it
+        # prints again is already attributed to the loop's summary step
+        if output_length > self._output_length:
+            self._output_length = output_length
+            self.output_steps.append(step_number)
+            self.output_lengths.append(output_length)
+
+    # --- Queries ---
+
+    def line_steps(self, line: int, from_step: int, count: int) -> List[int]:
+        """The first `count` steps of `line` from step `from_step` on"""
+        steps = self.lines.get(line, array('q'))
+        start = bisect.bisect_left(steps, from_step)
+        return steps[start:start + count].tolist()
+
+    def variable_changes(self, name: str, from_step: int, count: int) -> List[Dict[str, Any]]:
+        """The first `count` value changes of variable `name` from step `from_step` on"""
+        history = self.variables.get(name)
+        if history is None:
+            return []
+        start = bisect.bisect_left(history.steps, from_step)
+        stop = start + count
+        return [{'step': step, 'value': value}
+                for step, value in zip(history.steps[start:stop], history.values[start:stop])]
+
+    def first_matching(self, name: str, op: str, threshold: float) -> Optional[int]:
+        history = self.variables.get(name)
+        return history.first_matching(op, threshold) if history is not None else None
+
+    def output_steps_containing(self, output: str, text: str, limit: int) -> List[int]:
+        """Steps at which each occurrence of `text` in the final `output` was completed"""
+        matches: List[int] = []
+        start = output.find(text)
+        while start != -1 and len(matches) < limit:
+            position = bisect.bisect_left(self.output_lengths, start + len(text))
+            if position < len(self.output_steps):
+                step = self.output_steps[position]
+                if not matches or matches[-1] != step:
+                    matches.append(step)
+            start = output.find(text, start + 1)
+        return matches
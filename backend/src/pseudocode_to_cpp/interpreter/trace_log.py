@@ -0,0 +1,139 @@
+import json
+import mmap
+import struct
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Each index entry: start offset of the record in the data file, length of the output so far
+_ENTRY = struct.Struct("<QQ")
+
+
+class TraceTooLong(ValueError):
+    """Raised while recording once a trace goes past its step or size limit"""
+
+
+class SpilledTrace:
+    """Append-only step log kept on disk instead of in memory.
+
+    Records are stored as JSON in a data file; a second file holds a
+    fixed-width entry per record (its start offset and the length of the
+    output so far), so step i is found in O(1). Both are read back through
+    mmap, which leaves the pages to the OS page cache rather than the process
+    heap. The files are anonymous temporaries and disappear when the log is
+    closed or collected.
+
+    The output of a step is not written with it: within one run every step's
+    output is a prefix of the longest output seen, which is kept once and cut
+    to the stored length on read. Disk use therefore grows with the number of
+    steps, not with steps times output.
+
+    Behaves like a read-only list of steps (len, indexing, slicing, iteration)
+    plus append(); `encode`/`decode` convert between steps and their exported
+    form (step_to_dict), which has the text under 'output'.
+    """
+
+    def __init__(self, encode: Callable[[Any], Dict[str, Any]], decode: Callable[[Dict[str, Any]], Any],
+                 steps: Iterable[Any] = (), max_bytes: Optional[int] = None) -> None:
+        self._encode = encode
+        self._decode = decode
+        self.max_bytes = max_bytes
+        self._data = tempfile.TemporaryFile()
+        self._index = tempfile.TemporaryFile()
+        self._size = 0  # bytes written to the data file
+        self._count = 0
+        self._output = ""
+        self._lock = threading.Lock()
+        # Mappings are remade only when the files grew since the last read
+        self._data_map: Optional[mmap.mmap] = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._mapped_count = 0
+        for step in steps:
+            self.append(step)
+
+    def append(self, step: Any) -> None:
+        record = self._encode(step)
+        output = record.pop('output')
+        if len(output) > len(self._output):
+            self._output = output
+        data = json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+        if self.max_bytes is not None and self.size_bytes + len(data) + _ENTRY.size > self.max_bytes:
+            raise TraceTooLong(f"Urmărirea depășește {self.max_bytes // (1024 * 1024)} MB")
+        self._index.write(_ENTRY.pack(self._size, len(output)))
+        self._data.write(data)
+        self._size += len(data)
+        self._count += 1
+
+    @property
+    def size_bytes(self) -> int:
+        """Bytes taken on disk"""
+        return self._size + self._count * _ENTRY.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, stride = item.indices(self._count)
+            if stride == 1:
+                return [self._decode(record) for record in self.records(start, stop - start)]
+            return [self[i] for i in range(start, stop, stride)]
+        if item < 0:
+            item += self._count
+        if not 0 <= item < self._count:
+            raise IndexError("trace index out of range")
+        return self._decode(self.records(item, 1)[0])
+
+    def __iter__(self) -> Iterator[Any]:
+        page = 1024
+        for start in range(0, self._count, page):
+            yield from self[start:start + page]
+
+    def records(self, start: int, count: int) -> List[Dict[str, Any]]:
+        """The exported form of steps start..start + count - 1 (0-based), without decoding them to steps"""
+        records = []
+        for data, output_length in self._entries(start, count):
+            record = json.loads(data)
+            record['output'] = self._output[:output_length]
+            records.append(record)
+        return records
+
+    def raw_records(self, start: int, count: int) -> List[bytes]:
+        """The exported form of steps start..start + count - 1 (0-based) as JSON, spliced from the stored bytes"""
+        return [data[:-1] + b',"output":' + json.dumps(self._output[:output_length], ensure_ascii=False)
+                .encode("utf-8") + b'}'
+                for data, output_length in self._entries(start, count)]
+
+    def _entries(self, start: int, count: int) -> List[Tuple[bytes, int]]:
+        start = max(start, 0)
+        stop = min(start + count, self._count)
+        if start >= stop:
+            return []
+        with self._lock:
+            data, index = self._mapped()
+            entries = [_ENTRY.unpack_from(index, i * _ENTRY.size) for i in range(start, stop)]
+            end = _ENTRY.unpack_from(index, stop * _ENTRY.size)[0] if stop < self._count else self._size
+            offsets = [offset for offset, _ in entries] + [end]
+            return [(data[offsets[i]:offsets[i + 1]], entries[i][1]) for i in range(len(entries))]
+
+    def _mapped(self):
+        if self._mapped_count != self._count:
+            self._data.flush()
+            self._index.flush()
+            self._unmap()
+            self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_count = self._count
+        return self._data_map, self._index_map
+
+    def _unmap(self) -> None:
+        if self._data_map is not None:
+            self._data_map.close()
+            self._index_map.close()
+            self._data_map = self._index_map = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._unmap()
+            self._data.close()
+            self._index.close()
@@ -1,32 +1,63 @@
 import json
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # Use the refactored compiler modules (capitalized filenames)
 from ..compiler.ast_node import ASTNodeType, ASTNode
 from ..compiler.parser import Parser
 from ..compiler.lexer import lex
+from ..compiler.type_inference import DOUBLE, INT, LONG_LONG, infer_types
+from ...code_writer import CodeWriter
 
 
 class CppTranspiler:
+    # Mărimea (în caractere) de la care iter_transpile trimite mai departe codul generat
+    STREAM_CHUNK_SIZE = 16 * 1024
+
     def __init__(self) -> None:
         self.vars: Dict[str, str] = {}  # Stochează tipul variabilelor: 'long long' sau 'double' etc.
-        self.indent_level: int = 1
-        self.output: List[str] = []
+        self.writer = CodeWriter()
+        # Hartă sursă: pentru fiecare linie C++ generată dintr-un nod, poziția nodului în pseudocod
+        self.source_map: List[Dict[str, int]] = []
 
     def transpile(self, ast: ASTNode) -> str:
         """Metoda principală care orchestrează transpilarea."""
+        for _ in self._generate(ast):
+            pass
+        return self.writer.getvalue()
+
+    def iter_transpile(self, ast: ASTNode, chunk_size: Optional[int] = None) -> Iterator[str]:
+        """Like transpile(), but yields the C++ code in chunks of about `chunk_size` characters.
+
+        The chunks are handed out while the AST is still being visited, so very
+        large programs can be streamed to the client; `source_map` is complete
+        once the iterator is exhausted.
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        for _ in self._generate(ast):
+            if self.writer.pending_size >= chunk_size:
+                yield self.writer.drain()
+        chunk = self.writer.drain()
+        if chunk:
+            yield chunk
+
+    def _generate(self, ast: ASTNode) -> Iterator[None]:
+        """Emite programul, cedând controlul după fiecare instrucțiune de pe primul nivel."""
         # Pas 1: Colectează variabilele și deduce tipurile de bază
         self.vars.clear()
-        self.output.clear()
+        self.writer = CodeWriter()
+        self.source_map.clear()
         self._collect_vars(ast)
 
         # Pas 2: Generează header-ul standard
         self.emit("#include <iostream>")
         self.emit("#include <cmath>")
+        if 'string' in self.vars.values():
+            self.emit("#include <string>")
         self.emit("")
         self.emit("using namespace std;")
         self.emit("")
         self.emit("int main() {")
+        self.writer.indent()
 
         # Pas 3: Declară variabilele colectate
         if self.vars:
@@ -35,116 +66,67 @@ class CppTranspiler:
             double_vars = [v for v, t in self.vars.items() if t == 'double']
             int_vals = [v for v, t in self.vars.items() if t == 'int']
             boolean_vals = [v for v, t in self.vars.items() if t == 'bool']
+            string_vals = [v for v, t in self.vars.items() if t == 'string']
 
             if long_vars:
-                self.emit(f"    long long {', '.join(long_vars)};")
+                self.emit(f"long long {', '.join(long_vars)};")
             if double_vars:
-                self.emit(f"    double {', '.join(double_vars)};")
+                self.emit(f"double {', '.join(double_vars)};")
             if int_vals:
-                self.emit(f"    int {', '.join(int_vals)};")
+                self.emit(f"int {', '.join(int_vals)};")
             if boolean_vals:
-                self.emit(f"    bool {', '.join(boolean_vals)};")
+                self.emit(f"bool {', '.join(boolean_vals)};")
+            if string_vals:
+                self.emit(f"string {', '.join(string_vals)};")
             self.emit("")
+        yield
 
         # Pas 4: Parcurge AST-ul și generează codul efectiv
-        self.visit(ast)
+        for stmt in ast.children:
+            self.visit(stmt)
+            yield
 
         # Pas 5: Finalizare
         self.emit("")
-        self.emit("    return 0;")
+        self.emit("return 0;")
+        self.writer.dedent()
         self.emit("}")
+        yield
 
-        return "\n".join(self.output)
-
-    def emit(self, code: str, newline: bool = True) -> None:
-        """Helper pentru adăugarea de cod în bufferul de ieșire."""
-        prefix = ""
-        # Nu indentăm liniile care încep cu # (directive preprocesor) sau sunt goale
-        if code.strip() and not code.startswith("#") and not code.startswith(
-                "using") and "main" not in code and "}" not in code:
-            prefix = "    " * self.indent_level
+    def emit(self, code: str, span: Optional[Tuple[int, int, int, int]] = None) -> None:
+        """Helper pentru adăugarea unei linii de cod, la nivelul curent de indentare.
 
-        # Tratament special pentru acolada de închidere
-        if code.startswith("}"):
-            prefix = "    " * (self.indent_level - 1)
-
-        self.output.append(f"{prefix}{code}")
+        `span` (line, col, end_line, end_col) is the pseudocode range the line was
+        generated from; it is recorded in `source_map`.
+        """
+        cpp_line, cpp_col = self.writer.write_line(code)
+        if span is not None:
+            line, col, end_line, end_col = span
+            self.source_map.append({
+                "cpp_line": cpp_line, "cpp_col": cpp_col, "cpp_end_col": cpp_col + len(code),
+                "line": line, "col": col, "end_line": end_line, "end_col": end_col,
+            })
+
+    @staticmethod
+    def _header_span(node: ASTNode, last: Any) -> Optional[Tuple[int, int, int, int]]:
+        """From the start of a structure to the end of its header (condition / bounds)."""
+        if node.span() is None:
+            return None
+        if getattr(last, 'span', None) is None or last.span() is None:
+            return node.line, node.col, node.line, node.col
+        return node.line, node.col, last.end_line, last.end_col
+
+    @staticmethod
+    def _closer_span(node: ASTNode) -> Optional[Tuple[int, int, int, int]]:
+        """The line holding the structure's terminator (sfarsit_*, cat timp / pana cand <conditie>)."""
+        if node.span() is None:
+            return None
+        return node.end_line, node.attrs.get('closer_col', 0), node.end_line, node.end_col
 
     def _collect_vars(self, node: Optional[ASTNode]) -> None:
-        """Parcurgere preliminară pentru a găsi toate variabilele și a le deduce tipul."""
-        if not node:
-            return
-
-        # Dacă e o atribuire sau citire, marcăm variabila
-        if getattr(node, 'node_type', None) == ASTNodeType.ASSIGNMENT:
-            var_name = getattr(node.children[0], 'value', None)
-            self._mark_var(var_name, 'int')  # Tip implicit
-            # Verificăm expresia atribuită pentru a vedea dacă necesită promovare la double
-            self._check_expr_type(node.children[1], var_name)
-
-        elif getattr(node, 'node_type', None) == ASTNodeType.READ:
-            for child in node.children:
-                child_name = getattr(child, 'value', None)
-                if child_name is not None:
-                    self._mark_var(child_name, 'int')
-
-        elif getattr(node, 'node_type', None) == ASTNodeType.FOR:
-            # metadata kept for backward compatibility
-            iterator = None
-            if hasattr(node, 'metadata') and isinstance(node.metadata, dict):
-                iterator = node.metadata.get('iterator')
-            if iterator is None and hasattr(node, 'attrs') and isinstance(node.attrs, dict):
-                iterator = node.attrs.get('iterator')
-            if iterator:
-                self._mark_var(iterator, 'int')
-
-        # Recursivitate pentru copii
-        if hasattr(node, 'children'):
-            for child in node.children:
-                if hasattr(child, 'node_type') or hasattr(child, 'kind'):
-                    self._collect_vars(child)
-
-    def _mark_var(self, name: str, vtype: str) -> None:
-        """Înregistrează o variabilă. Promovează la double dacă e cazul."""
-        if name not in self.vars:
-            self.vars[name] = vtype
-        elif vtype == "bool" and self.vars[name] in ("int", "long long"):
-            self.vars[name] = "bool"
-        elif vtype == 'double' and self.vars[name] in ("int", "long long"):
-            self.vars[name] = 'double'  # Promovare
-
-    def _check_expr_type(self, node: Optional[ASTNode], target_var: Optional[str] = None) -> None:
-        """Verifică dacă o expresie forțează tipul 'double'."""
-        if not node or not (hasattr(node, 'node_type') or hasattr(node, 'kind')):
-            return
-        node_type = getattr(node, 'node_type', None) or getattr(node, 'kind', None)
-        if node_type == ASTNodeType.BIN_OP:
-            # operator may be stored in metadata or attrs
-            op = None
-            if hasattr(node, 'metadata') and isinstance(node.metadata, dict):
-                op = node.metadata.get('operator')
-            if op is None and hasattr(node, 'attrs') and isinstance(node.attrs, dict):
-                op = node.attrs.get('operator')
-            if op == '/' or op == 'DIV':  # Împărțirea reală promovează tipul
-                if target_var:
-                    self._mark_var(target_var, 'double')
-            self._check_expr_type(node.children[0], target_var)
-            self._check_expr_type(node.children[1], target_var)
-        elif node_type == ASTNodeType.UNARY_OP:
-            op = None
-            if hasattr(node, 'metadata') and isinstance(node.metadata, dict):
-                op = node.metadata.get('operator')
-            if op == 'SQRT' and target_var:
-                self._mark_var(target_var, 'double')
-            self._check_expr_type(node.children[0], target_var)
-        elif node_type == ASTNodeType.LITERAL:
-            val = getattr(node, 'value', None)
-            if val is not None and '.' in str(val):
-                if target_var:
-                    self._mark_var(target_var, 'double')
-            elif val in ("adevarat", "fals"):
-                if target_var:
-                    self._mark_var(target_var, 'bool')
+        """Deduce tipurile variabilelor și adnotează expresiile (vezi compiler/type_inference.py)."""
+        if node is not None:
+            self.vars.update(infer_types(node))
 
     # --- VISITOR METHODS ---
 
@@ -171,58 +153,58 @@ class CppTranspiler:
     def visit_ASSIGNMENT(self, node: ASTNode) -> None:
         var_name = getattr(node.children[0], 'value', None)
         expr = self.visit_expression(node.children[1])
-        self.emit(f"{var_name} = {expr};")
+        self.emit(f"{var_name} = {expr};", span=node.span())
 
     def visit_READ(self, node: ASTNode) -> None:
         vars_str = " >> ".join([str(getattr(child, 'value', '')) for child in node.children])
-        self.emit(f"cin >> {vars_str};")
+        self.emit(f"cin >> {vars_str};", span=node.span())
 
     def visit_WRITE(self, node: ASTNode) -> None:
         parts: List[str] = []
         for child in node.children:
             parts.append(self.visit_expression(child))
         output_str = " << ".join(parts)
-        self.emit(f"cout << {output_str};")
+        self.emit(f"cout << {output_str};", span=node.span())
 
     def visit_IF(self, node: ASTNode) -> None:
         cond = self.visit_expression(node.children[0])
-        self.emit(f"if ({cond}) {{")
-        self.indent_level += 1
+        self.emit(f"if ({cond}) {{", span=self._header_span(node, node.children[0]))
+        self.writer.indent()
         self.visit(node.children[1])  # THEN branch
-        self.indent_level -= 1
+        self.writer.dedent()
 
         if len(node.children) > 2 and node.children[2] and node.children[2].children:
             self.emit("} else {")
-            self.indent_level += 1
+            self.writer.indent()
             self.visit(node.children[2])  # ELSE branch
-            self.indent_level -= 1
+            self.writer.dedent()
 
-        self.emit("}")
+        self.emit("}", span=self._closer_span(node))
 
     def visit_WHILE(self, node: ASTNode) -> None:
         cond = self.visit_expression(node.children[0])
-        self.emit(f"while ({cond}) {{")
-        self.indent_level += 1
+        self.emit(f"while ({cond}) {{", span=self._header_span(node, node.children[0]))
+        self.writer.indent()
         self.visit(node.children[1])
-        self.indent_level -= 1
-        self.emit("}")
+        self.writer.dedent()
+        self.emit("}", span=self._closer_span(node))
 
     def visit_DO_WHILE(self, node: ASTNode) -> None:
-        self.emit("do {")
-        self.indent_level += 1
+        self.emit("do {", span=self._header_span(node, None))
+        self.writer.indent()
         self.visit(node.children[0])  # Body first
-        self.indent_level -= 1
+        self.writer.dedent()
         cond = self.visit_expression(node.children[1])
-        self.emit(f"}} while ({cond});")
+        self.emit(f"}} while ({cond});", span=self._closer_span(node))
 
     def visit_REPEAT_UNTIL(self, node: ASTNode) -> None:
-        self.emit("do {")
-        self.indent_level += 1
+        self.emit("do {", span=self._header_span(node, None))
+        self.writer.indent()
         self.visit(node.children[0])
-        self.indent_level -= 1
+        self.writer.dedent()
         cond = self.visit_expression(node.children[1])
         # IMPORTANT: repeat...until(cond) este echivalent cu while(!cond)
-        self.emit(f"}} while (!({cond}));")
+        self.emit(f"}} while (!({cond}));", span=self._closer_span(node))
 
     def visit_FOR(self, node: ASTNode) -> None:
         var = None
@@ -264,11 +246,13 @@ class CppTranspiler:
         else:
             cond_expr = f"{var} {cond_op} {stop}"
 
-        self.emit(f"for ({var} = {start}; {cond_expr}; {inc_op}) {{")
-        self.indent_level += 1
+        # The header ends at the step when one is written, otherwise at the stop bound
+        header_end = step_node if step_node.span() is not None else node.children[1]
+        self.emit(f"for ({var} = {start}; {cond_expr}; {inc_op}) {{", span=self._header_span(node, header_end))
+        self.writer.indent()
         self.visit(node.children[3])
-        self.indent_level -= 1
-        self.emit("}")
+        self.writer.dedent()
+        self.emit("}", span=self._closer_span(node))
 
     def visit_expression(self, node: ASTNode) -> str:
          """Metodă helper care returnează string-ul expresiei, nu emite linie nouă."""
@@ -305,6 +289,9 @@ class CppTranspiler:
                  op = node.attrs.get('operator')
 
              if op == '/':
+                 # Cast-ul e necesar doar când ambii operanzi sunt întregi
+                 if DOUBLE in (node.children[0].static_type, node.children[1].static_type):
+                     return f"({left} / {right})"
                  return f"((double){left} / {right})"
 
              # Mapare operatori pseudocod -> C++
@@ -328,6 +315,8 @@ class CppTranspiler:
              if op == 'SQRT':
                  return f"sqrt({expr})"
              if op == 'FLOOR':
+                 if node.children[0].static_type in (INT, LONG_LONG):
+                     return expr  # partea întreagă a unui întreg e chiar el
                  return f"(long long)({expr})"  # CAST la int
              if op == 'NOT':
                  return f"!({expr})"
@@ -1,47 +1,221 @@
-from fastapi import Request, HTTPException
-from functools import wraps
-from datetime import datetime, timedelta
-from collections import defaultdict
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from typing import Tuple
 
-# In-memory storage (resets when server restarts)
-rate_limit_store = defaultdict(lambda: {"count": 0, "reset_time": None})
+from fastapi import Request, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
+
+from .ai_powered_functionalities.config import get_settings
+
+
+def _take_token(tokens: float, updated_at: float, capacity: int, window_seconds: float,
+                now: float) -> Tuple[bool, float, float, float]:
+    """Refill a token bucket up to `now` and try to take one token from it.
+
+    The bucket holds at most `capacity` tokens and refills continuously at
+    `capacity / window_seconds` tokens per second, which behaves like a sliding
+    window over the last `window_seconds` without storing individual requests.
+
+    Returns (allowed, tokens_left, retry_after_seconds, expires_at), where
+    `expires_at` is the moment the bucket is full again; past that point the
+    key carries no information and can be dropped.
+    """
+    rate = capacity / window_seconds
+    tokens = min(float(capacity), tokens + max(0.0, now - updated_at) * rate)
+
+    if tokens >= 1.0:
+        tokens -= 1.0
+        allowed = True
+        retry_after = 0.0
+    else:
+        allowed = False
+        retry_after = (1.0 - tokens) / rate
+
+    expires_at = now + (capacity - tokens) / rate
+    return allowed, tokens, retry_after, expires_at
+
+
+class RateLimitBackend(ABC):
+    """Storage for the token buckets, keyed by function name and client IP."""
+
+    # Backends that may wait on I/O are called from a worker thread instead of the event loop
+    blocking = False
+
+    @abstractmethod
+    def acquire(self, key: str, capacity: int, window_seconds: float) -> Tuple[bool, int, float]:
+        """Try to consume one request for `key`.
+
+        Returns (allowed, remaining_calls, retry_after_seconds).
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets in an LRU-ordered dict with a hard size bound.
+
+    Every check is O(1): the touched key moves to the end, and keys whose bucket
+    has refilled completely are purged from the front as they are encountered.
+    When `max_keys` is exceeded the least recently seen key is evicted.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, capacity: int, window_seconds: float) -> Tuple[bool, int, float]:
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+
+            tokens, updated_at, _ = self._buckets.get(key, (float(capacity), now, now))
+            allowed, tokens, retry_after, expires_at = _take_token(
+                tokens, updated_at, capacity, window_seconds, now
+            )
+            self._buckets[key] = (tokens, now, expires_at)
+            self._buckets.move_to_end(key)
+
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed, int(tokens), retry_after
+
+    def _purge(self, now: float) -> None:
+        while self._buckets:
+            oldest_key = next(iter(self._buckets))
+            if self._buckets[oldest_key][2] > now:
+                break
+            del self._buckets[oldest_key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker process through a SQLite database.
+
+    Each check is a single indexed read-modify-write inside an IMMEDIATE
+    transaction, so concurrent workers never double-spend a token. Expired rows
+    are deleted at most once every `purge_interval` seconds.
+
+    A check waits at most `lock_timeout` seconds for another worker's write
+    lock; past that (or on any other database error) the request is let
+    through rather than failed, since the limiter protects a quota and is not
+    worth an outage.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, purge_interval: float = 60.0, lock_timeout: float = 0.5):
+        self.path = path
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=lock_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_expires_at ON rate_limits (expires_at)")
+
+    def acquire(self, key: str, capacity: int, window_seconds: float) -> Tuple[bool, int, float]:
+        try:
+            return self._acquire(key, capacity, window_seconds)
+        except sqlite3.Error as e:
+            print(f"Rate limit check skipped: {e}")
+            return True, capacity - 1, 0.0
+
+    def _acquire(self, key: str, capacity: int, window_seconds: float) -> Tuple[bool, int, float]:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if now - self._last_purge >= self.purge_interval:
+                    cursor.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+                    self._last_purge = now
+
+                row = cursor.execute(
+                    "SELECT tokens, updated_at FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated_at = row if row else (float(capacity), now)
+                allowed, tokens, retry_after, expires_at = _take_token(
+                    tokens, updated_at, capacity, window_seconds, now
+                )
+                cursor.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, tokens, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, tokens, now, expires_at),
+                )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+        return allowed, int(tokens), retry_after
+
+
+@lru_cache()
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Build the backend selected by RATE_LIMIT_BACKEND ("memory" or "sqlite")."""
+    settings = get_settings()
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitBackend(settings.RATE_LIMIT_SQLITE_PATH)
+    return MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 90:
+        seconds = math.ceil(seconds)
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
+    minutes = math.ceil(seconds / 60)
+    return f"{minutes} minutes"
 
 
 def rate_limit(max_calls: int, window_hours: int = 1):
     """
     Rate limiter decorator that tracks requests by IP address.
-    Uses in-memory storage (resets on server restart).
+    Uses a token bucket per client: at most `max_calls` requests in a burst,
+    refilled gradually over `window_hours`.
     """
+    window_seconds = window_hours * 3600
 
     def decorator(func):
         @wraps(func)
         async def wrapper(request: Request, *args, **kwargs):
             client_ip = request.client.host
             key = f"rate_limit:{func.__name__}:{client_ip}"
-            now = datetime.now()
-
-            # Check if we need to reset the counter
-            if (rate_limit_store[key]["reset_time"] is None or
-                    now > rate_limit_store[key]["reset_time"]):
-                rate_limit_store[key] = {
-                    "count": 1,
-                    "reset_time": now + timedelta(hours=window_hours)
-                }
-                remaining = max_calls - 1
-            elif rate_limit_store[key]["count"] >= max_calls:
+
+            backend = get_rate_limit_backend()
+            if backend.blocking:
+                allowed, remaining, retry_after = await run_in_threadpool(
+                    backend.acquire, key, max_calls, window_seconds)
+            else:
+                allowed, remaining, retry_after = backend.acquire(key, max_calls, window_seconds)
+            if not allowed:
+                wait = math.ceil(retry_after)
                 raise HTTPException(
                     status_code=429,
-                    detail=f"Rate limit exceeded. Maximum {max_calls} requests per hour. Try again later."
+                    detail=(f"Rate limit exceeded. Up to {max_calls} requests are allowed at once, "
+                            f"then one more every {_format_duration(window_seconds / max_calls)}. "
+                            f"Try again in {_format_duration(wait)}."),
+                    headers={"Retry-After": str(wait)}
                 )
-            else:
-                rate_limit_store[key]["count"] += 1
-                remaining = max_calls - rate_limit_store[key]["count"]
 
             # Execute the actual route handler
             response = await func(request, *args, **kwargs)
 
             # Handle different response types
-            if isinstance(response, dict):
+            if isinstance(response, Response):
+                # Streamed or raw responses carry the count in a header instead
+                response.headers["X-RateLimit-Remaining"] = str(remaining)
+                return response
+            elif isinstance(response, dict):
                 # Already a dict - just add remaining_calls
                 response["remaining_calls"] = remaining
                 return response
@@ -61,4 +235,4 @@ def rate_limit(max_calls: int, window_hours: int = 1):
 
         return wrapper
 
-    return decorator
\ No newline at end of file
+    return decorator
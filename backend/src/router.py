@@ -1,9 +1,21 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from . import service
+from .compression import IDENTITY, compressed_response
+from .json_encoding import encode_object
+from .pseudocode_to_cpp.interpreter.debug_session import SessionBusy, SessionClosed
+from .pseudocode_to_cpp.interpreter.step_by_step_interpreter import TraceGranularity
+from .pseudocode_to_cpp.interpreter.trace_encoding import TraceFormat
+from .pseudocode_to_cpp.interpreter.trace_log import TraceTooLong
 
 router = APIRouter()
 
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/octet-stream"
+
 
 class PseudocodeRequest(BaseModel):
     pseudocode: str
@@ -14,13 +26,64 @@ class CppRequest(BaseModel):
 
 class StepByStepRequest(BaseModel):
     pseudocode: str
+    granularity: TraceGranularity = TraceGranularity.EXPRESSION
+    inputs: Optional[List[str]] = None
+    loop_detail: Optional[int] = Field(None, ge=1)
+    format: TraceFormat = TraceFormat.JSON
+
+
+class TimelineRequest(BaseModel):
+    pseudocode: str
+    granularity: TraceGranularity = TraceGranularity.EXPRESSION
+    inputs: Optional[List[str]] = None
+
+
+class ProfileRequest(BaseModel):
+    pseudocode: str
+    inputs: Optional[List[str]] = None
+
+
+class DebugSessionRequest(BaseModel):
+    pseudocode: str
+    inputs: Optional[List[str]] = None
+    granularity: TraceGranularity = TraceGranularity.STATEMENT
+
+
+class DebugStepRequest(BaseModel):
+    count: int = Field(1, ge=1, le=1000)
+
+
+class RunToLineRequest(BaseModel):
+    line: int = Field(ge=1)
+
+
+class BreakpointsRequest(BaseModel):
+    lines: List[int]
+
+
+class ExpandLoopRequest(BaseModel):
+    trace_id: str
+    checkpoint: int = Field(ge=0)
+    from_iteration: Optional[int] = Field(None, ge=1)
+    to_iteration: Optional[int] = Field(None, ge=1)
 
 @router.post("/ptc")
-def pseudocode_to_cpp(request: PseudocodeRequest):
-    cpp_code = service.pseudocode_to_cpp(request.pseudocode)
-    if not cpp_code:
+async def pseudocode_to_cpp(request: PseudocodeRequest, http_request: Request):
+    encoded = await run_in_threadpool(service.pseudocode_to_cpp_response, request.pseudocode)
+    if not encoded:
         raise HTTPException(status_code=500, detail="Internal server error")
-    return {"cpp_code": cpp_code}
+    return await compressed_response(http_request, encoded[IDENTITY], JSON_MEDIA_TYPE, cache=encoded)
+
+
+@router.post("/ptc/stream")
+def pseudocode_to_cpp_stream(request: PseudocodeRequest):
+    chunks = service.pseudocode_to_cpp_stream(request.pseudocode)
+    return StreamingResponse(chunks, media_type="text/plain")
+
+
+@router.post("/diagnostics")
+def pseudocode_diagnostics(request: PseudocodeRequest):
+    return service.pseudocode_diagnostics(request.pseudocode)
 
 
 @router.post("/ctp")
@@ -30,10 +93,160 @@ def cpp_to_pseudocode(request: CppRequest):
         raise HTTPException(status_code=500, detail="Internal server error")
     return {"pseudocode": pseudocode}
 
+@router.post("/ctp/stream")
+def cpp_to_pseudocode_stream(request: CppRequest):
+    chunks = service.cpp_to_pseudocode_stream(request.cpp_code)
+    return StreamingResponse(chunks, media_type="text/plain")
+
 @router.post("/sbs")
-def step_by_step_execution(request: StepByStepRequest):
+async def step_by_step_execution(request: StepByStepRequest, http_request: Request):
     print(f"received {request}")
-    trace = service.step_by_step_execution(request.pseudocode)
-    if not trace:
+    try:
+        trace, trace_id, total_steps = await run_in_threadpool(
+            service.step_by_step_execution, request.pseudocode, request.granularity,
+            request.inputs, request.loop_detail, request.format)
+    except TraceTooLong as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not total_steps:
         raise HTTPException(status_code=500, detail="Internal server error")
-    return {"json_execution": trace}
\ No newline at end of file
+    if request.format == TraceFormat.COLUMNAR:
+        return await compressed_response(http_request, trace, COLUMNAR_MEDIA_TYPE,
+                                         headers={"X-Trace-Id": trace_id, "X-Total-Steps": str(total_steps)})
+    body = encode_object({"json_execution": trace, "trace_id": trace_id, "total_steps": total_steps})
+    return await compressed_response(http_request, body, JSON_MEDIA_TYPE)
+
+
+def _trace_query(query):
+    try:
+        return query()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/sbs/{trace_id}")
+async def trace_page(http_request: Request, trace_id: str, from_: int = Query(1, alias="from", ge=1),
+                     count: Optional[int] = Query(None, ge=1), format: TraceFormat = TraceFormat.JSON):
+    if format == TraceFormat.COLUMNAR:
+        count = count or service.COLUMNAR_PAGE_SIZE
+        media_type = COLUMNAR_MEDIA_TYPE
+
+        def build():
+            return _trace_query(lambda: service.trace_page_columnar(trace_id, from_, count))
+    else:
+        count = count or service.TRACE_PAGE_SIZE
+        media_type = JSON_MEDIA_TYPE
+
+        def build():
+            steps = _trace_query(lambda: service.trace_page(trace_id, from_, count))
+            return encode_object({"json_execution": steps})
+    # Cheap lookup that also validates the request; the page itself is read only if not cached
+    cache = _trace_query(lambda: service.trace_page_cache(trace_id, from_, count, format))
+    return await compressed_response(http_request, build, media_type, cache=cache)
+
+
+@router.post("/sbs/expand")
+def expand_loop_iterations(request: ExpandLoopRequest):
+    steps = _trace_query(lambda: service.expand_loop_iterations(request.trace_id, request.checkpoint,
+                                                                request.from_iteration, request.to_iteration))
+    return {"json_execution": steps}
+
+
+@router.post("/sbs/timeline")
+def record_timeline(request: TimelineRequest):
+    try:
+        trace_id, total_steps, output = service.record_timeline(request.pseudocode, request.granularity,
+                                                                request.inputs)
+    except (SyntaxError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"trace_id": trace_id, "total_steps": total_steps, "output": output}
+
+
+@router.get("/sbs/{trace_id}/lines/{line}")
+def find_line_steps(trace_id: str, line: int, from_: int = Query(1, alias="from", ge=1),
+                    count: int = Query(service.MAX_QUERY_RESULTS, ge=1)):
+    steps = _trace_query(lambda: service.find_line_steps(trace_id, line, from_, count))
+    return {"line": line, "steps": steps}
+
+
+@router.get("/sbs/{trace_id}/variables/{name}")
+def find_variable_changes(trace_id: str, name: str, from_: int = Query(1, alias="from", ge=1),
+                          count: int = Query(service.MAX_QUERY_RESULTS, ge=1)):
+    changes = _trace_query(lambda: service.find_variable_changes(trace_id, name, from_, count))
+    return {"variable": name, "changes": changes}
+
+
+@router.get("/sbs/{trace_id}/variables/{name}/first")
+def find_first_variable_match(trace_id: str, name: str, op: str, value: float):
+    step = _trace_query(lambda: service.find_first_variable_match(trace_id, name, op, value))
+    return {"variable": name, "step": step}
+
+
+@router.get("/sbs/{trace_id}/output")
+def find_output_steps(trace_id: str, text: str = Query(min_length=1),
+                      count: int = Query(service.MAX_QUERY_RESULTS, ge=1)):
+    steps = _trace_query(lambda: service.find_output_steps(trace_id, text, count))
+    return {"text": text, "steps": steps}
+
+
+@router.get("/sbs/{trace_id}/steps/{step}")
+async def reconstruct_steps(http_request: Request, trace_id: str, step: int, count: int = Query(1, ge=1)):
+    def build():
+        steps = _trace_query(lambda: service.reconstruct_steps(trace_id, step, count))
+        return encode_object({"json_execution": steps})
+    return await compressed_response(http_request, build, JSON_MEDIA_TYPE)
+
+
+@router.post("/profile")
+def profile_execution(request: ProfileRequest):
+    try:
+        return service.profile_execution(request.pseudocode, request.inputs)
+    except (SyntaxError, ValueError, EOFError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/sbs/sessions")
+def open_debug_session(request: DebugSessionRequest):
+    try:
+        session_id = service.open_debug_session(request.pseudocode, request.inputs, request.granularity)
+    except (SyntaxError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": session_id}
+
+
+def _debug_command(session_id: str, command):
+    try:
+        return command(service.get_debug_session(session_id))
+    except (KeyError, SessionClosed):
+        raise HTTPException(status_code=404, detail="Unknown or expired debug session")
+    except SessionBusy:
+        raise HTTPException(status_code=409, detail="Another command is still running on this debug session")
+
+
+@router.post("/sbs/sessions/{session_id}/step")
+def debug_step(session_id: str, request: DebugStepRequest = DebugStepRequest()):
+    return _debug_command(session_id, lambda session: session.step(request.count))
+
+
+@router.post("/sbs/sessions/{session_id}/continue")
+def debug_continue(session_id: str):
+    return _debug_command(session_id, lambda session: session.continue_())
+
+
+@router.post("/sbs/sessions/{session_id}/run-to-line")
+def debug_run_to_line(session_id: str, request: RunToLineRequest):
+    return _debug_command(session_id, lambda session: session.run_to_line(request.line))
+
+
+@router.put("/sbs/sessions/{session_id}/breakpoints")
+def debug_set_breakpoints(session_id: str, request: BreakpointsRequest):
+    _debug_command(session_id, lambda session: session.set_breakpoints(request.lines))
+    return {"breakpoints": sorted(set(request.lines))}
+
+
+@router.delete("/sbs/sessions/{session_id}")
+def close_debug_session(session_id: str):
+    if not service.close_debug_session(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired debug session")
+    return {"closed": True}
@@ -4,6 +4,8 @@ from .router import router
 from fastapi.middleware.cors import CORSMiddleware
 from .ai_powered_functionalities.api.routes import ocr, pseudocode_correction, generate_problem_statement
 from .ws import router as ws_router
+from .middleware import BodySizeLimitMiddleware
+from .ai_powered_functionalities.config import get_settings
 
 app = FastAPI(title="Pseudocronic")
 
@@ -14,6 +16,12 @@ app.include_router(ocr.router, prefix="/api/v1")
 app.include_router(generate_problem_statement.router, prefix="/api/v1")
 app.include_router(ws_router)
 
+# Image plus multipart framing; oversized uploads are cut off while streaming in
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/api/v1/ocr": get_settings().MAX_IMAGE_SIZE_MB * 1024 * 1024 + 64 * 1024},
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -1,23 +1,109 @@
-import json
-from typing import List
+import bisect
+import hashlib
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
+from .ai_powered_functionalities.utils.cache import ResponseCache
+from .compression import IDENTITY
 from .cpp_to_pseudocode.transpiler.pseudocode_transpiler import CppToPseudocodeTranspiler
-from .pseudocode_to_cpp.compiler.parser import Parser
+from .json_encoding import RawJSON, dumps, encode_object, join_array
+from .pseudocode_to_cpp.compiler.parser import Parser, parse_with_diagnostics
 from .pseudocode_to_cpp.compiler.lexer import lex
-from .pseudocode_to_cpp.interpreter.step_by_step_interpreter import StepByStepInterpreter, ExecutionStep
+from .pseudocode_to_cpp.interpreter.debug_session import DebugSession, debug_sessions
+from .pseudocode_to_cpp.interpreter.interpreter import Interpreter
+from .pseudocode_to_cpp.interpreter.execution_store import StoredExecution, execution_store
+from .pseudocode_to_cpp.interpreter.step_by_step_interpreter import (
+    StepByStepInterpreter, ExecutionStep, TraceGranularity)
+from .pseudocode_to_cpp.interpreter.trace_encoding import TraceFormat, encode_columnar
+from .pseudocode_to_cpp.interpreter.trace_log import SpilledTrace
 from .pseudocode_to_cpp.transpiler.cpp_transpiler import CppTranspiler
 
+# Upper bound on the iterations re-executed by one expand request, and on the steps it returns
+MAX_EXPANDED_ITERATIONS = 1000
+MAX_EXPANDED_STEPS = 200_000
+# Steps between two timeline checkpoints, and the most steps rebuilt by one request
+TIMELINE_CHECKPOINT_INTERVAL = 500
+MAX_RECONSTRUCTED_STEPS = 1000
+# Past this much memory a trace is moved to disk; it is then returned one page at a time
+TRACE_SPILL_THRESHOLD_BYTES = 64 * 1024 * 1024
+# Runs recording more steps, or a trace larger than this on disk, are refused (TraceTooLong)
+MAX_TRACE_STEPS = 2_000_000
+MAX_TRACE_BYTES = 256 * 1024 * 1024
+# A timeline keeps no steps, so it may run longer
+MAX_TIMELINE_STEPS = 20_000_000
+TRACE_PAGE_SIZE = 1000
+# Columnar pages are several times smaller and need no JSON parsing, so they can be longer
+COLUMNAR_PAGE_SIZE = 50_000
+# Profiled runs executing more statements are refused (timing every one makes them slow)
+MAX_PROFILED_STATEMENTS = 1_000_000
+# Most step numbers returned by one trace query
+MAX_QUERY_RESULTS = 1000
+# Compressed trace pages kept per stored run, for pages fetched over and over
+MAX_CACHED_PAGES = 8
+
+# Encoded /ptc responses by pseudocode: the body under IDENTITY plus its compressed variants
+_transpile_results = ResponseCache(max_entries=256, ttl_seconds=60 * 60)
+_page_cache_lock = threading.Lock()
+
 
 def pseudocode_to_cpp(pseudocode: str) -> str:
     """
     Converts pseudocode to C++ code.
     """
 
+    return pseudocode_to_cpp_with_source_map(pseudocode)[0]
+
+
+def pseudocode_to_cpp_with_source_map(pseudocode: str) -> Tuple[str, List[dict]]:
+    """
+    Converts pseudocode to C++ code, along with the line mapping between the two.
+    """
+
     tokens = list(lex(pseudocode))
     parser = Parser(tokens)
     ast = parser.parse_program()
     transpiler = CppTranspiler()
-    return transpiler.transpile(ast)
+    cpp_code = transpiler.transpile(ast)
+    return cpp_code, transpiler.source_map
+
+
+def pseudocode_to_cpp_response(pseudocode: str) -> Optional[Dict[str, bytes]]:
+    """
+    The encoded /ptc response body ({"cpp_code", "source_map"}) under IDENTITY, in a cache entry
+    that also collects its compressed variants; None if no code was generated.
+    """
+    key = hashlib.sha256(pseudocode.encode("utf-8")).hexdigest()
+    entry = _transpile_results.get(key)
+    if entry is None:
+        cpp_code, source_map = pseudocode_to_cpp_with_source_map(pseudocode)
+        if not cpp_code:
+            return None
+        entry = {IDENTITY: encode_object({"cpp_code": cpp_code, "source_map": source_map})}
+        _transpile_results.set(key, entry)
+    return entry
+
+
+def pseudocode_to_cpp_stream(pseudocode: str) -> Iterator[str]:
+    """
+    Converts pseudocode to C++ code, yielding the code in chunks as it is generated.
+    The pseudocode is parsed before returning, so syntax errors are raised here and not mid-stream.
+    """
+
+    tokens = list(lex(pseudocode))
+    parser = Parser(tokens)
+    ast = parser.parse_program()
+    return CppTranspiler().iter_transpile(ast)
+
+
+def pseudocode_diagnostics(pseudocode: str) -> dict:
+    """
+    Reports every syntax error in the pseudocode in one pass, along with the partial AST.
+    """
+    ast, diagnostics = parse_with_diagnostics(pseudocode)
+    return {
+        "diagnostics": [diagnostic.to_dict() for diagnostic in diagnostics],
+        "ast": ast.to_dict(),
+    }
 
 
 def cpp_to_pseudocode(cpp: str) -> str:
@@ -28,16 +114,297 @@ def cpp_to_pseudocode(cpp: str) -> str:
     return transpiler.transpile()
 
 
-def step_by_step_execution(pseudocode: str) -> any:
+def cpp_to_pseudocode_stream(cpp: str) -> Iterator[str]:
+    """
+    Converts C++ code to pseudocode, yielding the pseudocode in chunks as it is generated.
+    """
+    transpiler = CppToPseudocodeTranspiler(cpp)
+    return transpiler.iter_transpile()
+
+
+def step_by_step_execution(pseudocode: str,
+                           granularity: TraceGranularity = TraceGranularity.EXPRESSION,
+                           inputs: Optional[List[str]] = None,
+                           loop_detail: Optional[int] = None,
+                           trace_format: TraceFormat = TraceFormat.JSON) -> Tuple[bytes, str, int]:
     """
     Get a json with the step by step execution of the pseudocode.
     :param pseudocode:
-    :return:
+    :param granularity: which steps to record (statement, condition or expression)
+    :param inputs: values read by `citeste`, in order
+    :param loop_detail: keep only the first and last `loop_detail` iterations of each loop in full
+    :param trace_format: a JSON array of step objects (json, as RawJSON) or encode_columnar() bytes (columnar)
+    :return: the encoded trace (only its first page if it grew past TRACE_SPILL_THRESHOLD_BYTES),
+        the id to page through it and expand its collapsed iterations with, and its length
+    Raises TraceTooLong past MAX_TRACE_STEPS steps or MAX_TRACE_BYTES of trace.
+    """
+    interpreter = StepByStepInterpreter(enable_debug=True, granularity=granularity,
+                                        inputs=inputs, loop_detail=loop_detail,
+                                        spill_threshold_bytes=TRACE_SPILL_THRESHOLD_BYTES,
+                                        build_index=True, max_steps=MAX_TRACE_STEPS,
+                                        max_trace_bytes=MAX_TRACE_BYTES)
+    tokens = list(lex(pseudocode))
+    parser = Parser(tokens)
+    ast = parser.parse_program()
+    interpreter.visit(ast)
+
+    # A small trace stays in memory as it is and is sent whole; a spilled one only its first page
+    stored_trace = interpreter.execution_trace
+    if trace_format == TraceFormat.COLUMNAR:
+        count = COLUMNAR_PAGE_SIZE if interpreter.trace_spilled else len(stored_trace)
+        trace = encode_columnar(_page_records(stored_trace, 0, count))
+    else:
+        count = TRACE_PAGE_SIZE if interpreter.trace_spilled else len(stored_trace)
+        trace = _page_json(stored_trace, 0, count)
+
+    execution_id = execution_store.put(StoredExecution(
+        ast=ast,
+        inputs=inputs,
+        granularity=interpreter.granularity,
+        loop_detail=loop_detail,
+        checkpoints=interpreter.checkpoints,
+        final_output=interpreter.get_final_output(),
+        total_steps=len(stored_trace),
+        trace=stored_trace,
+        trace_bytes=interpreter.trace_size_bytes,
+        index=interpreter.trace_index,
+    ))
+    return trace, execution_id, len(stored_trace)
+
+
+def _page_records(trace: Sequence[ExecutionStep], start: int, count: int) -> List[dict]:
+    if isinstance(trace, SpilledTrace):
+        return trace.records(start, count)
+    return [StepByStepInterpreter.step_to_dict(step) for step in trace[max(start, 0):start + count]]
+
+
+def _page_json(trace: Sequence[ExecutionStep], start: int, count: int) -> RawJSON:
+    if isinstance(trace, SpilledTrace):
+        # The log already holds every step as JSON
+        return join_array(trace.raw_records(start, count))
+    return RawJSON(dumps(_page_records(trace, start, count)))
+
+
+def trace_page(execution_id: str, first_step: int = 1, count: int = TRACE_PAGE_SIZE) -> RawJSON:
+    """
+    Steps first_step..first_step + count - 1 (1-based positions) of a stored step-by-step trace,
+    as a JSON array.
+    Raises KeyError if the trace is unknown (or expired), ValueError for a bad range.
+    """
+    stored = _stored_trace(execution_id, count, TRACE_PAGE_SIZE)
+    return _page_json(stored.trace, first_step - 1, count)
+
+
+def trace_page_columnar(execution_id: str, first_step: int = 1, count: int = COLUMNAR_PAGE_SIZE) -> bytes:
+    """
+    Like trace_page, encoded with encode_columnar.
+    Raises KeyError if the trace is unknown (or expired), ValueError for a bad range.
+    """
+    stored = _stored_trace(execution_id, count, COLUMNAR_PAGE_SIZE)
+    return encode_columnar(_page_records(stored.trace, first_step - 1, count))
+
+
+def trace_page_cache(execution_id: str, first_step: int, count: int,
+                     trace_format: TraceFormat = TraceFormat.JSON) -> Dict[str, bytes]:
+    """
+    The compressed variants (encoding -> bytes) of one trace page response, kept with the stored run.
+    Raises KeyError if the trace is unknown (or expired), ValueError for a bad range.
+    """
+    limit = COLUMNAR_PAGE_SIZE if trace_format == TraceFormat.COLUMNAR else TRACE_PAGE_SIZE
+    stored = _stored_trace(execution_id, count, limit)
+    key = (first_step, count, trace_format)
+    with _page_cache_lock:
+        cache = stored.encoded_pages.get(key)
+        if cache is None:
+            cache = stored.encoded_pages[key] = {}
+            while len(stored.encoded_pages) > MAX_CACHED_PAGES:
+                stored.encoded_pages.popitem(last=False)
+        else:
+            stored.encoded_pages.move_to_end(key)
+    return cache
+
+
+def _stored_trace(execution_id: str, count: int, limit: int) -> StoredExecution:
+    stored = execution_store.get(execution_id)
+    if stored is None or stored.trace is None:
+        raise KeyError(execution_id)
+    if not 1 <= count <= limit:
+        raise ValueError(f"Between 1 and {limit} steps can be fetched at once")
+    return stored
+
+
+def expand_loop_iterations(execution_id: str, checkpoint: int,
+                           from_iteration: Optional[int] = None,
+                           to_iteration: Optional[int] = None) -> list:
+    """
+    Re-execute collapsed loop iterations of an earlier step-by-step run and return their steps.
+    Raises KeyError if the run or checkpoint is unknown (or expired), ValueError for a bad range
+    and TraceTooLong past MAX_EXPANDED_STEPS steps.
+    """
+    stored = execution_store.get(execution_id)
+    if stored is None or not 0 <= checkpoint < len(stored.checkpoints):
+        raise KeyError(execution_id)
+    start = stored.checkpoints[checkpoint]
+
+    from_iteration = from_iteration or start.iteration
+    to_iteration = to_iteration or start.last_iteration
+    if not start.iteration <= from_iteration <= to_iteration <= start.last_iteration:
+        raise ValueError(f"Iterations must lie within {start.iteration}..{start.last_iteration}")
+    if to_iteration - from_iteration + 1 > MAX_EXPANDED_ITERATIONS:
+        raise ValueError(f"At most {MAX_EXPANDED_ITERATIONS} iterations can be expanded at once")
+
+    # Nested loops are traced in full: collapsing them again would add checkpoints to a list
+    # shared by every request on this run. The step limit bounds what that can cost.
+    interpreter = StepByStepInterpreter(enable_debug=True, granularity=stored.granularity,
+                                        inputs=stored.inputs, max_steps=MAX_EXPANDED_STEPS,
+                                        max_trace_bytes=MAX_TRACE_BYTES)
+    interpreter.expand(start, stored.final_output[:start.output_offset], from_iteration, to_iteration)
+    return [interpreter.step_to_dict(step) for step in interpreter.execution_trace]
+
+
+def record_timeline(pseudocode: str,
+                    granularity: TraceGranularity = TraceGranularity.EXPRESSION,
+                    inputs: Optional[List[str]] = None,
+                    checkpoint_interval: int = TIMELINE_CHECKPOINT_INTERVAL) -> Tuple[str, int, str]:
+    """
+    Run the pseudocode keeping only periodic checkpoints instead of the steps.
+    :return: the id to reconstruct steps with, the number of steps and the final output
+    Raises TraceTooLong past MAX_TIMELINE_STEPS steps.
+    """
+    interpreter = StepByStepInterpreter(enable_debug=True, granularity=granularity, inputs=inputs,
+                                        keep_trace=False, checkpoint_interval=checkpoint_interval,
+                                        build_index=True, max_steps=MAX_TIMELINE_STEPS)
+    tokens = list(lex(pseudocode))
+    parser = Parser(tokens)
+    ast = parser.parse_program()
+    interpreter.visit(ast)
+
+    final_output = interpreter.get_final_output()
+    execution_id = execution_store.put(StoredExecution(
+        ast=ast,
+        inputs=inputs,
+        granularity=interpreter.granularity,
+        loop_detail=None,
+        checkpoints=[],
+        final_output=final_output,
+        step_checkpoints=interpreter.step_checkpoints,
+        total_steps=interpreter.step_counter,
+        index=interpreter.trace_index,
+    ))
+    return execution_id, interpreter.step_counter, final_output
+
+
+def reconstruct_steps(execution_id: str, first_step: int, count: int = 1) -> list:
+    """
+    Rebuild steps first_step..first_step + count - 1 of a recorded timeline by re-executing
+    from the nearest checkpoint before them.
+    Raises KeyError if the run is unknown (or expired), ValueError for a bad range.
+    """
+    stored = execution_store.get(execution_id)
+    if stored is None or not stored.total_steps:
+        raise KeyError(execution_id)
+    if not 1 <= first_step <= stored.total_steps:
+        raise ValueError(f"Step must lie within 1..{stored.total_steps}")
+    if not 1 <= count <= MAX_RECONSTRUCTED_STEPS:
+        raise ValueError(f"Between 1 and {MAX_RECONSTRUCTED_STEPS} steps can be reconstructed at once")
+    last_step = min(first_step + count - 1, stored.total_steps)
+
+    checkpoints = stored.step_checkpoints
+    index = bisect.bisect_left([checkpoint.step for checkpoint in checkpoints], first_step) - 1
+    start = checkpoints[index] if index >= 0 else None
+    output_prefix = stored.final_output[:start.output_offset] if start else ""
+
+    interpreter = StepByStepInterpreter(enable_debug=True, granularity=stored.granularity,
+                                        inputs=stored.inputs)
+    interpreter.replay_from(stored.ast, start, output_prefix, last_step)
+    # The steps between the checkpoint and first_step were only needed to get there
+    interpreter.execution_trace = [step for step in interpreter.execution_trace
+                                   if step.step_number >= first_step]
+    return [interpreter.step_to_dict(step) for step in interpreter.execution_trace]
+
+
+def _stored_index(execution_id: str, count: int) -> StoredExecution:
+    stored = execution_store.get(execution_id)
+    if stored is None or stored.index is None:
+        raise KeyError(execution_id)
+    if not 1 <= count <= MAX_QUERY_RESULTS:
+        raise ValueError(f"Between 1 and {MAX_QUERY_RESULTS} results can be returned at once")
+    return stored
+
+
+def find_line_steps(execution_id: str, line: int, from_step: int = 1,
+                    count: int = MAX_QUERY_RESULTS) -> List[int]:
+    """
+    Steps of a stored trace that ran `line`, from step `from_step` on.
+    Raises KeyError if the trace is unknown (or expired), ValueError for a bad count.
+    """
+    return _stored_index(execution_id, count).index.line_steps(line, from_step, count)
+
+
+def find_variable_changes(execution_id: str, name: str, from_step: int = 1,
+                          count: int = MAX_QUERY_RESULTS) -> List[dict]:
+    """
+    Steps of a stored trace at which variable `name` changed, with the new value.
+    Raises KeyError if the trace is unknown (or expired), ValueError for a bad count.
+    """
+    return _stored_index(execution_id, count).index.variable_changes(name, from_step, count)
+
+
+def find_first_variable_match(execution_id: str, name: str, op: str, value: float) -> Optional[int]:
+    """
+    First step of a stored trace at which variable `name` compares `op` (<, <=, >, >=) to `value`.
+    Raises KeyError if the trace is unknown (or expired), ValueError for an unsupported comparison.
+    """
+    return _stored_index(execution_id, 1).index.first_matching(name, op, value)
+
+
+def find_output_steps(execution_id: str, text: str, count: int = MAX_QUERY_RESULTS) -> List[int]:
+    """
+    Steps of a stored trace that completed printing each occurrence of `text`.
+    Raises KeyError if the trace is unknown (or expired), ValueError for a bad count.
+    """
+    stored = _stored_index(execution_id, count)
+    return stored.index.output_steps_containing(stored.final_output, text, count)
+
+
+def profile_execution(pseudocode: str, inputs: Optional[List[str]] = None) -> dict:
+    """
+    Run the pseudocode with the profiler on, without echoing its output to the server's stdout.
+    :return: the output, and executions and time per line and per loop, keyed by line number
+    Raises ProfileTooLong past MAX_PROFILED_STATEMENTS statements.
     """
-    interpreter = StepByStepInterpreter(enable_debug=True)
+    interpreter = Interpreter(inputs=inputs or [], profile=True,
+                              max_statements=MAX_PROFILED_STATEMENTS, echo=False)
     tokens = list(lex(pseudocode))
     parser = Parser(tokens)
     ast = parser.parse_program()
     interpreter.visit(ast)
-    trace = json.loads(interpreter.export_trace_json())
-    return trace
\ No newline at end of file
+    return {
+        "output": interpreter.get_final_output(),
+        "profile": interpreter.profiler.report(),
+    }
+
+
+def open_debug_session(pseudocode: str, inputs: Optional[List[str]] = None,
+                       granularity: TraceGranularity = TraceGranularity.STATEMENT) -> str:
+    """
+    Parse the pseudocode and open a paused debug session on it; nothing runs until the first command.
+    """
+    tokens = list(lex(pseudocode))
+    parser = Parser(tokens)
+    ast = parser.parse_program()
+    return debug_sessions.create(ast, inputs, granularity)
+
+
+def get_debug_session(session_id: str) -> DebugSession:
+    """
+    Raises KeyError if the session does not exist or was evicted.
+    """
+    session = debug_sessions.get(session_id)
+    if session is None:
+        raise KeyError(session_id)
+    return session
+
+
+def close_debug_session(session_id: str) -> bool:
+    return debug_sessions.close(session_id)
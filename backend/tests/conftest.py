@@ -0,0 +1,41 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+# The AI settings are read at import time by some modules; tests never reach the real model
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("GEMINI_BACKEND", "fake")
+
+from backend.src.pseudocode_to_cpp.compiler.lexer import lex
+from backend.src.pseudocode_to_cpp.compiler.parser import Parser
+
+
+def parse(source: str):
+    return Parser(list(lex(source))).parse_program()
+
+
+def run_quietly(interpreter, source: str):
+    """Run `source` on `interpreter`, swallowing what `scrie` prints to stdout."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.visit(parse(source))
+    return interpreter
+
+
+class FakeClock:
+    """Stands in for the `time` module of the code under test."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,69 @@
+import pytest
+
+from backend.src.pseudocode_to_cpp.interpreter.debug_session import (
+    DebugSession, DebugSessionManager, SessionBusy, SessionClosed)
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import StepByStepInterpreter
+
+from .conftest import parse, run_quietly
+
+PROGRAM = '''s <- 0
+pentru i <- 1, 5 executa
+    s <- s + i
+sfarsit_pentru
+scrie s'''
+
+
+@pytest.fixture
+def session():
+    session = DebugSession(parse(PROGRAM))
+    yield session
+    session.close()
+
+
+def test_stepping_returns_the_steps_of_a_full_run_in_order(session, capsys):
+    full = run_quietly(StepByStepInterpreter(granularity="statement"), PROGRAM)
+    expected = [StepByStepInterpreter.step_to_dict(step) for step in full.execution_trace]
+
+    stepped = session.step(3)["steps"]
+    while True:
+        result = session.step(4)
+        stepped += result["steps"]
+        if result["state"] == "finished":
+            break
+
+    assert stepped == expected
+    assert result["output"] == "15\n"
+
+
+def test_continue_stops_at_breakpoints_until_the_end(session, capsys):
+    session.set_breakpoints([3])
+    lines = []
+    while True:
+        result = session.continue_()
+        if result["state"] == "finished":
+            break
+        assert [step["line"] for step in result["steps"]] == [3]
+        lines.append(result["steps"][0]["variables"]["i"])
+    assert lines == [1, 2, 3, 4, 5]
+
+    # Commands on a finished session run nothing
+    assert session.step()["executed_steps"] == 0
+
+
+def test_command_on_a_busy_or_closed_session_is_refused(session):
+    session._running = True
+    with pytest.raises(SessionBusy):
+        session.step()
+    session._running = False
+    session.close()
+    with pytest.raises(SessionClosed):
+        session.step()
+
+
+def test_manager_closes_the_oldest_session_past_its_limit():
+    manager = DebugSessionManager(max_sessions=2)
+    first = manager.create(parse(PROGRAM))
+    manager.create(parse(PROGRAM))
+    manager.create(parse(PROGRAM))
+    assert manager.get(first) is None
+    assert len(manager._sessions) == 2
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import io
+
+from fastapi.testclient import TestClient
+
+from backend.src.ai_powered_functionalities.config import get_settings
+from backend.src.ai_powered_functionalities.models.responses import OCRResponse
+from backend.src.ai_powered_functionalities.ocr.text_extractor import TextExtractor
+from backend.src.server import app
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def test_oversized_upload_is_refused_before_the_route():
+    too_large = get_settings().MAX_IMAGE_SIZE_MB * 1024 * 1024 + 128 * 1024
+    response = TestClient(app).post("/api/v1/ocr/",
+                                    files={"image": ("big.png", PNG + b"\x00" * too_large, "image/png")})
+    assert response.status_code == 413
+
+
+def fake_extractor(monkeypatch, release: asyncio.Event):
+    extractor = TextExtractor()
+    reads = []
+
+    async def extract_with_model(image):
+        await release.wait()
+        reads.append(image.read())
+        return OCRResponse(extracted_text="scrie 1", confidence="high", preprocessing_applied=[])
+
+    monkeypatch.setattr(extractor, "_extract_with_model", extract_with_model)
+    return extractor, reads
+
+
+def test_file_is_hashed_when_no_digest_is_given(monkeypatch):
+    async def scenario():
+        release = asyncio.Event()
+        release.set()
+        extractor, reads = fake_extractor(monkeypatch, release)
+        upload = io.BytesIO(PNG)
+        result = await extractor.extract_and_clean(upload)
+        return result, reads, upload
+
+    result, reads, upload = asyncio.run(scenario())
+    assert result.extracted_text == "scrie 1"
+    assert reads == [PNG]
+    assert upload.closed
+
+
+def test_shared_extraction_keeps_its_file_when_the_first_caller_leaves(monkeypatch):
+    async def scenario():
+        release = asyncio.Event()
+        extractor, reads = fake_extractor(monkeypatch, release)
+        digest = hashlib.sha256(PNG).hexdigest()
+        first, second = io.BytesIO(PNG), io.BytesIO(PNG)
+
+        leaving = asyncio.ensure_future(extractor.extract_and_clean(first, digest))
+        staying = asyncio.ensure_future(extractor.extract_and_clean(second, digest))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        assert not first.closed
+
+        release.set()
+        return await staying, reads, first, second
+
+    result, reads, first, second = asyncio.run(scenario())
+    assert result.extracted_text == "scrie 1"
+    assert reads == [PNG]  # read from the first caller's file, after that caller left
+    assert first.closed and second.closed
@@ -0,0 +1,46 @@
+from backend.src.pseudocode_to_cpp.compiler.ast_node import ASTNodeType
+from backend.src.pseudocode_to_cpp.compiler.parser import parse_with_diagnostics
+from backend.src.service import pseudocode_diagnostics
+
+
+def test_valid_program_has_no_diagnostics():
+    ast, diagnostics = parse_with_diagnostics('citeste n\nscrie n * 2')
+    assert diagnostics == []
+    assert [child.kind for child in ast.children] == [ASTNodeType.READ, ASTNodeType.WRITE]
+
+
+def test_every_error_is_reported_in_one_pass_in_source_order():
+    _, diagnostics = parse_with_diagnostics('scrie 1\ncat timp a = 6 si a = 3\na <- 10\n')
+    assert [(d.line, d.col) for d in diagnostics] == [(2, 0), (3, 0)]
+    assert "sfarsit_cat_timp" in diagnostics[0].message
+    assert "executa" in diagnostics[1].message
+
+
+def test_parsing_resumes_after_a_bad_statement():
+    ast, diagnostics = parse_with_diagnostics('x <- (1 + \nscrie "ok"\ny <- 3 )')
+    assert len(diagnostics) == 2
+    kinds = [child.kind for child in ast.children]
+    # The statements after the error are still in the tree, and the stray token becomes an ERROR node
+    assert kinds[:3] == [ASTNodeType.ASSIGNMENT, ASTNodeType.WRITE, ASTNodeType.ASSIGNMENT]
+    assert kinds[-1] == ASTNodeType.ERROR
+
+
+def test_service_reports_diagnostics_with_their_span():
+    result = pseudocode_diagnostics('daca x atunci\n scrie 1\n')
+    (diagnostic,) = result["diagnostics"]
+    assert set(diagnostic) == {"message", "line", "col", "end_line", "end_col", "severity"}
+    assert diagnostic["severity"] == "error"
+    assert result["ast"]
+
+
+def test_follow_on_error_on_the_same_token_is_not_reported_twice():
+    _, diagnostics = parse_with_diagnostics('x <- (1 + \ny <- 2')
+    assert [(d.line, d.col) for d in diagnostics] == [(2, 2)]
+    assert "')'" in diagnostics[0].message
+
+
+def test_end_of_input_is_named_and_placed_after_the_last_character():
+    _, diagnostics = parse_with_diagnostics('scrie')
+    (diagnostic,) = diagnostics
+    assert "sfârșitul fișierului" in diagnostic.message
+    assert (diagnostic.line, diagnostic.col) == (1, 5)
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from backend.src.ai_powered_functionalities.generate_problem_statements.problem_pool import (
+    ProblemPool, normalize_difficulty)
+
+PROBLEM = {
+    "enunt": "Suma a două numere", "date_intrare": "a b", "date_iesire": "a + b",
+    "exemplu_intrare": "1 2", "exemplu_iesire": "3", "nivel_dificultate": "Ușor",
+}
+
+
+def write(path, content):
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+
+
+def test_valid_entries_are_loaded_and_invalid_ones_skipped(tmp_path):
+    path = tmp_path / "pool.json"
+    write(path, {"usor": [PROBLEM, {"enunt": "incomplet"}, 3, None], "mediu": "nu e listă", "altul": [PROBLEM]})
+    pool = ProblemPool(None, path=str(path))
+    assert pool.sizes() == {"usor": 1, "mediu": 0, "dificil": 0}
+    assert pool.take("usor").enunt == PROBLEM["enunt"]
+
+
+def test_unreadable_or_non_object_file_gives_an_empty_pool(tmp_path):
+    path = tmp_path / "pool.json"
+    for content in ("{broken", [PROBLEM], "null"):
+        write(path, content)
+        assert ProblemPool(None, path=str(path)).sizes() == {"usor": 0, "mediu": 0, "dificil": 0}
+
+
+def test_saved_problems_go_to_a_single_worker(tmp_path):
+    path = tmp_path / "pool.json"
+    write(path, {"usor": [PROBLEM]})
+    first, second = ProblemPool(None, path=str(path)), ProblemPool(None, path=str(path))
+    assert first.sizes()["usor"] == 1
+    assert second.sizes()["usor"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_pool_is_saved_on_stop(tmp_path):
+    path = tmp_path / "pool.json"
+    write(path, {"dificil": [PROBLEM]})
+    pool = ProblemPool(None, path=str(path))
+    asyncio.run(pool.stop())
+    assert json.loads(path.read_text(encoding="utf-8"))["usor"][0]["enunt"] == PROBLEM["enunt"]
+
+
+def test_difficulty_names_are_normalized():
+    assert normalize_difficulty(" Ușor ") == "usor"
+    assert normalize_difficulty("DIFICIL") == "dificil"
+    assert normalize_difficulty("imposibil") is None
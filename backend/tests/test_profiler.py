@@ -0,0 +1,28 @@
+import pytest
+
+from backend.src import service
+from backend.src.pseudocode_to_cpp.interpreter.profiler import ProfileTooLong
+
+PROGRAM = '''s <- 0
+pentru i <- 1, 10 executa
+    s <- s + i
+sfarsit_pentru
+scrie s'''
+
+
+def test_profile_counts_lines_and_loops_without_printing(capsys):
+    result = service.profile_execution(PROGRAM)
+    assert result["output"] == "55\n"
+    assert capsys.readouterr().out == ""
+    assert result["profile"]["lines"][3]["count"] == 10
+    assert result["profile"]["loops"][2]["iterations"] == 10
+
+
+@pytest.mark.parametrize("source", [
+    "x <- 0\ncat timp 1 = 1 executa\n    x <- x + 1\nsfarsit_cat_timp",
+    "cat timp 1 = 1 executa\nsfarsit_cat_timp",
+])
+def test_endless_program_is_stopped(source, monkeypatch):
+    monkeypatch.setattr(service, "MAX_PROFILED_STATEMENTS", 1000)
+    with pytest.raises(ProfileTooLong):
+        service.profile_execution(source)
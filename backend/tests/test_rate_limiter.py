@@ -0,0 +1,96 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.src import rate_limiter
+from backend.src.rate_limiter import MemoryRateLimitBackend, RateLimitBackend, SQLiteRateLimitBackend, _take_token
+
+import pytest
+
+
+def test_bucket_allows_a_burst_then_refuses():
+    tokens, now = 3.0, 0.0
+    results = []
+    for _ in range(4):
+        allowed, tokens, retry_after, _ = _take_token(tokens, now, capacity=3, window_seconds=3600, now=now)
+        results.append(allowed)
+    assert results == [True, True, True, False]
+    # One token comes back every window / capacity seconds
+    assert retry_after == pytest.approx(1200)
+
+
+def test_bucket_refills_gradually_and_never_above_capacity():
+    allowed, tokens, _, _ = _take_token(0.0, 0.0, capacity=3, window_seconds=3600, now=1200)
+    assert allowed and tokens == pytest.approx(0.0)
+
+    _, tokens, _, expires_at = _take_token(0.0, 0.0, capacity=3, window_seconds=3600, now=10 * 3600)
+    assert tokens == pytest.approx(2.0)
+    # Full again one token's worth of time later
+    assert expires_at == pytest.approx(10 * 3600 + 1200)
+
+
+def test_memory_backend_drops_keys_once_their_bucket_is_full(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    backend = MemoryRateLimitBackend()
+    assert backend.acquire("a", 2, 3600)[:2] == (True, 1)
+    assert backend.acquire("a", 2, 3600)[:2] == (True, 0)
+    assert backend.acquire("a", 2, 3600)[0] is False
+
+    clock.now += 3600
+    backend.acquire("b", 2, 3600)
+    assert len(backend) == 1
+    assert backend.acquire("a", 2, 3600)[:2] == (True, 1)
+
+
+def test_memory_backend_evicts_least_recently_seen_key(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    backend = MemoryRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        backend.acquire(key, 5, 3600)
+    assert len(backend) == 2
+    # "b" was evicted, so it starts again from a full bucket
+    assert backend.acquire("b", 5, 3600)[1] == 4
+
+
+def test_backend_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+def test_sqlite_backend_shares_buckets_between_connections(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+    assert first.acquire("k", 2, 3600)[0]
+    assert second.acquire("k", 2, 3600)[0]
+    assert first.acquire("k", 2, 3600)[0] is False
+
+
+def test_sqlite_backend_fails_open_when_locked(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "limits.sqlite3")
+    backend = SQLiteRateLimitBackend(path, lock_timeout=0.05)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert backend.acquire("k", 1, 3600)[0] is True
+    finally:
+        other.execute("ROLLBACK")
+
+
+def test_refused_request_gets_the_refill_time(monkeypatch):
+    backend = MemoryRateLimitBackend()
+    monkeypatch.setattr(rate_limiter, "get_rate_limit_backend", lambda: backend)
+    app = FastAPI()
+
+    @app.get("/limited")
+    @rate_limiter.rate_limit(max_calls=3, window_hours=1)
+    async def limited(request: Request):
+        return {}
+
+    client = TestClient(app)
+    assert [client.get("/limited").status_code for _ in range(3)] == [200, 200, 200]
+    response = client.get("/limited")
+    assert response.status_code == 429
+    assert 1190 < int(response.headers["Retry-After"]) <= 1200
+    assert response.json()["detail"] == ("Rate limit exceeded. Up to 3 requests are allowed at once, "
+                                         "then one more every 20 minutes. Try again in 20 minutes.")
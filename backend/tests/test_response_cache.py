@@ -0,0 +1,56 @@
+import json
+
+from backend.src.ai_powered_functionalities.utils import cache as cache_module
+from backend.src.ai_powered_functionalities.utils.cache import ResponseCache
+
+
+def test_entries_expire_after_their_ttl(clock, monkeypatch):
+    monkeypatch.setattr(cache_module, "time", clock)
+    cache = ResponseCache(max_entries=4, ttl_seconds=10)
+    cache.set("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert [key for key, _ in cache.items()] == ["a", "c"]
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ResponseCache(max_entries=4, ttl_seconds=60, path=path, save_delay=60)
+    cache.set("a", {"text": "ă"})
+    cache.flush()
+    assert ResponseCache(max_entries=4, ttl_seconds=60, path=path).get("a") == {"text": "ă"}
+    assert [name for name in tmp_path.iterdir()] == [tmp_path / "cache.json"]
+
+
+def test_corrupt_file_loads_what_it_can(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json")
+    assert len(ResponseCache(max_entries=4, ttl_seconds=60, path=str(path))) == 0
+
+    path.write_text(json.dumps({"a": 1}))
+    assert len(ResponseCache(max_entries=4, ttl_seconds=60, path=str(path))) == 0
+
+    path.write_text(json.dumps([["good", 4e12, 1], ["short"], 7, ["expired", 0, 2]]))
+    loaded = ResponseCache(max_entries=4, ttl_seconds=60, path=str(path))
+    assert [key for key, _ in loaded.items()] == ["good"]
+
+
+def test_failed_save_is_reported_not_raised(tmp_path, capsys):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = ResponseCache(max_entries=4, ttl_seconds=60, path=str(blocker / "cache.json"), save_delay=60)
+    cache.set("a", 1)
+    cache.flush()
+    assert cache.get("a") == 1
+    assert "could not be saved" in capsys.readouterr().out
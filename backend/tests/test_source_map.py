@@ -0,0 +1,18 @@
+from backend.src.service import pseudocode_to_cpp_with_source_map
+
+PROGRAM = '''pentru i <- 1, 3 executa
+    daca i > 1 atunci
+        scrie i
+    sfarsit_daca
+sfarsit_pentru
+repeta
+  i <- i - 1
+  pana cand i < 0'''
+
+
+def test_block_closers_map_to_their_own_column():
+    cpp_code, source_map = pseudocode_to_cpp_with_source_map(PROGRAM)
+    cpp_lines = cpp_code.splitlines()
+    closers = {entry["line"]: (entry["col"], entry["end_col"]) for entry in source_map
+               if cpp_lines[entry["cpp_line"] - 1].lstrip().startswith("}")}
+    assert closers == {4: (4, 16), 5: (0, 14), 8: (2, 17)}
@@ -0,0 +1,126 @@
+import json
+import re
+
+import pytest
+
+from backend.src import service
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import StepByStepInterpreter
+from backend.src.pseudocode_to_cpp.interpreter.trace_log import TraceTooLong
+
+from .conftest import run_quietly
+
+PROGRAM = '''s <- 0
+pentru i <- 1, 40 executa
+    s <- s + i
+    daca i % 10 = 0 atunci
+        scrie s
+    sfarsit_daca
+sfarsit_pentru
+k <- 0
+cat timp k < 25 executa
+    k <- k + 1
+sfarsit_cat_timp
+scrie s, " ", k'''
+
+
+def without_step_number(step):
+    return {key: value for key, value in step.items() if key != "step"}
+
+
+def recorded(interpreter):
+    return [without_step_number(interpreter.step_to_dict(step)) for step in interpreter.execution_trace]
+
+
+@pytest.mark.parametrize("granularity, node_types, conditions", [
+    ("statement", {"PROGRAM", "ASSIGNMENT", "FOR", "WHILE", "WRITE"}, False),
+    ("condition", {"PROGRAM", "ASSIGNMENT", "FOR", "WHILE", "WRITE", "IF"}, True),
+])
+def test_coarser_granularity_records_a_subsequence_of_the_full_trace(granularity, node_types, conditions):
+    full = recorded(run_quietly(StepByStepInterpreter(), PROGRAM))
+    coarse = run_quietly(StepByStepInterpreter(granularity=granularity), PROGRAM)
+    steps = recorded(coarse)
+
+    assert {step["type"] for step in steps} == node_types
+    assert any("condiție" in step["description"] for step in steps) == conditions
+    # Without condition steps, each WHILE iteration gets a step of its own instead
+    markers = [step for step in steps if re.fullmatch(r"WHILE iterația \d+", step["description"])]
+    assert len(markers) == (0 if conditions else 25)
+    remaining = iter(full)
+    assert all(step in remaining for step in steps if step not in markers)
+    assert coarse.get_final_output() == "55\n210\n465\n820\n820 25\n"
+
+
+def test_expanding_collapsed_iterations_gives_back_the_full_trace():
+    full = run_quietly(StepByStepInterpreter(), PROGRAM)
+    collapsed = run_quietly(StepByStepInterpreter(loop_detail=2), PROGRAM)
+    assert len(collapsed.execution_trace) < len(full.execution_trace)
+    assert collapsed.get_final_output() == full.get_final_output()
+
+    rebuilt = []
+    for step in collapsed.execution_trace:
+        if step.summary is None:
+            rebuilt.append(without_step_number(collapsed.step_to_dict(step)))
+            continue
+        checkpoint = collapsed.checkpoints[step.summary["checkpoint"]]
+        expanded = StepByStepInterpreter()
+        expanded.expand(checkpoint, collapsed.get_final_output()[:checkpoint.output_offset])
+        rebuilt.extend(recorded(expanded))
+
+    assert rebuilt == recorded(full)
+
+
+def test_summary_describes_the_collapsed_range():
+    collapsed = run_quietly(StepByStepInterpreter(loop_detail=2), PROGRAM)
+    summaries = [step.summary for step in collapsed.execution_trace if step.summary]
+    assert [(s["from_iteration"], s["to_iteration"]) for s in summaries] == [(3, 38), (3, 23)]
+    assert summaries[0]["output"] == "55\n210\n465\n"
+
+
+def test_expanding_does_not_touch_the_stored_run():
+    nested = """pentru i <- 1, 20 executa
+    pentru j <- 1, 20 executa
+        s <- i * j
+    sfarsit_pentru
+sfarsit_pentru"""
+    _, trace_id, _ = service.step_by_step_execution(nested, "statement", loop_detail=2)
+    stored = service.execution_store.get(trace_id)
+    checkpoints = list(stored.checkpoints)
+
+    for _ in range(3):
+        steps = service.expand_loop_iterations(trace_id, 0)
+        assert not any("summary" in step for step in steps)
+    assert stored.checkpoints == checkpoints
+
+
+def test_collapsed_iterations_count_towards_the_step_limit():
+    endless = """x <- 0
+cat timp 1 = 1 executa
+    x <- x + 1
+sfarsit_cat_timp"""
+    with pytest.raises(TraceTooLong):
+        run_quietly(StepByStepInterpreter(loop_detail=2, max_steps=1000), endless)
+
+
+@pytest.mark.parametrize("granularity", ["statement", "condition", "expression"])
+def test_timeline_reconstruction_matches_the_full_trace(granularity):
+    body, _, total = service.step_by_step_execution(PROGRAM, granularity)
+    full = json.loads(body)
+    timeline_id, timeline_total, output = service.record_timeline(PROGRAM, granularity, checkpoint_interval=50)
+    assert timeline_total == total
+    assert output == full[-1]["output"]
+
+    for first in range(1, total + 1, 37):
+        assert service.reconstruct_steps(timeline_id, first, 37) == full[first - 1:first + 36]
+
+
+def test_reconstruction_rejects_out_of_range_steps():
+    timeline_id, total, _ = service.record_timeline(PROGRAM)
+    with pytest.raises(ValueError):
+        service.reconstruct_steps(timeline_id, total + 1)
+    with pytest.raises(KeyError):
+        service.reconstruct_steps("unknown", 1)
+
+
+def test_step_limit_stops_the_run():
+    with pytest.raises(TraceTooLong):
+        run_quietly(StepByStepInterpreter(max_steps=100), PROGRAM)
@@ -0,0 +1,34 @@
+import pytest
+
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import StepByStepInterpreter
+from backend.src.pseudocode_to_cpp.interpreter.trace_encoding import decode_columnar, encode_columnar
+
+from .conftest import run_quietly
+
+PROGRAM = '''nume <- "Ana"
+x <- 1.5
+pentru i <- 1, 30 executa
+    x <- x * 2
+    daca i % 7 = 0 atunci
+        scrie nume, ": ", i, " ș ", x
+    sfarsit_daca
+sfarsit_pentru
+ok <- x > 100'''
+
+
+@pytest.mark.parametrize("loop_detail", [None, 3])
+def test_columnar_round_trip_is_lossless(loop_detail):
+    interpreter = run_quietly(StepByStepInterpreter(loop_detail=loop_detail), PROGRAM)
+    steps = [interpreter.step_to_dict(step) for step in interpreter.execution_trace]
+    payload = encode_columnar(steps)
+    assert decode_columnar(payload) == steps
+    assert any("summary" in step for step in steps) == (loop_detail is not None)
+
+
+def test_empty_trace_round_trips():
+    assert decode_columnar(encode_columnar([])) == []
+
+
+def test_other_payloads_are_rejected():
+    with pytest.raises(ValueError):
+        decode_columnar(b"PSTX" + bytes(8))
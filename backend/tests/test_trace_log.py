@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from backend.src import service
+from backend.src.pseudocode_to_cpp.interpreter.step_by_step_interpreter import StepByStepInterpreter
+from backend.src.pseudocode_to_cpp.interpreter.trace_log import SpilledTrace, TraceTooLong
+
+from .conftest import run_quietly
+
+PROGRAM = 'pentru i <- 1, 300 executa\n    scrie "linia ", i\nsfarsit_pentru'
+
+
+@pytest.fixture(scope="module")
+def traces():
+    in_memory = run_quietly(StepByStepInterpreter(), PROGRAM)
+    spilled = run_quietly(StepByStepInterpreter(spill_threshold_bytes=20_000), PROGRAM)
+    assert not in_memory.trace_spilled and spilled.trace_spilled
+    return in_memory, spilled
+
+
+def test_spilled_pages_match_the_in_memory_trace(traces):
+    in_memory, spilled = traces
+    log = spilled.execution_trace
+    assert len(log) == len(in_memory.execution_trace)
+    for start in (0, 1, 500, len(log) - 3):
+        expected = [in_memory.step_to_dict(step) for step in in_memory.execution_trace[start:start + 25]]
+        assert log.records(start, 25) == expected
+        assert [json.loads(record) for record in log.raw_records(start, 25)] == expected
+        assert [in_memory.step_to_dict(step) for step in log[start:start + 25]] == expected
+
+
+def test_spilled_trace_behaves_like_a_list(traces):
+    in_memory, spilled = traces
+    log, export = spilled.execution_trace, in_memory.step_to_dict
+    assert export(log[-1]) == export(in_memory.execution_trace[-1])
+    assert list(map(export, log[::400])) == list(map(export, in_memory.execution_trace[::400]))
+    assert list(map(export, log)) == list(map(export, in_memory.execution_trace))
+    assert log.records(len(log), 10) == []
+    with pytest.raises(IndexError):
+        log[len(log)]
+
+
+def test_output_is_not_stored_once_per_step(traces):
+    _, spilled = traces
+    log = spilled.execution_trace
+    total_output = sum(len(record["output"]) for record in log.records(0, len(log)))
+    # Each record is a fixed-size step description; the text itself is kept once
+    assert log.size_bytes < total_output / 5
+
+
+def test_size_limit_raises():
+    log = SpilledTrace(StepByStepInterpreter.step_to_dict, StepByStepInterpreter.step_from_dict, max_bytes=2_000)
+    interpreter = StepByStepInterpreter()
+    interpreter.execution_trace = log
+    interpreter.max_trace_bytes = 2_000
+    with pytest.raises(TraceTooLong):
+        run_quietly(interpreter, PROGRAM)
+
+
+def test_service_pages_through_a_stored_trace():
+    body, trace_id, total = service.step_by_step_execution(PROGRAM)
+    full = json.loads(body)
+    assert len(full) == total
+    assert json.loads(service.trace_page(trace_id, 101, 50)) == full[100:150]
+    with pytest.raises(ValueError):
+        service.trace_page(trace_id, 1, service.TRACE_PAGE_SIZE + 1)
@@ -0,0 +1,36 @@
+from backend.src.pseudocode_to_cpp.compiler.type_inference import (
+    BOOL, DOUBLE, INT, LONG_LONG, STRING, infer_types, join)
+
+from .conftest import parse
+
+
+def test_join_follows_the_numeric_lattice():
+    assert join(None, INT) == INT
+    assert join(INT, None) == INT
+    assert join(BOOL, INT) == INT
+    assert join(INT, LONG_LONG) == LONG_LONG
+    assert join(DOUBLE, LONG_LONG) == DOUBLE
+    assert join(INT, STRING) == STRING
+    assert join(STRING, BOOL) == STRING
+
+
+def test_variable_takes_the_join_of_everything_assigned_to_it():
+    types = infer_types(parse('x <- 1\ndaca x > 0 atunci\n x <- 2.5\nsfarsit_daca\nok <- x > 1\nmare <- 10000000000'))
+    assert types == {"x": DOUBLE, "ok": BOOL, "mare": LONG_LONG}
+
+
+def test_types_propagate_through_loops_to_a_fixed_point():
+    source = 's <- 0\npentru i <- 1, 10 executa\n s <- s + i / 2\nsfarsit_pentru\nt <- s'
+    assert infer_types(parse(source)) == {"s": DOUBLE, "i": INT, "t": DOUBLE}
+
+
+def test_read_variables_default_to_int_unless_compared_otherwise():
+    assert infer_types(parse('citeste n\nscrie n % 2')) == {"n": INT}
+    assert infer_types(parse('citeste x\ndaca x > 2.5 atunci\n scrie 1\nsfarsit_daca')) == {"x": DOUBLE}
+    assert infer_types(parse('citeste r\ndaca "da" = r atunci\n scrie 1\nsfarsit_daca')) == {"r": STRING}
+
+
+def test_expressions_are_annotated():
+    program = parse('x <- 7 / 2')
+    infer_types(program)
+    assert program.children[0].children[1].static_type == DOUBLE